@@ -0,0 +1,38 @@
+"""classification result cache (classification_results)
+
+Revision ID: a3d7e9c1b582
+Revises: f2c8d6e1a904
+Create Date: 2026-10-18 16:05:12.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d7e9c1b582'
+down_revision: Union[str, Sequence[str], None] = 'f2c8d6e1a904'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Sem FK para image_blobs: imagens rejeitadas não viram blob e o
+    # resultado continua útil depois que a última ocorrência é apagada
+    op.create_table('classification_results',
+    sa.Column('image_sha256', sa.String(length=64), nullable=False),
+    sa.Column('model_version', sa.String(length=64), nullable=False),
+    sa.Column('prediction', sa.Integer(), nullable=False),
+    sa.Column('probability', sa.Float(), nullable=False),
+    sa.Column('classify_seconds', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('image_sha256', 'model_version')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('classification_results')
@@ -0,0 +1,35 @@
+"""occurrence listing indexes
+
+Revision ID: b3f1c9d2e4a7
+Revises: 6a37687f45f0
+Create Date: 2026-10-18 09:12:40.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f1c9d2e4a7'
+down_revision: Union[str, Sequence[str], None] = '6a37687f45f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Índices usados pelos filtros da listagem GeoJSON
+    op.create_index(op.f('ix_occurrences_category'), 'occurrences', ['category'], unique=False)
+    op.create_index(op.f('ix_occurrences_created_at'), 'occurrences', ['created_at'], unique=False)
+    op.create_index(op.f('ix_occurrences_severity_id'), 'occurrences', ['severity_id'], unique=False)
+    op.create_index(op.f('ix_occurrences_status'), 'occurrences', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_occurrences_status'), table_name='occurrences')
+    op.drop_index(op.f('ix_occurrences_severity_id'), table_name='occurrences')
+    op.drop_index(op.f('ix_occurrences_created_at'), table_name='occurrences')
+    op.drop_index(op.f('ix_occurrences_category'), table_name='occurrences')
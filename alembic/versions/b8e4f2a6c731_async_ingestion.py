@@ -0,0 +1,63 @@
+"""async ingestion ('validando' status and ingestion_jobs)
+
+Revision ID: b8e4f2a6c731
+Revises: a3d7e9c1b582
+Create Date: 2026-10-18 17:31:48.660215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e4f2a6c731'
+down_revision: Union[str, Sequence[str], None] = 'a3d7e9c1b582'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ADD VALUE não pode rodar dentro de uma transação no PostgreSQL < 12
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE occurrence_status ADD VALUE IF NOT EXISTS 'validando'")
+
+    op.create_table('ingestion_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('occurrence_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('prediction', sa.Integer(), nullable=True),
+    sa.Column('probability', sa.Float(), nullable=True),
+    sa.Column('detail', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ingestion_jobs_id'), 'ingestion_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_ingestion_jobs_occurrence_id'), 'ingestion_jobs', ['occurrence_id'], unique=False)
+    op.create_index(op.f('ix_ingestion_jobs_status'), 'ingestion_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_ingestion_jobs_status'), table_name='ingestion_jobs')
+    op.drop_index(op.f('ix_ingestion_jobs_occurrence_id'), table_name='ingestion_jobs')
+    op.drop_index(op.f('ix_ingestion_jobs_id'), table_name='ingestion_jobs')
+    op.drop_table('ingestion_jobs')
+
+    # O PostgreSQL não remove valores de um ENUM: recria o tipo sem
+    # 'validando'. Ocorrências ainda em validação voltam a 'pendente'
+    op.execute("UPDATE occurrences SET status = 'pendente' WHERE status = 'validando'")
+    op.execute("ALTER TYPE occurrence_status RENAME TO occurrence_status_old")
+    op.execute("CREATE TYPE occurrence_status AS ENUM ('ativa', 'pendente', 'resolvida')")
+    op.execute(
+        "ALTER TABLE occurrences ALTER COLUMN status TYPE occurrence_status "
+        "USING status::text::occurrence_status"
+    )
+    op.execute("DROP TYPE occurrence_status_old")
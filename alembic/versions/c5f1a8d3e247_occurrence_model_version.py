@@ -0,0 +1,31 @@
+"""classifier model version on occurrences
+
+Revision ID: c5f1a8d3e247
+Revises: b8e4f2a6c731
+Create Date: 2026-10-18 19:12:07.395820
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f1a8d3e247'
+down_revision: Union[str, Sequence[str], None] = 'b8e4f2a6c731'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Ocorrências antigas ficam com a versão nula (modelo desconhecido)
+    op.add_column('occurrences', sa.Column('model_version', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_occurrences_model_version'), 'occurrences', ['model_version'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_occurrences_model_version'), table_name='occurrences')
+    op.drop_column('occurrences', 'model_version')
@@ -0,0 +1,70 @@
+"""occurrence geohash column with backfill
+
+Revision ID: c7e2a4b8d913
+Revises: b3f1c9d2e4a7
+Create Date: 2026-10-18 10:03:11.482915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.geo import encode_geohash
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e2a4b8d913'
+down_revision: Union[str, Sequence[str], None] = 'b3f1c9d2e4a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('occurrences', sa.Column('geohash', sa.String(length=12), nullable=True))
+
+    # Backfill em lotes, percorrendo a tabela pelo id
+    occurrences = sa.table(
+        'occurrences',
+        sa.column('id', sa.Integer),
+        sa.column('latitude', sa.Float),
+        sa.column('longitude', sa.Float),
+        sa.column('geohash', sa.String),
+    )
+    update = (
+        occurrences.update()
+        .where(occurrences.c.id == sa.bindparam('_id'))
+        .values(geohash=sa.bindparam('_geohash'))
+    )
+
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(occurrences.c.id, occurrences.c.latitude, occurrences.c.longitude)
+            .where(occurrences.c.id > last_id)
+            .order_by(occurrences.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        bind.execute(
+            update,
+            [
+                {'_id': row.id, '_geohash': encode_geohash(row.latitude, row.longitude)}
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+    op.create_index(op.f('ix_occurrences_geohash'), 'occurrences', ['geohash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_occurrences_geohash'), table_name='occurrences')
+    op.drop_column('occurrences', 'geohash')
@@ -0,0 +1,38 @@
+"""data versions table
+
+Revision ID: d41e8f6a2c55
+Revises: c7e2a4b8d913
+Create Date: 2026-10-18 11:27:52.903614
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41e8f6a2c55'
+down_revision: Union[str, Sequence[str], None] = 'c7e2a4b8d913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    data_versions = op.create_table('data_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(
+        data_versions,
+        [{'name': 'occurrences', 'version': 0, 'updated_at': datetime.utcnow()}],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('data_versions')
@@ -0,0 +1,29 @@
+"""classifier score on occurrences
+
+Revision ID: d9b3f7a1e468
+Revises: c5f1a8d3e247
+Create Date: 2026-10-18 21:40:53.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9b3f7a1e468'
+down_revision: Union[str, Sequence[str], None] = 'c5f1a8d3e247'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nulo até a ocorrência ser classificada de novo (python -m app.cli.reclassify)
+    op.add_column('occurrences', sa.Column('model_score', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('occurrences', 'model_score')
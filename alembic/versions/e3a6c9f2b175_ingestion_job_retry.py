@@ -0,0 +1,39 @@
+"""ingestion job retry backoff and one job per occurrence
+
+Revision ID: e3a6c9f2b175
+Revises: d9b3f7a1e468
+Create Date: 2026-10-19 10:05:12.482913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a6c9f2b175'
+down_revision: Union[str, Sequence[str], None] = 'd9b3f7a1e468'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ingestion_jobs', sa.Column('retry_after', sa.DateTime(), nullable=True))
+
+    # Duplicatas criadas por enqueue_orphans em processos concorrentes:
+    # fica o job mais recente de cada ocorrência
+    op.execute(
+        "DELETE FROM ingestion_jobs a USING ingestion_jobs b "
+        "WHERE a.occurrence_id = b.occurrence_id AND a.id < b.id"
+    )
+    op.drop_index(op.f('ix_ingestion_jobs_occurrence_id'), table_name='ingestion_jobs')
+    op.create_index(op.f('ix_ingestion_jobs_occurrence_id'), 'ingestion_jobs', ['occurrence_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_ingestion_jobs_occurrence_id'), table_name='ingestion_jobs')
+    op.create_index(op.f('ix_ingestion_jobs_occurrence_id'), 'ingestion_jobs', ['occurrence_id'], unique=False)
+    op.drop_column('ingestion_jobs', 'retry_after')
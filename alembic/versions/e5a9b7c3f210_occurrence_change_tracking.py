@@ -0,0 +1,52 @@
+"""occurrence change tracking (updated_at, change_seq, tombstones)
+
+Revision ID: e5a9b7c3f210
+Revises: d41e8f6a2c55
+Create Date: 2026-10-18 12:05:19.377410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9b7c3f210'
+down_revision: Union[str, Sequence[str], None] = 'd41e8f6a2c55'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('occurrences', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.add_column('occurrences', sa.Column('change_seq', sa.BigInteger(), nullable=True))
+
+    # Linhas existentes recebem sequências distintas (o próprio id) e o
+    # contador global avança para além delas, mantendo a ordem monotônica
+    op.execute("UPDATE occurrences SET change_seq = id, updated_at = created_at")
+    op.execute(
+        "UPDATE data_versions SET version = GREATEST(version, "
+        "(SELECT COALESCE(MAX(id), 0) FROM occurrences)) "
+        "WHERE name = 'occurrences'"
+    )
+
+    op.create_index(op.f('ix_occurrences_change_seq'), 'occurrences', ['change_seq'], unique=False)
+
+    op.create_table('occurrence_tombstones',
+    sa.Column('occurrence_id', sa.Integer(), nullable=False),
+    sa.Column('change_seq', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('occurrence_id')
+    )
+    op.create_index(op.f('ix_occurrence_tombstones_change_seq'), 'occurrence_tombstones', ['change_seq'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_occurrence_tombstones_change_seq'), table_name='occurrence_tombstones')
+    op.drop_table('occurrence_tombstones')
+    op.drop_index(op.f('ix_occurrences_change_seq'), table_name='occurrences')
+    op.drop_column('occurrences', 'change_seq')
+    op.drop_column('occurrences', 'updated_at')
@@ -0,0 +1,46 @@
+"""content-addressed image storage (image_blobs, occurrences.image_sha256)
+
+Revision ID: f2c8d6e1a904
+Revises: e5a9b7c3f210
+Create Date: 2026-10-18 14:22:41.518903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c8d6e1a904'
+down_revision: Union[str, Sequence[str], None] = 'e5a9b7c3f210'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('image_blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('path', sa.String(length=255), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+
+    # Ocorrências antigas ficam com image_sha256 nulo e continuam usando o
+    # caminho original em image_path
+    op.add_column('occurrences', sa.Column('image_sha256', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_occurrences_image_sha256'), 'occurrences', ['image_sha256'], unique=False)
+    op.create_foreign_key(
+        'occurrences_image_sha256_fkey', 'occurrences', 'image_blobs', ['image_sha256'], ['sha256']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('occurrences_image_sha256_fkey', 'occurrences', type_='foreignkey')
+    op.drop_index(op.f('ix_occurrences_image_sha256'), table_name='occurrences')
+    op.drop_column('occurrences', 'image_sha256')
+    op.drop_table('image_blobs')
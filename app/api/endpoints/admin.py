@@ -0,0 +1,53 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+
+# Core
+from app.core.auth import require_admin_token
+
+# Schemas
+from app.schemas.admin import ModelReloadResponse, ModelVersionsResponse
+
+# Services
+from app.services.classifier_service import registry, reload_model
+from app.services.model_store import current_model_version, list_model_versions
+
+router = APIRouter(dependencies=[Depends(require_admin_token)])
+
+
+@router.get("/model", response_model=ModelVersionsResponse)
+def get_model_versions():
+    """Versões do classificador disponíveis, a publicada e a em uso."""
+    return {
+        "current": current_model_version(),
+        "loaded": registry.get().version if registry.loaded else None,
+        "available": list_model_versions(),
+    }
+
+
+@router.post("/model/reload", response_model=ModelReloadResponse)
+async def reload_classifier_model(
+    version: Annotated[
+        str | None,
+        Query(description="Versão a ativar; omitida, recarrega a de models/CURRENT"),
+    ] = None,
+):
+    """
+    Ativa uma versão do classificador sem reiniciar. O modelo novo é
+    carregado e aquecido antes da troca; requisições em andamento
+    terminam na versão anterior.
+
+    Com ``version``, models/CURRENT passa a apontar para ela (depois de
+    carregada sem erro), e os demais workers do uvicorn a adotam na
+    próxima verificação (CLASSIFIER_RELOAD_POLL_SECONDS).
+    """
+    try:
+        previous, engine = await run_in_threadpool(reload_model, version, True)
+    except (FileNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    return {
+        "previous": previous.version if previous is not None else None,
+        "loaded": engine.version,
+    }
@@ -9,13 +9,23 @@ from app.services.insight_service import InsightService
 
 # Dependencies
 from app.core.dependencies import Insight_service
+from app.core.http_cache import conditional_get
+from app.models.data_version import OCCURRENCES_VERSION
 
 router = APIRouter()
 
 
 @router.get("", response_model=InsightResponse)
-def get_insights(insight_service: Insight_service):
+def get_insights(
+    insight_service: Insight_service,
+    _cache_headers: Annotated[
+        dict[str, str], Depends(conditional_get(OCCURRENCES_VERSION))
+    ],
+):
     """
     Retorna insights e estatísticas sobre as ocorrências.
+
+    Responde 304 quando o If-None-Match do cliente corresponde à versão
+    atual dos dados.
     """
     return insight_service.get_insights()
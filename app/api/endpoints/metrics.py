@@ -0,0 +1,33 @@
+from fastapi import APIRouter
+
+from app.core.compression import compressed_cache
+from app.services.classifier_pool import batcher
+from app.services.classifier_service import registry
+from app.services.ingestion_worker import ingestion_worker
+from app.services.occurrence_service import (
+    classification_cache,
+    feature_cache,
+    tile_cache,
+)
+
+router = APIRouter()
+
+
+@router.get("")
+def get_metrics() -> dict:
+    """
+    Estatísticas dos caches em memória deste processo (itens, bytes,
+    acertos, falhas e remoções), do modelo carregado, da fila de
+    micro-lotes do classificador, do cache de resultados da
+    classificação (com o tempo de CPU poupado) e da validação em
+    segundo plano.
+    """
+    return {
+        "feature_cache": feature_cache.stats(),
+        "tile_cache": tile_cache.stats(),
+        "compressed_cache": compressed_cache.stats(),
+        "classifier_model": registry.stats(),
+        "classifier_batcher": batcher.stats(),
+        "classification_cache": classification_cache.stats(),
+        "ingestion_worker": ingestion_worker.stats(),
+    }
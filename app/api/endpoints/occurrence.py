@@ -1,4 +1,5 @@
-from typing import Annotated
+from datetime import datetime
+from typing import Annotated, Literal
 from sqlalchemy.orm import Session
 
 from fastapi import (
@@ -9,25 +10,38 @@ from fastapi import (
     UploadFile,
     Form,
     HTTPException,
+    Header,
+    Query,
 )
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 # Core
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, get_optional_current_user
+from app.core.config import settings
+from app.core.http_cache import conditional_get
 
 # Database
-from app.database.session import get_db
+from app.database.session import get_db, SessionLocal
 
 # Models
 from app.models.user import User
+from app.models.data_version import OCCURRENCES_VERSION
 from app.models.severity import Severity
 
 # Schemas
-from app.schemas.occurrence import OccurrenceResponse
+from app.schemas.occurrence import (
+    IngestionJobResponse,
+    OccurrenceResponse,
+    OccurrenceFilter,
+)
 
 # Services
+from app.services.ingestion_worker import ingestion_worker
 from app.services.occurrence_service import OccurrenceService
 
 # Repositories
+from app.repositories.ingestion_job_repository import IngestionJobRepository
 from app.repositories.occurrence_repository import OccurrenceRepository
 
 
@@ -38,6 +52,7 @@ router = APIRouter()
 # Dependency annotations
 CurrentSession = Annotated[Session, Depends(get_db)]
 CurrentUser = Annotated[User, Depends(get_current_user)]
+OptionalUser = Annotated[User | None, Depends(get_optional_current_user)]
 
 
 def get_occurrence_repository(db: CurrentSession) -> OccurrenceRepository:
@@ -53,8 +68,121 @@ def get_occurrence_service(repo: OccurrenceRepo) -> OccurrenceService:
 
 OccurrenceServiceDep = Annotated[OccurrenceService, Depends(get_occurrence_service)]
 
+# Responde 304 se o cliente já tem a versão atual das ocorrências
+OccurrencesCacheHeaders = Annotated[
+    dict[str, str], Depends(conditional_get(OCCURRENCES_VERSION))
+]
+
+
+def parse_bbox(bbox: str) -> tuple[float, float, float, float]:
+    """Converte "minLon,minLat,maxLon,maxLat" em tupla, validando os limites."""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox inválido. Use o formato minLon,minLat,maxLon,maxLat",
+        )
+
+    if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Longitudes do bbox devem estar entre -180 e 180",
+        )
+
+    if not (-90 <= min_lat <= max_lat <= 90):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Latitudes do bbox devem estar entre -90 e 90, com minLat <= maxLat",
+        )
+
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def prefers_async(prefer: str | None) -> bool:
+    """Se o cabeçalho Prefer (RFC 7240) pede respond-async."""
+    if not prefer:
+        return False
+    return any(
+        token.split(";")[0].strip().lower() == "respond-async"
+        for token in prefer.split(",")
+    )
+
+
+def get_occurrence_filter(
+    bbox: Annotated[
+        str | None,
+        Query(
+            description="Viewport do mapa: minLon,minLat,maxLon,maxLat",
+            examples=["-48.52,-1.48,-48.44,-1.42"],
+        ),
+    ] = None,
+    occurrence_status: Annotated[
+        Literal["ativa", "pendente", "resolvida"] | None,
+        Query(
+            alias="status",
+            description="Filtra pelo status da ocorrência. As ainda em validação "
+            "(validando) nunca aparecem nas listagens públicas",
+        ),
+    ] = None,
+    category: Annotated[
+        str | None, Query(description="Filtra pela categoria", max_length=50)
+    ] = None,
+    severity_id: Annotated[
+        int | None, Query(description="Filtra pelo nível de severidade", gt=0)
+    ] = None,
+    since: Annotated[
+        datetime | None,
+        Query(description="Somente ocorrências criadas a partir desta data (ISO 8601)"),
+    ] = None,
+    after_id: Annotated[
+        int | None,
+        Query(description="Cursor: valor de next_after_id da página anterior", ge=0),
+    ] = None,
+    limit: Annotated[
+        int,
+        Query(
+            description="Quantidade máxima de ocorrências por página",
+            ge=1,
+            le=settings.GEOJSON_MAX_LIMIT,
+        ),
+    ] = settings.GEOJSON_DEFAULT_LIMIT,
+) -> OccurrenceFilter:
+    return OccurrenceFilter(
+        bbox=parse_bbox(bbox) if bbox else None,
+        status=occurrence_status,
+        category=category,
+        severity_id=severity_id,
+        since=since,
+        after_id=after_id,
+        limit=limit,
+    )
+
+
+OccurrenceFilterDep = Annotated[OccurrenceFilter, Depends(get_occurrence_filter)]
+
 
-@router.post("", status_code=status.HTTP_201_CREATED, response_model=OccurrenceResponse)
+@router.post(
+    "",
+    status_code=status.HTTP_201_CREATED,
+    response_model=OccurrenceResponse,
+    responses={
+        202: {
+            "description": "Modo assíncrono (Prefer: respond-async): ocorrência "
+            "gravada como 'validando'; acompanhe a validação pela URL em Location",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "job_id": 12,
+                        "occurrence_id": 345,
+                        "status": "validando",
+                        "status_url": "/pluvio-api/occurrence/ingestion/12",
+                    }
+                }
+            },
+        }
+    },
+)
 async def create_occurrence(
     occurrence_service: OccurrenceServiceDep,
     current_user: CurrentUser,
@@ -100,8 +228,19 @@ async def create_occurrence(
             description="Imagem da ocorrência (opcional)",
         ),
     ] = None,
+    prefer: Annotated[
+        str | None,
+        Header(
+            description="respond-async: responde 202 sem esperar a classificação "
+            "da imagem, que roda em segundo plano",
+        ),
+    ] = None,
 ) -> OccurrenceResponse:
-    severity = db.query(Severity).filter(Severity.id == severity_id).first()
+    # Consultas e gravações bloqueantes vão para o threadpool; o event loop
+    # continua atendendo as outras requisições durante o upload
+    severity = await run_in_threadpool(
+        lambda: db.query(Severity).filter(Severity.id == severity_id).first()
+    )
     if not severity:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -119,16 +258,13 @@ async def create_occurrence(
                 f"Use: {', '.join(allowed_types)}",
             )
 
-        # Validar tamanho do arquivo (5MB max)
-        max_size = 5 * 1024 * 1024  # 5MB
-        image.file.seek(0, 2)  # Move para o final
-        file_size = image.file.tell()
-        image.file.seek(0)  # Volta para o início
-
-        if file_size > max_size:
+        # Tamanho já contado pelo parser do multipart; o serviço volta a
+        # limitar durante a cópia, bloco a bloco
+        if image.size is not None and image.size > settings.UPLOAD_MAX_IMAGE_BYTES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Arquivo muito grande. Tamanho máximo: 5MB",
+                detail=f"Arquivo muito grande. Tamanho máximo: "
+                f"{settings.UPLOAD_MAX_IMAGE_BYTES // (1024 * 1024)}MB",
             )
 
     # Preparar dados para criação
@@ -142,8 +278,29 @@ async def create_occurrence(
         "status": "pendente",
     }
 
+    # Modo assíncrono: grava já e classifica em segundo plano
+    if settings.INGESTION_ASYNC_ENABLED and prefers_async(prefer):
+        job = await occurrence_service.submit_occurrence(
+            user_id=current_user.id,
+            data=occurrence_data,
+            image=image,
+        )
+        ingestion_worker.notify()
+
+        status_url = f"{settings.API_PREFIX}/occurrence/ingestion/{job.id}"
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={
+                "job_id": job.id,
+                "occurrence_id": job.occurrence_id,
+                "status": "validando",
+                "status_url": status_url,
+            },
+            headers={"Location": status_url, "Preference-Applied": "respond-async"},
+        )
+
     # Criar ocorrência
-    occurrence = occurrence_service.create_occurrence(
+    occurrence = await occurrence_service.create_occurrence(
         user_id=current_user.id,
         data=occurrence_data,
         image=image,
@@ -155,8 +312,10 @@ async def create_occurrence(
 @router.get(
     "/geojson",
     summary="Listar ocorrências em formato GeoJSON",
-    description="Retorna todas as ocorrências cadastradas no formato GeoJSON, "
-    "adequado para visualização em mapas. Inclui imagens em base64 para exibição direta.",
+    description="Retorna as ocorrências no formato GeoJSON, adequado para "
+    "visualização em mapas. Aceita filtros por viewport (bbox), status, categoria, "
+    "severidade e data, com paginação por cursor (after_id/limit). "
+    "As imagens são referenciadas por URL; base64 inline apenas com include_images=true.",
     responses={
         200: {
             "description": "Lista de ocorrências em formato GeoJSON",
@@ -181,11 +340,13 @@ async def create_occurrence(
                                         "name": "Moderada",
                                         "color": "#FFA500",
                                     },
-                                    "image_binary": "base64_string...",
+                                    "image_url": "/pluvio-api/occurrence/1/image",
+                                    "thumbnail_url": "/pluvio-api/occurrence/1/image?size=thumb",
                                     "image_mime_type": "image/jpeg",
                                 },
                             }
                         ],
+                        "next_after_id": 1,
                     }
                 }
             },
@@ -194,40 +355,295 @@ async def create_occurrence(
 )
 async def list_occurrences_geojson(
     occurrence_service: OccurrenceServiceDep,
-) -> dict:
+    filters: OccurrenceFilterDep,
+    cache_headers: OccurrencesCacheHeaders,
+    include_images: Annotated[
+        bool,
+        Query(
+            description="Inclui a imagem em base64 (image_binary). Limita o tamanho "
+            "da página e omite imagens acima do limite configurado."
+        ),
+    ] = False,
+) -> Response:
     """
-    Lista todas as ocorrências em formato GeoJSON.
+    Lista as ocorrências do viewport em formato GeoJSON.
 
     O formato GeoJSON é adequado para integração com bibliotecas de mapas
     como Leaflet, Mapbox, Google Maps, etc. Cada ocorrência é retornada
     como uma Feature com geometria Point e propriedades detalhadas.
 
-    Inclui as imagens em formato base64 para exibição direta no frontend.
+    Os filtros são aplicados no banco e a paginação usa cursor por id:
+    enquanto ``next_after_id`` não for nulo, envie-o como ``after_id``
+    para buscar a próxima página.
+
+    A resposta traz ``ETag``/``Last-Modified``; com ``If-None-Match`` igual
+    à versão atual a API responde 304 sem consultar as ocorrências.
+
+    Cada Feature traz ``image_url`` e ``thumbnail_url`` apontando para
+    ``/occurrence/{id}/image``. O base64 inline só é enviado quando
+    ``include_images=true``.
 
     Args:
         occurrence_service: Serviço de ocorrências (injetado)
+        filters: Filtros e cursor de paginação (query string)
+        include_images: Se True, embute as imagens em base64
 
     Returns:
-        dict: FeatureCollection GeoJSON com todas as ocorrências
+        Response: FeatureCollection GeoJSON com as ocorrências da página,
+        montada a partir dos fragmentos JSON em cache
     """
-    return occurrence_service.list_occurrences_geojson()
+    return Response(
+        content=occurrence_service.list_occurrences_geojson(filters, include_images),
+        media_type="application/json",
+        headers=cache_headers,
+    )
+
+
+@router.get(
+    "/changes",
+    summary="Listar alterações desde uma sequência (delta-sync)",
+    description="Retorna as ocorrências criadas ou alteradas e as exclusões "
+    "ocorridas após a sequência informada. Use next_since como o próximo "
+    "since; since=0 traz todas as ocorrências.",
+    responses={
+        200: {
+            "description": "Alterações em ordem de sequência",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "since": 120,
+                        "next_since": 124,
+                        "has_more": False,
+                        "upserts": {
+                            "type": "FeatureCollection",
+                            "features": [
+                                {
+                                    "type": "Feature",
+                                    "geometry": {
+                                        "type": "Point",
+                                        "coordinates": [-48.4902, -1.4558],
+                                    },
+                                    "properties": {
+                                        "id": 57,
+                                        "status": "resolvida",
+                                        "change_seq": 123,
+                                        "updated_at": "2025-11-28T10:00:00",
+                                    },
+                                }
+                            ],
+                        },
+                        "deletes": [{"id": 31, "change_seq": 124}],
+                    }
+                }
+            },
+        }
+    },
+)
+async def list_occurrence_changes(
+    occurrence_service: OccurrenceServiceDep,
+    _cache_headers: OccurrencesCacheHeaders,
+    since: Annotated[
+        int, Query(description="Última sequência já sincronizada pelo cliente", ge=0)
+    ] = 0,
+    limit: Annotated[
+        int,
+        Query(
+            description="Quantidade máxima de alterações",
+            ge=1,
+            le=settings.CHANGES_MAX_LIMIT,
+        ),
+    ] = settings.CHANGES_DEFAULT_LIMIT,
+) -> dict:
+    return occurrence_service.list_changes(since, limit)
+
+
+@router.get(
+    "/clusters",
+    summary="Listar clusters de ocorrências por zoom",
+    description="Retorna clusters pré-agregados no servidor para o zoom e o "
+    "viewport informados, com contagem, centroide, severidade dominante e "
+    "distribuição por status.",
+    responses={
+        200: {
+            "description": "Clusters em formato GeoJSON",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "type": "FeatureCollection",
+                        "zoom": 12,
+                        "features": [
+                            {
+                                "type": "Feature",
+                                "geometry": {
+                                    "type": "Point",
+                                    "coordinates": [-48.4902, -1.4558],
+                                },
+                                "properties": {
+                                    "cluster": True,
+                                    "count": 42,
+                                    "occurrence_id": None,
+                                    "dominant_severity_id": 2,
+                                    "status": {"pendente": 30, "resolvida": 12},
+                                },
+                            }
+                        ],
+                    }
+                }
+            },
+        }
+    },
+)
+async def list_occurrence_clusters(
+    occurrence_service: OccurrenceServiceDep,
+    _cache_headers: OccurrencesCacheHeaders,
+    z: Annotated[int, Query(description="Nível de zoom do mapa", ge=0, le=22)],
+    bbox: Annotated[
+        str,
+        Query(
+            description="Viewport do mapa: minLon,minLat,maxLon,maxLat",
+            examples=["-48.52,-1.48,-48.44,-1.42"],
+        ),
+    ],
+) -> dict:
+    """
+    Agrupa as ocorrências do viewport em clusters.
+
+    Acima do zoom máximo configurado (CLUSTER_MAX_ZOOM) é usado o último
+    nível do índice. Clusters com uma única ocorrência trazem o
+    ``occurrence_id``.
+    """
+    return occurrence_service.list_clusters(z, parse_bbox(bbox))
+
+
+@router.get(
+    "/tiles/{z}/{x}/{y}.mvt",
+    summary="Obter vector tile (MVT) das ocorrências",
+    description="Retorna um Mapbox Vector Tile com as ocorrências do tile. "
+    "A partir de TILE_POINTS_MIN_ZOOM a camada 'occurrences' traz cada ponto "
+    "com status, categoria e severidade; abaixo disso a camada 'clusters' "
+    "traz os agrupamentos.",
+    response_class=Response,
+    responses={200: {"content": {"application/vnd.mapbox-vector-tile": {}}}},
+)
+async def get_occurrence_tile(
+    z: int,
+    x: int,
+    y: int,
+    occurrence_service: OccurrenceServiceDep,
+    cache_headers: OccurrencesCacheHeaders,
+):
+    if not 0 <= z <= settings.TILE_MAX_ZOOM:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Zoom deve estar entre 0 e {settings.TILE_MAX_ZOOM}",
+        )
+
+    if not (0 <= x < 2**z and 0 <= y < 2**z):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Coordenadas do tile fora do intervalo para o zoom informado",
+        )
+
+    return Response(
+        content=occurrence_service.get_vector_tile(z, x, y),
+        media_type="application/vnd.mapbox-vector-tile",
+        headers=cache_headers,
+    )
+
+
+@router.get(
+    "/near",
+    summary="Buscar ocorrências próximas",
+    description="Retorna, em GeoJSON, as ocorrências mais próximas de um ponto. "
+    "Com radius_m, limita a busca ao raio informado; sem ele, retorna os k "
+    "vizinhos mais próximos. Cada Feature inclui distance_m.",
+)
+async def list_nearby_occurrences(
+    occurrence_service: OccurrenceServiceDep,
+    _cache_headers: OccurrencesCacheHeaders,
+    lat: Annotated[float, Query(description="Latitude do ponto", ge=-90, le=90)],
+    lon: Annotated[float, Query(description="Longitude do ponto", ge=-180, le=180)],
+    radius_m: Annotated[
+        float | None,
+        Query(
+            description="Raio de busca em metros",
+            gt=0,
+            le=settings.NEAR_MAX_RADIUS_M,
+        ),
+    ] = None,
+    k: Annotated[
+        int,
+        Query(
+            description="Quantidade máxima de ocorrências",
+            ge=1,
+            le=settings.GEOJSON_MAX_LIMIT,
+        ),
+    ] = settings.NEAR_DEFAULT_K,
+) -> dict:
+    return occurrence_service.list_nearby_geojson(lat, lon, k, radius_m)
+
+
+@router.get(
+    "/geojson/stream",
+    summary="Exportar ocorrências em GeoJSON (streaming)",
+    description="Retorna todas as ocorrências que atendem aos filtros como uma "
+    "FeatureCollection enviada em streaming. Ignora o parâmetro limit e não "
+    "inclui imagens inline.",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/geo+json": {}}}},
+)
+async def stream_occurrences_geojson(
+    filters: OccurrenceFilterDep,
+    cache_headers: OccurrencesCacheHeaders,
+):
+    """
+    Exporta as ocorrências em GeoJSON sem montar a coleção em memória.
+
+    As linhas são lidas do banco com cursor no servidor e cada lote de
+    Features é escrito na resposta assim que fica pronto, então o primeiro
+    byte chega antes da última linha ser lida.
+
+    A sessão é aberta dentro do gerador porque precisa viver enquanto
+    a resposta estiver sendo enviada.
+    """
+
+    def body():
+        db = SessionLocal()
+        try:
+            service = OccurrenceService(OccurrenceRepository(db))
+            yield from service.stream_occurrences_geojson(filters)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        body(), media_type="application/geo+json", headers=cache_headers
+    )
 
 
 @router.get(
     "/{occurrence_id}/image",
     summary="Obter imagem da ocorrência",
-    description="Retorna a imagem binária de uma ocorrência específica.",
+    description="Retorna a imagem binária de uma ocorrência específica. "
+    "Use size=thumb (128px) ou size=medium (512px) para versões reduzidas.",
     responses={
         200: {
             "description": "Imagem binária da ocorrência",
             "content": {"image/jpeg": {}, "image/png": {}, "image/webp": {}},
         },
+        206: {"description": "Trecho da imagem pedido via Range"},
+        304: {"description": "A imagem em cache no cliente ainda é válida"},
         404: {"description": "Ocorrência ou imagem não encontrada"},
     },
 )
 async def get_occurrence_image(
     occurrence_id: int,
     occurrence_service: OccurrenceServiceDep,
+    viewer: OptionalUser,
+    size: Annotated[
+        Literal["thumb", "medium", "full"],
+        Query(description="Tamanho da imagem: thumb, medium ou full (original)"),
+    ] = "full",
+    if_none_match: Annotated[str | None, Header(include_in_schema=False)] = None,
 ):
     """
     Retorna a imagem binária de uma ocorrência.
@@ -235,14 +651,29 @@ async def get_occurrence_image(
     Este endpoint é útil quando você quer carregar a imagem separadamente
     ou usar em tags <img> diretamente.
 
+    As versões thumb e medium são JPEGs gerados no upload e guardados ao
+    lado do original; para uploads antigos são geradas no primeiro acesso.
+
+    O arquivo é enviado direto do disco, com suporte a Range (206). A ETag
+    vem do hash do conteúdo e, como a imagem de uma ocorrência não muda,
+    a resposta é marcada como imutável; If-None-Match responde 304.
+
+    Ocorrências ainda em validação só têm a imagem servida ao autor
+    (token Bearer opcional); para os demais, 404.
+
     Args:
         occurrence_id: ID da ocorrência
         occurrence_service: Serviço de ocorrências (injetado)
+        viewer: Usuário autenticado, se houver token
+        size: Versão da imagem (thumb, medium ou full)
+        if_none_match: ETag que o cliente já possui
 
     Returns:
-        Response: Imagem binária com o content-type apropriado
+        FileResponse: Imagem com o content-type apropriado, ou 304
     """
-    return occurrence_service.get_occurrence_image(occurrence_id)
+    return occurrence_service.get_occurrence_image(
+        occurrence_id, size, if_none_match, viewer.id if viewer else None
+    )
 
 
 @router.get(
@@ -311,6 +742,36 @@ async def list_severities(db: CurrentSession) -> list[dict]:
     ]
 
 
+@router.get(
+    "/ingestion/{job_id}",
+    summary="Andamento da validação de uma ocorrência enviada no modo assíncrono",
+    response_model=IngestionJobResponse,
+)
+async def get_ingestion_job(
+    job_id: int,
+    db: CurrentSession,
+    current_user: CurrentUser,
+):
+    """
+    Status do job: ``pendente`` ou ``processando`` enquanto a imagem não foi
+    classificada; ``concluido`` quando a ocorrência passou a ``pendente``;
+    ``rejeitado`` quando não havia lixo na imagem (a ocorrência é excluída);
+    ``erro`` quando as tentativas se esgotaram.
+    """
+    job = await run_in_threadpool(IngestionJobRepository(db).get, job_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+
+    if job.user_id != current_user.id:
+        raise HTTPException(
+            status_code=403,
+            detail="Você não tem permissão para acessar este job.",
+        )
+
+    return job
+
+
 @router.patch(
     "/{occurrence_id}/resolve",
     summary="Marcar ocorrência como resolvida",
@@ -333,6 +794,11 @@ async def resolve_occurrence(
             detail="Você não tem permissão para alterar esta ocorrência.",
         )
 
+    if occurrence.status == "validando":
+        raise HTTPException(
+            status_code=400, detail="A ocorrência ainda está em validação."
+        )
+
     if occurrence.status == "resolvida":
         raise HTTPException(
             status_code=400, detail="A ocorrência já está marcada como resolvida."
@@ -1,11 +1,15 @@
 from fastapi import APIRouter
 from app.api.endpoints import (
+    admin,
     auth,
     occurrence,
-    insights
+    insights,
+    metrics,
 )
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(occurrence.router, prefix="/occurrence", tags=["occurrence"])
 api_router.include_router(insights.router, prefix="/insights", tags=["insights"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
@@ -0,0 +1,296 @@
+# app/cli/reclassify.py
+"""
+Reclassificação em lote das ocorrências depois de uma troca de modelo.
+
+    python -m app.cli.reclassify [--version 20261018-120000] [--workers 4]
+
+Percorre, em ordem de id e com cursor no servidor (yield_per), as
+ocorrências com imagem cuja versão do modelo difere da versão alvo
+(padrão: models/CURRENT). Cada lote é classificado num pool de processos
+e gravado com um UPDATE em massa de model_version e model_score;
+resultados já guardados em classification_results para a mesma versão e
+imagens repetidas no lote são reaproveitados.
+
+Depois de cada lote, o último id vai para um checkpoint em JSON: uma
+execução interrompida continua de onde parou (``--restart`` recomeça). No
+fim, relata a vazão em imagens/s, por núcleo e por segundo de CPU.
+
+O status das ocorrências não muda; as que o modelo novo rejeitaria só
+entram no relatório. change_seq também não muda (é uma nota do
+classificador, não uma edição da ocorrência): a versão de dados é
+incrementada uma vez no fim, para invalidar as respostas em cache.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import bindparam, func, or_, select, update
+
+from app.core.config import settings
+from app.database.session import SessionLocal
+from app.models.classification_result import ClassificationResult
+from app.models.data_version import OCCURRENCES_VERSION
+from app.models.occurrence import Occurrence
+from app.repositories.data_version_repository import DataVersionRepository
+from app.services.classifier_service import extract_histogram_from_path, load_engine
+from app.services.model_store import current_model_version, is_trash
+
+DEFAULT_CHECKPOINT = os.path.join(
+    os.path.dirname(settings.IMAGE_STORAGE_DIR), "reclassify-checkpoint.json"
+)
+
+_engine = None  # modelo carregado em cada processo do pool
+
+_update_scores = (
+    update(Occurrence.__table__)
+    .where(Occurrence.__table__.c.id == bindparam("occurrence_id"))
+    .values(model_version=bindparam("version"), model_score=bindparam("score"))
+)
+
+
+def _init_worker(engine_name, mmap_mode, version):
+    global _engine
+    _engine = load_engine(engine_name, mmap_mode, version)
+
+
+def classify_paths(paths: list[str]) -> tuple[list[tuple[int, float] | None], float]:
+    """
+    (predição, probabilidade) de cada imagem, None se o arquivo não puder
+    ser lido, e o tempo de CPU gasto. Imagens sem descritores valem
+    (0, 0.0), como na API.
+    """
+    start = time.process_time()
+    results: list[tuple[int, float] | None] = [None] * len(paths)
+    histograms, positions = [], []
+    for i, path in enumerate(paths):
+        try:
+            histogram = extract_histogram_from_path(path, _engine)
+        except (OSError, ValueError):
+            continue
+        if histogram is None:
+            results[i] = (0, 0.0)
+        else:
+            histograms.append(histogram)
+            positions.append(i)
+
+    if histograms:
+        for i, result in zip(positions, _engine.predict_batch(histograms)):
+            results[i] = result
+    return results, time.process_time() - start
+
+
+def load_checkpoint(path: str, version: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return {}
+    # Checkpoint de outra versão não vale para esta
+    return checkpoint if checkpoint.get("version") == version else {}
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)
+
+
+class Reclassifier:
+    def __init__(self, db, version: str, workers: int, pool: ProcessPoolExecutor | None):
+        self.db = db
+        self.version = version
+        self.workers = workers
+        self.pool = pool
+        self.classified = 0
+        self.reused = 0
+        self.failed = 0
+        self.would_reject = 0
+        self.cpu_seconds = 0.0
+
+    def process(self, rows) -> list[dict]:
+        """Classifica um lote (id, caminho, sha256) e retorna os parâmetros do UPDATE."""
+        known = self._stored_results({sha256 for _, _, sha256 in rows if sha256})
+        self.reused += sum(1 for _, _, sha256 in rows if sha256 in known)
+
+        # Uma classificação por conteúdo: ocorrências podem dividir a imagem
+        paths = {}
+        for _, path, sha256 in rows:
+            key = sha256 or path
+            if key not in known:
+                paths.setdefault(key, path)
+
+        keys = list(paths)
+        for key, result in zip(keys, self._classify([paths[key] for key in keys])):
+            if result is None:
+                self.failed += 1
+            else:
+                known[key] = result
+                self.classified += 1
+
+        updates = []
+        for occurrence_id, path, sha256 in rows:
+            result = known.get(sha256 or path)
+            if result is None:
+                continue
+            if not is_trash(*result):
+                self.would_reject += 1
+            updates.append(
+                {"occurrence_id": occurrence_id, "version": self.version, "score": result[1]}
+            )
+        return updates
+
+    def _stored_results(self, hashes: set[str]) -> dict[str, tuple[int, float]]:
+        if not hashes:
+            return {}
+        rows = self.db.execute(
+            select(
+                ClassificationResult.image_sha256,
+                ClassificationResult.prediction,
+                ClassificationResult.probability,
+            ).where(
+                ClassificationResult.model_version == self.version,
+                ClassificationResult.image_sha256.in_(hashes),
+            )
+        )
+        return {sha256: (prediction, probability) for sha256, prediction, probability in rows}
+
+    def _classify(self, paths: list[str]) -> list[tuple[int, float] | None]:
+        if not paths:
+            return []
+        if self.pool is None:
+            batches = [paths]
+        else:
+            # Alguns lotes por processo, para equilibrar imagens lentas
+            size = max(1, -(-len(paths) // (self.workers * 4)))
+            batches = [paths[i : i + size] for i in range(0, len(paths), size)]
+
+        mapper = self.pool.map if self.pool is not None else map
+        results = []
+        for batch_results, cpu_seconds in mapper(classify_paths, batches):
+            results.extend(batch_results)
+            self.cpu_seconds += cpu_seconds
+        return results
+
+
+def run(args) -> int:
+    engine_args = (
+        settings.CLASSIFIER_ENGINE,
+        settings.CLASSIFIER_MMAP_MODE,
+        args.version or current_model_version(),
+    )
+    # Também resolve a versão dos arquivos soltos (hash do conteúdo)
+    _init_worker(*engine_args)
+    version = _engine.version
+
+    checkpoint = {} if args.restart else load_checkpoint(args.checkpoint, version)
+    last_id = checkpoint.get("last_id", 0)
+    updated = checkpoint.get("updated", 0)
+    if last_id:
+        print(f"Retomando a versão {version} após o id {last_id}")
+
+    pending = (
+        Occurrence.id > last_id,
+        Occurrence.image_path.is_not(None),
+        # As "validando" são classificadas pela fila de ingestão
+        Occurrence.status != "validando",
+        or_(
+            Occurrence.model_version.is_(None),
+            Occurrence.model_version != version,
+            Occurrence.model_score.is_(None),
+        ),
+    )
+
+    # Leitura e escrita em sessões separadas: o commit de cada lote não
+    # pode fechar o cursor do servidor
+    reader = SessionLocal()
+    writer = SessionLocal()
+    pool = (
+        ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=engine_args)
+        if args.workers > 1
+        else None
+    )
+    reclassifier = Reclassifier(writer, version, args.workers, pool)
+
+    try:
+        total = reader.scalar(select(func.count()).select_from(Occurrence).where(*pending))
+        print(f"Ocorrências para reclassificar com {version}: {total}")
+
+        result = reader.execute(
+            select(Occurrence.id, Occurrence.image_path, Occurrence.image_sha256)
+            .where(*pending)
+            .order_by(Occurrence.id)
+            .execution_options(yield_per=args.chunk_size)
+        )
+
+        done = 0
+        start = time.perf_counter()
+        for rows in result.partitions():
+            updates = reclassifier.process(rows)
+            if updates:
+                writer.execute(_update_scores, updates)
+            writer.commit()
+            updated += len(updates)
+            done += len(rows)
+            last_id = rows[-1][0]
+            save_checkpoint(
+                args.checkpoint, {"version": version, "last_id": last_id, "updated": updated}
+            )
+
+            elapsed = time.perf_counter() - start
+            print(
+                f"  {done}/{total} ({done / max(total, 1):.0%}) "
+                f"{done / elapsed:.1f} ocorrências/s, último id {last_id}",
+                flush=True,
+            )
+        elapsed = time.perf_counter() - start
+
+        if updated:
+            DataVersionRepository(writer).bump(OCCURRENCES_VERSION)
+            writer.commit()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        reader.close()
+        writer.close()
+
+    # Concluído: a próxima execução começa do zero (e só acha o que mudou)
+    if os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    classified = reclassifier.classified
+    print(f"Ocorrências atualizadas: {updated}")
+    print(
+        f"Imagens classificadas: {classified} "
+        f"(reaproveitadas: {reclassifier.reused}, falhas: {reclassifier.failed})"
+    )
+    print(f"Seriam rejeitadas pela versão {version}: {reclassifier.would_reject}")
+    if classified and elapsed > 0:
+        rate = classified / elapsed
+        # Processos além dos núcleos disponíveis não aumentam a vazão
+        cores = max(1, min(args.workers, os.cpu_count() or 1))
+        print(
+            f"Vazão: {rate:.1f} imagens/s com {args.workers} processo(s), "
+            f"{rate / cores:.1f} imagens/s por núcleo ({cores} em uso), "
+            f"{classified / max(reclassifier.cpu_seconds, 1e-9):.1f} imagens por segundo de CPU"
+        )
+    return 1 if reclassifier.failed else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.reclassify")
+    parser.add_argument("--version", help="versão do modelo (padrão: models/CURRENT)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=500, help="ocorrências por lote")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="ignora o checkpoint")
+    args = parser.parse_args(argv)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
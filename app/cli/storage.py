@@ -0,0 +1,158 @@
+# app/cli/storage.py
+"""
+Verificação e limpeza do armazenamento de imagens endereçado por hash.
+
+    python -m app.cli.storage check
+    python -m app.cli.storage gc --grace-minutes 60
+
+``check`` só relata; ``gc`` corrige as contagens de referência, apaga
+registros sem uso com seus arquivos e remove arquivos órfãos mais antigos
+que o período de carência (uploads em andamento gravam o arquivo antes
+do commit da ocorrência).
+"""
+import argparse
+import os
+import sys
+import time
+
+from sqlalchemy import delete, exists, func, select, update
+
+from app.database.session import SessionLocal
+from app.models.image_blob import ImageBlob
+from app.models.occurrence import Occurrence
+from app.services.image_storage import image_storage, parse_blob_name
+
+
+def scan(db) -> dict:
+    blobs = {
+        sha256: (path, ref_count)
+        for sha256, path, ref_count in db.execute(
+            select(ImageBlob.sha256, ImageBlob.path, ImageBlob.ref_count)
+        )
+    }
+    references = dict(
+        db.execute(
+            select(Occurrence.image_sha256, func.count())
+            .where(Occurrence.image_sha256.is_not(None))
+            .group_by(Occurrence.image_sha256)
+        ).all()
+    )
+
+    # Originais em uso: o registrado e, para ocorrências antigas, cópias do
+    # mesmo conteúdo com outra extensão
+    used_originals = {os.path.normpath(path) for path, _ in blobs.values()}
+    used_originals.update(
+        os.path.normpath(path)
+        for path in db.scalars(
+            select(Occurrence.image_path)
+            .where(Occurrence.image_sha256.is_not(None))
+            .distinct()
+        )
+    )
+
+    orphan_files = []
+    for path in image_storage.iter_files():
+        parsed = parse_blob_name(path)
+        if parsed is None or parsed[0] not in blobs:
+            orphan_files.append(path)
+        elif parsed[1] is None and os.path.normpath(path) not in used_originals:
+            # Cópia com outra extensão deixada por uploads concorrentes
+            orphan_files.append(path)
+
+    return {
+        "blobs": len(blobs),
+        "bytes": sum(os.path.getsize(path) for path, _ in blobs.values() if os.path.exists(path)),
+        "missing_files": sorted(
+            sha256 for sha256, (path, _) in blobs.items() if not os.path.exists(path)
+        ),
+        "wrong_ref_counts": {
+            sha256: (ref_count, references.get(sha256, 0))
+            for sha256, (_, ref_count) in blobs.items()
+            if ref_count != references.get(sha256, 0)
+        },
+        "unreferenced": sorted(
+            sha256 for sha256 in blobs if references.get(sha256, 0) == 0
+        ),
+        "orphan_files": sorted(orphan_files),
+    }
+
+
+def check(db) -> int:
+    report = scan(db)
+    print(f"Arquivos registrados: {report['blobs']} ({report['bytes']} bytes)")
+    for sha256 in report["missing_files"]:
+        print(f"  arquivo ausente: {sha256}")
+    for sha256, (stored, actual) in report["wrong_ref_counts"].items():
+        print(f"  contagem incorreta: {sha256} (registrada {stored}, real {actual})")
+    for path in report["orphan_files"]:
+        print(f"  arquivo órfão: {path}")
+
+    problems = (
+        len(report["missing_files"])
+        + len(report["wrong_ref_counts"])
+        + len(report["orphan_files"])
+    )
+    print("OK" if not problems else f"{problems} problema(s) encontrado(s)")
+    return 1 if problems else 0
+
+
+def gc(db, grace_minutes: int) -> int:
+    references = (
+        select(func.count())
+        .where(Occurrence.image_sha256 == ImageBlob.sha256)
+        .scalar_subquery()
+    )
+    fixed = db.execute(
+        update(ImageBlob)
+        .where(ImageBlob.ref_count != references)
+        .values(ref_count=references)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    # A FK impede apagar um registro que uma ocorrência nova passou a usar
+    released = db.execute(
+        delete(ImageBlob)
+        .where(~exists().where(Occurrence.image_sha256 == ImageBlob.sha256))
+        .returning(ImageBlob.path)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.commit()
+
+    for path in released:
+        image_storage.delete(path)
+
+    cutoff = time.time() - grace_minutes * 60
+    removed = 0
+    for path in scan(db)["orphan_files"]:
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+
+    print(f"Contagens corrigidas: {fixed}")
+    print(f"Registros sem uso removidos: {len(released)}")
+    print(f"Arquivos órfãos removidos: {removed}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.storage")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("check", help="relata inconsistências")
+    gc_parser = subparsers.add_parser("gc", help="corrige contagens e remove órfãos")
+    gc_parser.add_argument("--grace-minutes", type=int, default=60)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.command == "check":
+            return check(db)
+        return gc(db, args.grace_minutes)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,14 @@
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi import Depends, HTTPException, status
-from jose import jwt, JWTError
+import secrets
+from fastapi import Depends, Header, HTTPException, status
+from jose import ExpiredSignatureError, jwt, JWTError
 from sqlalchemy.orm import Session
 from app.database.session import get_db
 from app.models.user import User
 from app.core.config import settings
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -26,4 +28,34 @@ def get_current_user(
     user = db.query(User).filter(User.username == username).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
\ No newline at end of file
+    return user
+
+
+def get_optional_current_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(optional_security),
+    db: Session = Depends(get_db),
+) -> User | None:
+    """
+    Usuário do token, se enviado; endpoints públicos que mudam para o autor.
+    Token inválido ou expirado vale como anônimo: não quebra a rota pública.
+    """
+    if credentials is None:
+        return None
+    try:
+        payload = jwt.decode(
+            credentials.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+        )
+    except JWTError:
+        return None
+    username = payload.get("sub")
+    if username is None:
+        return None
+    return db.query(User).filter(User.username == username).first()
+
+
+def require_admin_token(x_admin_token: str | None = Header(None)):
+    """Endpoints administrativos: exige o ADMIN_TOKEN no cabeçalho X-Admin-Token."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
@@ -0,0 +1,82 @@
+# app/core/body_limit.py
+"""
+Middleware ASGI que limita o tamanho do corpo das requisições.
+
+Com Content-Length declarado acima do limite, a resposta 413 sai antes de
+ler qualquer byte. Sem ele (chunked), os bytes são contados à medida que
+chegam e a leitura é interrompida assim que o limite é ultrapassado, sem
+esperar o parser de multipart gravar o corpo inteiro em disco.
+"""
+import json
+
+from starlette.datastructures import Headers
+
+BODY_METHODS = {"POST", "PUT", "PATCH"}
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class BodySizeLimitMiddleware:
+    def __init__(self, app, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in BODY_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None and content_length.isdigit():
+            if int(content_length) > self.max_body_size:
+                await self._reject(send)
+                return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # O app pode transformar a interrupção em outro erro (ex.: 400
+            # de corpo inválido); nesse caso a resposta vira 413
+            if exceeded:
+                return
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            pass
+
+        if exceeded and not response_started:
+            await self._reject(send)
+
+    async def _reject(self, send):
+        body = json.dumps(
+            {"detail": f"Requisição muito grande. Tamanho máximo: {self.max_body_size} bytes"}
+        ).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,99 @@
+# app/core/cache.py
+"""Cache LRU em memória, limitado por itens e/ou bytes, seguro entre threads."""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class LRUCache:
+    def __init__(
+        self,
+        max_items: int | None = None,
+        max_bytes: int | None = None,
+        sizeof: Callable[[Any], int] = len,
+    ):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(
+        self,
+        key: Hashable,
+        default=None,
+        is_fresh: Callable[[Any], bool] | None = None,
+    ):
+        """
+        Busca ``key``. Se ``is_fresh`` for informado e retornar False para o
+        valor guardado, a entrada é descartada e conta como miss.
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if is_fresh is not None and not is_fresh(value):
+                self._discard(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        size = self._sizeof(value) if self.max_bytes is not None else 0
+
+        # Valor maior que o cache inteiro: não vale a pena guardar
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._data:
+                self._discard(key)
+            self._data[key] = value
+            self._bytes += size
+
+            while (self.max_items is not None and len(self._data) > self.max_items) or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._data))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            if key in self._data:
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "items": len(self._data),
+                "bytes": self._bytes,
+                "max_items": self.max_items,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+    def _discard(self, key: Hashable):
+        value = self._data.pop(key)
+        if self.max_bytes is not None:
+            self._bytes -= self._sizeof(value)
@@ -0,0 +1,237 @@
+# app/core/compression.py
+"""
+Middleware ASGI de compressão negociada (brotli, se instalado, ou gzip).
+
+- Respostas menores que ``minimum_size`` ou de tipos não compressíveis
+  passam intactas.
+- Respostas completas com ETag têm os bytes comprimidos guardados em cache
+  por (ETag, codificação): polls repetidos da mesma versão não comprimem
+  de novo. A compressão em si roda numa thread, fora do event loop.
+- Respostas em streaming são comprimidas pedaço a pedaço, com flush a cada
+  pedaço para não atrasar o primeiro byte.
+"""
+import gzip
+import zlib
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele usamos só gzip
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/geo+json",
+    "application/vnd.mapbox-vector-tile",
+    "application/javascript",
+    "application/xml",
+    "text/",
+)
+
+ENCODED_ETAG_SUFFIXES = ("-br", "-gzip")
+
+# Corpos comprimidos por (ETag, codificação), reaproveitados entre polls
+compressed_cache = LRUCache(max_bytes=settings.COMPRESSION_CACHE_MAX_BYTES)
+
+
+def select_encoding(accept_encoding: str) -> str | None:
+    """Escolhe a codificação aceita pelo cliente, preferindo brotli."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if token:
+            accepted[token.strip().lower()] = quality
+
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", accepted.get("*", 0)) > 0:
+        return "gzip"
+    return None
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag forte distinto por codificação: "v-hash" -> "v-hash-gzip"."""
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+
+def strip_encoded_etag(etag: str) -> str:
+    for suffix in ENCODED_ETAG_SUFFIXES:
+        if etag.endswith(f'{suffix}"'):
+            return etag[: -len(suffix) - 1] + '"'
+    return etag
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        cache: LRUCache | None = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def compressor(self, encoding: str):
+        if encoding == "br":
+            return _BrotliStream(self.brotli_quality)
+        return _GzipStream(self.gzip_level)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message = None
+        self.mode = None  # "identity", "whole" ou "stream"
+        self.stream = None
+
+    async def send(self, message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self.start_message = message
+            return
+
+        if message_type != "http.response.body":
+            # Extensões como pathsend: repassa sem comprimir
+            if self.start_message is not None:
+                await self._send(self.start_message)
+                self.start_message = None
+            await self._send(message)
+            return
+
+        if self.mode is None:
+            self.mode = self._choose_mode(message)
+
+            if self.mode == "identity":
+                await self._send(self.start_message)
+            elif self.mode == "whole":
+                await self._send_whole(message["body"])
+                return
+            else:
+                headers = self._encoded_headers()
+                del headers["content-length"]
+                self.stream = self.middleware.compressor(self.encoding)
+                await self._send(self.start_message)
+
+        if self.mode == "identity":
+            await self._send(message)
+            return
+
+        more_body = message.get("more_body", False)
+        chunk = self.stream.compress(message["body"])
+        chunk += self.stream.finish() if not more_body else self.stream.flush()
+        await self._send(
+            {"type": "http.response.body", "body": chunk, "more_body": more_body}
+        )
+
+    def _choose_mode(self, message) -> str:
+        headers = Headers(raw=self.start_message["headers"])
+        content_type = headers.get("content-type", "")
+        compressible = content_type.startswith(COMPRESSIBLE_TYPES)
+
+        if compressible:
+            MutableHeaders(raw=self.start_message["headers"]).add_vary_header(
+                "Accept-Encoding"
+            )
+
+        if not compressible or "content-encoding" in headers:
+            return "identity"
+        if self.start_message["status"] in (204, 206, 304):
+            return "identity"
+        if message.get("more_body", False):
+            return "stream"
+        if len(message["body"]) < self.middleware.minimum_size:
+            return "identity"
+        return "whole"
+
+    def _encoded_headers(self) -> MutableHeaders:
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        if "etag" in headers:
+            headers["ETag"] = encoded_etag(headers["etag"], self.encoding)
+        return headers
+
+    async def _send_whole(self, body: bytes):
+        headers = self._encoded_headers()
+        cache = self.middleware.cache
+        key = (headers["etag"], self.encoding) if "etag" in headers else None
+
+        compressed = cache.get(key) if cache is not None and key else None
+        if compressed is None:
+            compressed = await anyio.to_thread.run_sync(
+                self.middleware.compress, body, self.encoding
+            )
+            if cache is not None and key:
+                cache.set(key, compressed)
+
+        headers["Content-Length"] = str(len(compressed))
+        await self._send(self.start_message)
+        await self._send({"type": "http.response.body", "body": compressed})
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
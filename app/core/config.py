@@ -1,12 +1,113 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "enchentes_api"
+    API_PREFIX: str = "/pluvio-api"
     DATABASE_URL: str
     SECRET_KEY: str = "changeme"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Token dos endpoints administrativos (cabeçalho X-Admin-Token); sem
+    # token configurado eles ficam desativados
+    ADMIN_TOKEN: str | None = None
+
+    # Compressão negociada (gzip/brotli) e cache dos corpos comprimidos
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+    COMPRESSION_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # Uploads: limite da imagem, do corpo inteiro (imagem + campos do
+    # formulário) e tamanho dos blocos copiados do multipart
+    UPLOAD_MAX_IMAGE_BYTES: int = 5 * 1024 * 1024
+    UPLOAD_MAX_BODY_BYTES: int = 6 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 64 * 1024
+
+    # Classificação fora do event loop: "process" (ProcessPoolExecutor),
+    # "thread" (ThreadPoolExecutor) ou "inline" (no próprio event loop)
+    CLASSIFIER_EXECUTOR: Literal["process", "thread", "inline"] = "thread"
+    CLASSIFIER_WORKERS: int = 2
+    # "numpy": artefato em machineLearning/numpy_model; "sklearn": .pkl
+    CLASSIFIER_ENGINE: Literal["numpy", "sklearn"] = "numpy"
+    # Arrays do modelo mapeados do disco (compartilhados entre workers);
+    # None carrega uma cópia em memória
+    CLASSIFIER_MMAP_MODE: Literal["r"] | None = "r"
+    # Carrega e aquece o modelo no startup; False adia para o primeiro upload
+    CLASSIFIER_PRELOAD: bool = True
+    # Lado maior da imagem antes do ORB. None usa o valor gravado no
+    # modelo (params.json); 0 força a resolução original. Deve ser o mesmo
+    # do treinamento (--max-side do machineLearning/train_model.py)
+    CLASSIFIER_MAX_SIDE: int | None = None
+    # Intervalo de verificação de machineLearning/models/CURRENT para trocar
+    # o modelo sem reiniciar (0 desativa)
+    CLASSIFIER_RELOAD_POLL_SECONDS: float = 30.0
+    # Micro-lotes da predição: até N histogramas ou M ms de espera
+    CLASSIFIER_BATCH_MAX_SIZE: int = 16
+    CLASSIFIER_BATCH_MAX_WAIT_MS: float = 5.0
+    # Resultados por (SHA-256 da imagem, versão do modelo): LRU em memória
+    # e, opcionalmente, a tabela classification_results
+    CLASSIFICATION_CACHE_MAX_ITEMS: int = 10_000
+    CLASSIFICATION_CACHE_PERSIST: bool = True
+
+    # Ingestão assíncrona (cabeçalho "Prefer: respond-async"): a ocorrência
+    # é gravada como "validando" e classificada em segundo plano, pela fila
+    # ingestion_jobs. Jobs "processando" há mais de STALE segundos (worker
+    # reiniciado no meio) voltam para a fila. Falhas esperam BACKOFF * 2^n
+    # segundos antes de nova tentativa; esgotadas as tentativas, a
+    # ocorrência é excluída
+    INGESTION_ASYNC_ENABLED: bool = True
+    INGESTION_BATCH_SIZE: int = 16
+    INGESTION_POLL_SECONDS: float = 2.0
+    INGESTION_STALE_SECONDS: float = 300.0
+    INGESTION_MAX_ATTEMPTS: int = 3
+    INGESTION_RETRY_BACKOFF_SECONDS: float = 10.0
+
+    # Armazenamento de imagens endereçado por SHA-256 (ab/cd/<sha>.<ext>)
+    IMAGE_STORAGE_DIR: str = "uploads/blobs"
+
+    # Versões reduzidas das imagens (lado maior, em pixels)
+    IMAGE_THUMB_MAX_SIDE: int = 128
+    IMAGE_MEDIUM_MAX_SIDE: int = 512
+    IMAGE_RENDITION_JPEG_QUALITY: int = 80
+    # Bloco de leitura ao enviar imagens do disco (FileResponse usa 64KB)
+    IMAGE_SERVE_CHUNK_BYTES: int = 256 * 1024
+
+    # Listagem GeoJSON (paginação por cursor)
+    GEOJSON_DEFAULT_LIMIT: int = 500
+    GEOJSON_MAX_LIMIT: int = 5000
+
+    # Imagens inline (base64) só sob demanda, com teto de tamanho
+    GEOJSON_INLINE_MAX_FEATURES: int = 50
+    GEOJSON_INLINE_IMAGE_MAX_BYTES: int = 256 * 1024
+
+    # Cache de Features já serializadas (bytes JSON por ocorrência)
+    FEATURE_CACHE_MAX_BYTES: int = 128 * 1024 * 1024
+
+    # Exportação em streaming (linhas por lote do cursor / bytes por chunk HTTP)
+    GEOJSON_STREAM_BATCH_SIZE: int = 1000
+    GEOJSON_STREAM_CHUNK_BYTES: int = 64 * 1024
+
+    # Busca por proximidade (k-vizinhos)
+    NEAR_DEFAULT_K: int = 50
+    NEAR_MAX_RADIUS_M: float = 50_000.0
+
+    # Clusters do mapa (índice em grade por zoom)
+    CLUSTER_MAX_ZOOM: int = 16
+    CLUSTER_CELL_PX: int = 64
+
+    # Vector tiles (MVT) e cache LRU de tiles codificados
+    TILE_MAX_ZOOM: int = 22
+    TILE_POINTS_MIN_ZOOM: int = 10  # abaixo disso o tile traz clusters
+    TILE_BUFFER: int = 64  # em unidades do extent (4096)
+    TILE_CACHE_MAX_ITEMS: int = 20_000
+    TILE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Delta-sync (alterações por sequência)
+    CHANGES_DEFAULT_LIMIT: int = 1000
+    CHANGES_MAX_LIMIT: int = 5000
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,164 @@
+# app/core/geo.py
+"""Funções geográficas: geohash, cobertura de bbox por células e distâncias."""
+import math
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9  # ~4.8m x 4.8m
+EARTH_RADIUS_M = 6_371_008.8
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bit = 0
+    ch = 0
+    even = True  # bits pares codificam longitude
+
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= mid:
+                ch = (ch << 1) | 1
+                lon_range[0] = mid
+            else:
+                ch <<= 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                ch = (ch << 1) | 1
+                lat_range[0] = mid
+            else:
+                ch <<= 1
+                lat_range[1] = mid
+
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(GEOHASH_ALPHABET[ch])
+            bit = 0
+            ch = 0
+
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int) -> tuple[float, float]:
+    """Retorna (altura em graus de latitude, largura em graus de longitude)."""
+    bits = precision * 5
+    lon_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def geohash_cover(
+    min_lon: float,
+    min_lat: float,
+    max_lon: float,
+    max_lat: float,
+    max_cells: int = 32,
+) -> list[str]:
+    """
+    Prefixos de geohash que cobrem o bbox, na maior precisão possível sem
+    ultrapassar ``max_cells`` células. Suporta bbox cruzando o antimeridiano
+    (min_lon > max_lon).
+    """
+    if min_lon > max_lon:
+        boxes = [(min_lon, min_lat, 180.0, max_lat), (-180.0, min_lat, max_lon, max_lat)]
+    else:
+        boxes = [(min_lon, min_lat, max_lon, max_lat)]
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        ranges = [_cell_ranges(box, precision) for box in boxes]
+        count = sum(len(rows) * len(cols) for rows, cols in ranges)
+        if count <= max_cells or precision == 1:
+            break
+
+    lat_step, lon_step = geohash_cell_size(precision)
+    cells = set()
+    for rows, cols in ranges:
+        for i in rows:
+            for j in cols:
+                cells.add(
+                    encode_geohash(
+                        -90.0 + (i + 0.5) * lat_step,
+                        -180.0 + (j + 0.5) * lon_step,
+                        precision,
+                    )
+                )
+
+    return sorted(cells)
+
+
+def _cell_ranges(box, precision: int) -> tuple[range, range]:
+    min_lon, min_lat, max_lon, max_lat = box
+    lat_step, lon_step = geohash_cell_size(precision)
+    max_row = round(180.0 / lat_step) - 1
+    max_col = round(360.0 / lon_step) - 1
+
+    rows = range(
+        min(int((min_lat + 90.0) // lat_step), max_row),
+        min(int((max_lat + 90.0) // lat_step), max_row) + 1,
+    )
+    cols = range(
+        min(int((min_lon + 180.0) // lon_step), max_col),
+        min(int((max_lon + 180.0) // lon_step), max_col) + 1,
+    )
+    return rows, cols
+
+
+def geohash_prefix_upper_bound(prefix: str) -> str | None:
+    """
+    Menor string maior que todos os geohashes com esse prefixo, para buscas
+    por intervalo (``prefix <= geohash < upper``) no índice btree.
+    Retorna None quando o prefixo é o último possível ("zzz...").
+    """
+    chars = list(prefix)
+    while chars:
+        idx = GEOHASH_ALPHABET.index(chars[-1])
+        if idx + 1 < len(GEOHASH_ALPHABET):
+            chars[-1] = GEOHASH_ALPHABET[idx + 1]
+            return "".join(chars)
+        chars.pop()
+    return None
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(
+    latitude: float, longitude: float, radius_m: float
+) -> tuple[float, float, float, float]:
+    """Bbox (minLon, minLat, maxLon, maxLat) que contém o círculo informado."""
+    d_lat = math.degrees(radius_m / EARTH_RADIUS_M)
+    min_lat = latitude - d_lat
+    max_lat = latitude + d_lat
+
+    # Círculo alcança um dos polos: todas as longitudes
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return -180.0, max(min_lat, -90.0), 180.0, min(max_lat, 90.0)
+
+    d_lon = math.degrees(radius_m / (EARTH_RADIUS_M * math.cos(math.radians(latitude))))
+    if d_lon >= 180.0:
+        return -180.0, min_lat, 180.0, max_lat
+
+    min_lon = longitude - d_lon
+    max_lon = longitude + d_lon
+
+    # Normaliza para [-180, 180]; min_lon > max_lon indica cruzamento do antimeridiano
+    if min_lon < -180.0:
+        min_lon += 360.0
+    if max_lon > 180.0:
+        max_lon -= 360.0
+
+    return min_lon, min_lat, max_lon, max_lat
@@ -0,0 +1,79 @@
+# app/core/http_cache.py
+"""
+GET condicional (ETag / Last-Modified) baseado no contador de versão dos
+dados. A verificação lê apenas a tabela data_versions, então um 304 não
+toca na tabela de ocorrências.
+"""
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+
+from app.core.compression import strip_encoded_etag
+from app.database.session import get_db
+from app.repositories.data_version_repository import DataVersionRepository
+
+
+def make_etag(version: int, request: Request) -> str:
+    """ETag forte: versão global + hash do caminho e dos filtros da query."""
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{request.url.path}?{query}".encode("utf-8")).hexdigest()
+    return f'"{version}-{digest[:16]}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Comparação fraca (RFC 9110 §13.1.2): ignora o prefixo W/ e o sufixo
+    # de codificação que o middleware de compressão acrescenta
+    candidates = (
+        strip_encoded_etag(tag.strip().removeprefix("W/"))
+        for tag in if_none_match.split(",")
+    )
+    return etag in candidates
+
+
+def conditional_get(resource: str):
+    """
+    Dependência que responde 304 quando o cliente já tem a versão atual do
+    ``resource``. Caso contrário, adiciona ETag/Last-Modified à resposta e
+    retorna os cabeçalhos (para endpoints que montam a própria Response).
+    """
+
+    def dependency(
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_db),
+    ) -> dict[str, str]:
+        version, updated_at = DataVersionRepository(db).get(resource)
+        last_modified = updated_at.replace(tzinfo=timezone.utc, microsecond=0)
+
+        etag = make_etag(version, request)
+        headers = {
+            "ETag": etag,
+            "Last-Modified": format_datetime(last_modified, usegmt=True),
+            # O cliente pode guardar, mas deve revalidar sempre
+            "Cache-Control": "no-cache",
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+
+        not_modified = False
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, etag)
+        elif if_modified_since is not None:
+            try:
+                not_modified = last_modified <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                not_modified = False
+
+        if not_modified:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response.headers.update(headers)
+        return headers
+
+    return dependency
@@ -1,10 +1,37 @@
 # app/main.py
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from app.api.router import api_router
+from app.core.body_limit import BodySizeLimitMiddleware
+from app.core.compression import CompressionMiddleware, compressed_cache
 from app.core.config import settings
+from app.services import classifier_pool
+from app.services.ingestion_worker import ingestion_worker
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title=settings.PROJECT_NAME)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sobe os workers do classificador antes do primeiro upload
+    classifier_pool.start()
+    if settings.INGESTION_ASYNC_ENABLED:
+        ingestion_worker.start()
+    # Troca o modelo quando um treinamento publica uma versão nova
+    watcher = None
+    if settings.CLASSIFIER_RELOAD_POLL_SECONDS > 0:
+        watcher = asyncio.create_task(
+            classifier_pool.watch_model_version(settings.CLASSIFIER_RELOAD_POLL_SECONDS)
+        )
+    yield
+    if watcher is not None:
+        watcher.cancel()
+    await ingestion_worker.stop()
+    classifier_pool.shutdown()
+
+
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
 origins = [
     "http://localhost:8080",
@@ -14,6 +41,11 @@ origins = [
     "*.ngrok-free.dev"# Exemplo: frontend local (Vite)
 ]
 
+# Rejeita corpos grandes demais antes de o multipart ser gravado em disco.
+# Registrado antes do CORS (middlewares adicionados depois ficam por fora)
+# para que o 413 também leve os cabeçalhos CORS
+app.add_middleware(BodySizeLimitMiddleware, max_body_size=settings.UPLOAD_MAX_BODY_BYTES)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],          # ✅ somente essas origens terão acesso
@@ -22,8 +54,16 @@ app.add_middleware(
     allow_headers=["*"],            # Pode restringir se quiser: ["Authorization", "Content-Type"]
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    cache=compressed_cache,
+)
+
 # Inclui rotas da versão 1
-app.include_router(api_router, prefix="/pluvio-api")
+app.include_router(api_router, prefix=settings.API_PREFIX)
 
 # Rota simples de teste
 @app.get("/")
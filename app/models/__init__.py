@@ -1,7 +1,11 @@
 # Importe TODOS os models para que se registrem no Base.metadata
 from app.models.user import User
-from app.models.occurrence import Occurrence
+from app.models.occurrence import Occurrence, OccurrenceTombstone
 from app.models.severity import Severity
+from app.models.data_version import DataVersion
+from app.models.image_blob import ImageBlob
+from app.models.classification_result import ClassificationResult
+from app.models.ingestion_job import IngestionJob
 # ... todos os outros
 
-__all__ = ["User", "Occurrence", "Severity"]
\ No newline at end of file
+__all__ = ["User", "Occurrence", "OccurrenceTombstone", "Severity", "DataVersion", "ImageBlob", "ClassificationResult", "IngestionJob"]
\ No newline at end of file
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, Integer, Float, DateTime
+from datetime import datetime
+from app.database import Base
+
+
+class ClassificationResult(Base):
+    """
+    Resultado do classificador por conteúdo da imagem e versão do modelo.
+    Vale também para imagens rejeitadas, que não viram ocorrência.
+    """
+
+    __tablename__ = "classification_results"
+
+    image_sha256 = Column(String(64), primary_key=True)
+    model_version = Column(String(64), primary_key=True)
+    prediction = Column(Integer, nullable=False)
+    probability = Column(Float, nullable=False)
+    # Tempo gasto na classificação, poupado a cada reaproveitamento
+    classify_seconds = Column(Float, nullable=False, default=0.0)
+    created_at = Column(DateTime, default=datetime.utcnow)
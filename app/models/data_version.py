@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from datetime import datetime
+from app.database import Base
+
+# Recurso versionado: qualquer escrita em ocorrências incrementa este contador
+OCCURRENCES_VERSION = "occurrences"
+
+
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime
+from datetime import datetime
+from app.database import Base
+
+
+class ImageBlob(Base):
+    """Arquivo de imagem endereçado pelo SHA-256 do conteúdo."""
+
+    __tablename__ = "image_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(String(255), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    # Quantidade de ocorrências que usam este arquivo
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
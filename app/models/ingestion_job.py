@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, DateTime
+from datetime import datetime
+from app.database import Base
+
+
+class IngestionJob(Base):
+    """
+    Classificação pendente de uma ocorrência enviada no modo assíncrono.
+    Status: pendente, processando, concluido, rejeitado ou erro.
+    """
+
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Sem FK: a ocorrência é apagada quando a imagem é rejeitada, e o job
+    # continua respondendo a URL de status. Único: um job por ocorrência,
+    # mesmo com vários processos reenfileirando órfãs
+    occurrence_id = Column(Integer, nullable=False, unique=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    status = Column(String(20), nullable=False, default="pendente", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    prediction = Column(Integer, nullable=True)
+    probability = Column(Float, nullable=True)
+    detail = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Início do processamento atual; usado para retomar jobs abandonados
+    locked_at = Column(DateTime, nullable=True)
+    # Jobs que falharam só voltam a ser reservados a partir deste instante
+    retry_after = Column(DateTime, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Text, ForeignKey, DateTime, Enum
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -10,23 +10,51 @@ class Occurrence(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
     name = Column(String(100), nullable=False)
-    category = Column(String(50), nullable=False)
+    category = Column(String(50), nullable=False, index=True)
     description = Column(Text, nullable=True)
 
     image_path = Column(String(255), nullable=True)
+    # Conteúdo da imagem no armazenamento endereçado por hash (image_blobs)
+    image_sha256 = Column(
+        String(64), ForeignKey("image_blobs.sha256"), nullable=True, index=True
+    )
+
+    # Última versão do classificador que avaliou a imagem: a da criação ou a
+    # de uma reclassificação posterior, que pode rejeitá-la sem mudar o status
+    model_version = Column(String(64), nullable=True, index=True)
+    # Probabilidade de lixo dada por essa versão (reclassificação: app.cli.reclassify)
+    model_score = Column(Float, nullable=True)
 
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-
-    severity_id = Column(Integer, ForeignKey("severities.id"), nullable=False)
+    # Geohash da coordenada (app.core.geo), usado para poda espacial via índice
+    geohash = Column(String(12), nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=True)
+    # Versão de dados (data_versions) no momento da última escrita; base do delta-sync
+    change_seq = Column(BigInteger, nullable=True, index=True)
+
+    severity_id = Column(
+        Integer, ForeignKey("severities.id"), nullable=False, index=True
+    )
 
-    # novo campo
+    # novo campo; "validando" = aguardando a classificação em segundo plano
     status = Column(
-        Enum("ativa", "pendente", "resolvida", name="occurrence_status"),
+        Enum("ativa", "pendente", "resolvida", "validando", name="occurrence_status"),
         default="pendente",
-        nullable=False
+        nullable=False,
+        index=True,
     )
 
     severity = relationship("Severity", back_populates="occurrences")
     user = relationship("User", back_populates="occurrences")
+
+
+class OccurrenceTombstone(Base):
+    """Registro de ocorrência excluída, para o delta-sync dos clientes."""
+
+    __tablename__ = "occurrence_tombstones"
+
+    occurrence_id = Column(Integer, primary_key=True)
+    change_seq = Column(BigInteger, nullable=False, index=True)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,35 @@
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.classification_result import ClassificationResult
+
+
+class ClassificationResultRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, image_sha256: str, model_version: str) -> ClassificationResult | None:
+        return self.db.get(ClassificationResult, (image_sha256, model_version))
+
+    def save(
+        self,
+        image_sha256: str,
+        model_version: str,
+        prediction: int,
+        probability: float,
+        classify_seconds: float,
+    ) -> None:
+        """Grava o resultado; se outro upload do mesmo conteúdo gravou antes, mantém o dele"""
+        try:
+            with self.db.begin_nested():
+                self.db.add(
+                    ClassificationResult(
+                        image_sha256=image_sha256,
+                        model_version=model_version,
+                        prediction=prediction,
+                        probability=probability,
+                        classify_seconds=classify_seconds,
+                    )
+                )
+        except IntegrityError:
+            pass
+        self.db.commit()
@@ -0,0 +1,40 @@
+from datetime import datetime
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.models.data_version import DataVersion
+
+
+class DataVersionRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, name: str) -> tuple[int, datetime]:
+        """Versão atual e data da última alteração do recurso"""
+        row = (
+            self.db.query(DataVersion.version, DataVersion.updated_at)
+            .filter(DataVersion.name == name)
+            .first()
+        )
+        if row is None:
+            return 0, datetime(1970, 1, 1)
+        return row.version, row.updated_at
+
+    def bump(self, name: str) -> int:
+        """
+        Incrementa a versão do recurso dentro da transação corrente (sem
+        commit) e retorna o novo valor. O lock da linha serializa escritores
+        concorrentes até o commit.
+        """
+        version = self.db.execute(
+            update(DataVersion)
+            .where(DataVersion.name == name)
+            .values(version=DataVersion.version + 1, updated_at=datetime.utcnow())
+            .returning(DataVersion.version)
+        ).scalar()
+
+        if version is None:
+            self.db.add(DataVersion(name=name, version=1, updated_at=datetime.utcnow()))
+            self.db.flush()
+            version = 1
+
+        return version
@@ -0,0 +1,55 @@
+from sqlalchemy import update, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.image_blob import ImageBlob
+
+
+class ImageBlobRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, sha256: str) -> ImageBlob | None:
+        return self.db.query(ImageBlob).filter(ImageBlob.sha256 == sha256).first()
+
+    def acquire(self, sha256: str, path: str, size: int) -> str:
+        """
+        Soma uma referência ao arquivo, criando o registro se for novo (sem
+        commit). Retorna o caminho registrado, que vale para todas as
+        ocorrências com esse conteúdo.
+        """
+        registered = self._increment(sha256)
+        if registered is not None:
+            return registered
+
+        try:
+            with self.db.begin_nested():
+                self.db.add(ImageBlob(sha256=sha256, path=path, size=size, ref_count=1))
+            return path
+        except IntegrityError:
+            # Outro upload do mesmo conteúdo criou o registro antes
+            return self._increment(sha256)
+
+    def release(self, sha256: str) -> bool:
+        """
+        Remove uma referência (sem commit). Retorna True quando era a última:
+        o registro é apagado e o arquivo pode ser removido após o commit.
+        """
+        remaining = self.db.execute(
+            update(ImageBlob)
+            .where(ImageBlob.sha256 == sha256)
+            .values(ref_count=ImageBlob.ref_count - 1)
+            .returning(ImageBlob.ref_count)
+        ).scalar()
+
+        if remaining is not None and remaining <= 0:
+            self.db.execute(delete(ImageBlob).where(ImageBlob.sha256 == sha256))
+            return True
+        return False
+
+    def _increment(self, sha256: str) -> str | None:
+        return self.db.execute(
+            update(ImageBlob)
+            .where(ImageBlob.sha256 == sha256)
+            .values(ref_count=ImageBlob.ref_count + 1)
+            .returning(ImageBlob.path)
+        ).scalar()
@@ -0,0 +1,131 @@
+from datetime import datetime
+from sqlalchemy import and_, exists, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.ingestion_job import IngestionJob
+from app.models.occurrence import Occurrence
+
+
+class IngestionJobRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, job_id: int) -> IngestionJob | None:
+        return self.db.get(IngestionJob, job_id)
+
+    def enqueue(self, occurrence_id: int, user_id: int) -> IngestionJob:
+        now = datetime.utcnow()
+        job = IngestionJob(
+            occurrence_id=occurrence_id,
+            user_id=user_id,
+            status="pendente",
+            attempts=0,
+            created_at=now,
+            updated_at=now,
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def enqueue_orphans(self) -> int:
+        """
+        Cria jobs para ocorrências "validando" sem job (processo encerrado
+        entre a gravação da ocorrência e a do job).
+        """
+        orphans = (
+            self.db.query(Occurrence.id, Occurrence.user_id)
+            .filter(
+                Occurrence.status == "validando",
+                ~exists().where(IngestionJob.occurrence_id == Occurrence.id),
+            )
+            .all()
+        )
+        now = datetime.utcnow()
+        created = 0
+        for occurrence_id, user_id in orphans:
+            try:
+                with self.db.begin_nested():
+                    self.db.add(
+                        IngestionJob(
+                            occurrence_id=occurrence_id,
+                            user_id=user_id,
+                            status="pendente",
+                            attempts=0,
+                            created_at=now,
+                            updated_at=now,
+                        )
+                    )
+                created += 1
+            except IntegrityError:
+                # Outro processo criou o job da mesma ocorrência antes
+                pass
+        self.db.commit()
+        return created
+
+    def failed_unvalidated(self) -> list[int]:
+        """Ocorrências ainda "validando" cujo job já terminou em erro."""
+        rows = (
+            self.db.query(Occurrence.id)
+            .join(IngestionJob, IngestionJob.occurrence_id == Occurrence.id)
+            .filter(Occurrence.status == "validando", IngestionJob.status == "erro")
+            .all()
+        )
+        return [occurrence_id for (occurrence_id,) in rows]
+
+    def claim(self, limit: int, stale_before: datetime) -> list[tuple[int, int, int]]:
+        """
+        Reserva até ``limit`` jobs pendentes (ou abandonados antes de
+        ``stale_before``) e retorna (id, occurrence_id, tentativa). Com
+        SKIP LOCKED, workers de outros processos pegam jobs diferentes.
+        Jobs em espera de nova tentativa ficam de fora até ``retry_after``.
+        """
+        now = datetime.utcnow()
+        jobs = (
+            self.db.query(IngestionJob)
+            .filter(
+                or_(
+                    and_(
+                        IngestionJob.status == "pendente",
+                        or_(IngestionJob.retry_after.is_(None), IngestionJob.retry_after <= now),
+                    ),
+                    and_(
+                        IngestionJob.status == "processando",
+                        IngestionJob.locked_at < stale_before,
+                    ),
+                )
+            )
+            .order_by(IngestionJob.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+        claimed = []
+        for job in jobs:
+            job.status = "processando"
+            job.attempts += 1
+            job.locked_at = now
+            job.updated_at = now
+            claimed.append((job.id, job.occurrence_id, job.attempts))
+        self.db.commit()
+        return claimed
+
+    def finish(
+        self,
+        job_id: int,
+        status: str,
+        prediction: int | None = None,
+        probability: float | None = None,
+        detail: str | None = None,
+        retry_after: datetime | None = None,
+    ) -> None:
+        job = self.get(job_id)
+        job.status = status
+        job.prediction = prediction
+        job.probability = probability
+        job.detail = detail
+        job.locked_at = None
+        job.retry_after = retry_after
+        job.updated_at = datetime.utcnow()
+        self.db.commit()
@@ -1,6 +1,25 @@
 # app/repositories/occurrence_repository.py
+from datetime import datetime
+from sqlalchemy import or_, and_
 from sqlalchemy.orm import Session, joinedload
-from app.models.occurrence import Occurrence
+from app.core.geo import (
+    encode_geohash,
+    geohash_cover,
+    geohash_prefix_upper_bound,
+    haversine_m,
+    radius_bbox,
+)
+from app.models.data_version import OCCURRENCES_VERSION
+from app.models.occurrence import Occurrence, OccurrenceTombstone
+from app.models.severity import Severity
+from app.repositories.data_version_repository import DataVersionRepository
+from app.repositories.image_blob_repository import ImageBlobRepository
+from app.schemas.occurrence import OccurrenceFilter
+
+# Ocorrências ainda não validadas pelo classificador ("validando") ficam
+# fora das listagens públicas, do mapa e do delta-sync até serem promovidas
+VALIDATED = Occurrence.status != "validando"
+
 
 class OccurrenceRepository:
     def __init__(self, db: Session):
@@ -17,7 +36,19 @@ class OccurrenceRepository:
         longitude: float,
         image_path: str | None = None,
         status: str = "pendente",  # 🔥 novo campo com default
+        image_sha256: str | None = None,
+        image_size: int | None = None,
+        model_version: str | None = None,
+        model_score: float | None = None,
     ) -> Occurrence:
+        now = datetime.utcnow()
+        if image_sha256 is not None:
+            # Referência ao arquivo na mesma transação da ocorrência; o
+            # caminho registrado prevalece sobre o deste upload
+            image_path = ImageBlobRepository(self.db).acquire(
+                image_sha256, image_path, image_size
+            )
+
         occurrence = Occurrence(
             user_id=user_id,
             name=name,
@@ -26,8 +57,15 @@ class OccurrenceRepository:
             severity_id=severity_id,
             latitude=latitude,
             longitude=longitude,
+            geohash=encode_geohash(latitude, longitude),
             image_path=image_path,
+            image_sha256=image_sha256,
+            model_version=model_version,
+            model_score=model_score,
             status=status,  # 🔥 agora vai para o banco
+            created_at=now,
+            updated_at=now,
+            change_seq=self._next_change_seq(),
         )
         
         self.db.add(occurrence)
@@ -36,6 +74,96 @@ class OccurrenceRepository:
         
         return occurrence
 
+    def update_occurrence_status(
+        self,
+        occurrence_id: int,
+        status: str,
+        model_version: str | None = None,
+        model_score: float | None = None,
+    ) -> Occurrence:
+        occurrence = self.get_by_id(occurrence_id)
+        occurrence.status = status
+        if model_version is not None:
+            occurrence.model_version = model_version
+            occurrence.model_score = model_score
+        occurrence.updated_at = datetime.utcnow()
+        occurrence.change_seq = self._next_change_seq()
+        self.db.commit()
+        self.db.refresh(occurrence)
+        return occurrence
+
+    def delete_occurrence(self, occurrence_id: int) -> Occurrence | None:
+        occurrence = self.get_by_id(occurrence_id)
+        if occurrence is None:
+            return None
+        self.db.delete(occurrence)
+        if occurrence.image_sha256 is not None:
+            # A ocorrência precisa sair antes do registro do arquivo (FK)
+            self.db.flush()
+            ImageBlobRepository(self.db).release(occurrence.image_sha256)
+        self.db.add(
+            OccurrenceTombstone(
+                occurrence_id=occurrence_id,
+                change_seq=self._next_change_seq(),
+                deleted_at=datetime.utcnow(),
+            )
+        )
+        self.db.commit()
+        return occurrence
+
+    def is_image_referenced(self, occurrence: Occurrence) -> bool:
+        """
+        Se o arquivo da ocorrência ainda é usado por alguém. Arquivos
+        endereçados por hash seguem a contagem de image_blobs; os antigos,
+        com nome derivado dos dados, podem ter sido sobrescritos por outra
+        ocorrência com o mesmo nome de arquivo.
+        """
+        if occurrence.image_sha256 is not None:
+            return ImageBlobRepository(self.db).get(occurrence.image_sha256) is not None
+        return (
+            self.db.query(Occurrence.id)
+            .filter(
+                Occurrence.image_path == occurrence.image_path,
+                Occurrence.id != occurrence.id,
+            )
+            .first()
+            is not None
+        )
+
+    def _next_change_seq(self) -> int:
+        """
+        Incrementa a versão das ocorrências na transação corrente. O lock da
+        linha em data_versions só é liberado no commit, então as sequências
+        ficam visíveis na mesma ordem em que foram geradas (sem buracos
+        para quem lê ``change_seq > since``).
+        """
+        return DataVersionRepository(self.db).bump(OCCURRENCES_VERSION)
+
+    def list_changes(self, since: int, limit: int):
+        """
+        Ocorrências alteradas e exclusões com ``change_seq > since``, até
+        ``limit + 1`` de cada, em ordem de sequência.
+        """
+        upserts = (
+            self.db.query(Occurrence)
+            .options(
+                joinedload(Occurrence.user),
+                joinedload(Occurrence.severity),
+            )
+            .filter(Occurrence.change_seq > since, VALIDATED)
+            .order_by(Occurrence.change_seq)
+            .limit(limit + 1)
+            .all()
+        )
+        deletes = (
+            self.db.query(OccurrenceTombstone)
+            .filter(OccurrenceTombstone.change_seq > since)
+            .order_by(OccurrenceTombstone.change_seq)
+            .limit(limit + 1)
+            .all()
+        )
+        return upserts, deletes
+
     def get_all_with_user(self):
         return (
             self.db.query(Occurrence)
@@ -46,5 +174,175 @@ class OccurrenceRepository:
             .all()
         )
     
+    def list_filtered(self, filters: OccurrenceFilter) -> list[Occurrence]:
+        """
+        Lista ocorrências aplicando filtros e paginação por cursor (keyset).
+
+        Retorna até ``filters.limit + 1`` linhas ordenadas por id; a linha
+        extra indica ao chamador que existe uma próxima página.
+        """
+        query = self.db.query(Occurrence).options(
+            joinedload(Occurrence.user),
+            joinedload(Occurrence.severity),
+        )
+        query = self._apply_filters(query, filters)
+
+        return query.order_by(Occurrence.id).limit(filters.limit + 1).all()
+
+    def iter_filtered(self, filters: OccurrenceFilter, batch_size: int = 1000):
+        """
+        Itera sobre as ocorrências filtradas usando cursor no servidor.
+
+        ``yield_per`` ativa ``stream_results``: o driver busca ``batch_size``
+        linhas por vez, sem materializar o resultado inteiro em memória.
+        O ``limit`` do filtro é ignorado (exportação completa a partir de
+        ``after_id``).
+        """
+        query = self.db.query(Occurrence).options(
+            joinedload(Occurrence.user),
+            joinedload(Occurrence.severity),
+        )
+        query = self._apply_filters(query, filters).order_by(Occurrence.id)
+
+        yield from query.yield_per(batch_size)
+
+    def iter_map_points(self, batch_size: int = 5000):
+        """
+        Tuplas (id, latitude, longitude, severity_id, status) das
+        ocorrências validadas, sem montar objetos ORM. Usado para carregar os
+        índices do mapa.
+        """
+        query = self.db.query(
+            Occurrence.id,
+            Occurrence.latitude,
+            Occurrence.longitude,
+            Occurrence.severity_id,
+            Occurrence.status,
+        ).filter(VALIDATED)
+        for row in query.yield_per(batch_size):
+            yield tuple(row)
+
+    def list_tile_points(self, bbox: tuple[float, float, float, float]):
+        """Colunas usadas nos vector tiles para as ocorrências do bbox."""
+        query = self.db.query(
+            Occurrence.id,
+            Occurrence.latitude,
+            Occurrence.longitude,
+            Occurrence.status,
+            Occurrence.category,
+            Occurrence.severity_id,
+            Severity.code.label("severity_code"),
+        ).join(Occurrence.severity).filter(VALIDATED)
+
+        return self._apply_bbox(query, bbox).all()
+
+    def _apply_filters(self, query, filters: OccurrenceFilter):
+        if filters.bbox:
+            query = self._apply_bbox(query, filters.bbox)
+
+        # Listagens são públicas: "validando" fica de fora mesmo se pedido
+        query = query.filter(VALIDATED)
+        if filters.status:
+            query = query.filter(Occurrence.status == filters.status)
+
+        if filters.category:
+            query = query.filter(
+                Occurrence.category == filters.category.strip().lower()
+            )
+
+        if filters.severity_id:
+            query = query.filter(Occurrence.severity_id == filters.severity_id)
+
+        if filters.since:
+            query = query.filter(Occurrence.created_at >= filters.since)
+
+        if filters.after_id:
+            query = query.filter(Occurrence.id > filters.after_id)
+
+        return query
+
+    def _apply_bbox(self, query, bbox: tuple[float, float, float, float]):
+        min_lon, min_lat, max_lon, max_lat = bbox
+
+        # Poda pelas células de geohash (intervalos no índice btree)
+        ranges = []
+        for prefix in geohash_cover(min_lon, min_lat, max_lon, max_lat):
+            upper = geohash_prefix_upper_bound(prefix)
+            if upper is None:
+                ranges.append(Occurrence.geohash >= prefix)
+            else:
+                ranges.append(
+                    and_(Occurrence.geohash >= prefix, Occurrence.geohash < upper)
+                )
+        query = query.filter(or_(*ranges))
+
+        # Filtro exato, já que as células extrapolam as bordas do bbox
+        query = query.filter(Occurrence.latitude.between(min_lat, max_lat))
+
+        if min_lon <= max_lon:
+            query = query.filter(Occurrence.longitude.between(min_lon, max_lon))
+        else:
+            # Viewport cruzando o antimeridiano (ex.: 170,-10,-170,10)
+            query = query.filter(
+                or_(
+                    Occurrence.longitude >= min_lon,
+                    Occurrence.longitude <= max_lon,
+                )
+            )
+
+        return query
+
+    def find_within_radius(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_m: float,
+        limit: int | None = None,
+    ) -> list[tuple[Occurrence, float]]:
+        """
+        Ocorrências a até ``radius_m`` metros do ponto, da mais próxima para
+        a mais distante, como pares (ocorrência, distância em metros).
+
+        Os candidatos vêm do bbox do círculo (podado por geohash); a distância
+        exata é calculada com haversine.
+        """
+        query = self.db.query(Occurrence).options(
+            joinedload(Occurrence.user),
+            joinedload(Occurrence.severity),
+        ).filter(VALIDATED)
+        candidates = self._apply_bbox(
+            query, radius_bbox(latitude, longitude, radius_m)
+        ).all()
+
+        results = []
+        for occ in candidates:
+            distance = haversine_m(latitude, longitude, occ.latitude, occ.longitude)
+            if distance <= radius_m:
+                results.append((occ, distance))
+
+        results.sort(key=lambda item: item[1])
+        return results[:limit] if limit else results
+
+    def find_nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int,
+        initial_radius_m: float = 500.0,
+        max_radius_m: float = 50_000.0,
+    ) -> list[tuple[Occurrence, float]]:
+        """
+        As ``k`` ocorrências mais próximas do ponto (até ``max_radius_m``).
+
+        Busca por raio crescente: se o círculo já contém ``k`` ocorrências,
+        as ``k`` mais próximas estão garantidamente dentro dele.
+        """
+        radius = min(initial_radius_m, max_radius_m)
+        while True:
+            results = self.find_within_radius(latitude, longitude, radius)
+            if len(results) >= k or radius >= max_radius_m:
+                return results[:k]
+            radius = min(radius * 4, max_radius_m)
+
     def get_by_id(self, occurrence_id: int):
         return self.db.query(Occurrence).filter(Occurrence.id == occurrence_id).first()
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class ModelVersionsResponse(BaseModel):
+    current: Optional[str] = Field(None, description="Versão apontada por models/CURRENT")
+    loaded: Optional[str] = Field(None, description="Versão em uso neste processo")
+    available: list[str] = Field(..., description="Versões em machineLearning/models")
+
+
+class ModelReloadResponse(BaseModel):
+    previous: Optional[str] = Field(None, description="Versão usada antes da troca")
+    loaded: str = Field(..., description="Versão em uso após a troca")
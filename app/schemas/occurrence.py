@@ -23,7 +23,7 @@ class OccurrenceBase(BaseModel):
     # novo campo
     status: Optional[str] = Field(
         "pendente",
-        description="Status da ocorrência: ativa, pendente, resolvida"
+        description="Status da ocorrência: ativa, pendente, resolvida, validando"
     )
 
 
@@ -36,5 +36,51 @@ class OccurrenceResponse(OccurrenceBase):
     user_id: int
     created_at: datetime
     severity: SeverityResponse
+    model_version: Optional[str] = Field(
+        None,
+        description=(
+            "Última versão do classificador que avaliou a imagem (na criação ou "
+            "numa reclassificação); não é necessariamente a que a aceitou"
+        ),
+    )
+    model_score: Optional[float] = Field(
+        None, description="Probabilidade de lixo segundo essa versão do classificador"
+    )
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class IngestionJobResponse(BaseModel):
+    """Andamento da validação de uma ocorrência enviada no modo assíncrono."""
+
+    id: int
+    occurrence_id: int
+    status: str = Field(
+        ..., description="pendente, processando, concluido, rejeitado ou erro"
+    )
+    attempts: int
+    prediction: Optional[int] = None
+    probability: Optional[float] = None
+    detail: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class OccurrenceFilter(BaseModel):
+    """Filtros aplicados no SQL para a listagem de ocorrências do mapa."""
+
+    bbox: Optional[tuple[float, float, float, float]] = Field(
+        None, description="Viewport no formato (minLon, minLat, maxLon, maxLat)"
+    )
+    status: Optional[str] = None
+    category: Optional[str] = None
+    severity_id: Optional[int] = None
+    since: Optional[datetime] = Field(
+        None, description="Somente ocorrências criadas a partir desta data"
+    )
+    after_id: Optional[int] = Field(
+        None, description="Cursor: retorna ocorrências com id maior que este"
+    )
+    limit: int = Field(500, ge=1)
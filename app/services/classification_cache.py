@@ -0,0 +1,89 @@
+# app/services/classification_cache.py
+"""
+Resultados do classificador por (SHA-256 da imagem, versão do modelo).
+
+Reenvios da mesma foto (nova tentativa após timeout, o mesmo ponto
+relatado de novo) não passam outra vez por decode, ORB e SVM. A chave
+inclui a versão do modelo, então um novo treinamento invalida tudo sem
+precisar limpar nada.
+
+A camada em memória é um LRU por processo; a tabela
+``classification_results`` (opcional) guarda os resultados entre
+reinícios e entre os workers do uvicorn.
+"""
+import threading
+
+from app.core.cache import LRUCache
+from app.repositories.classification_result_repository import (
+    ClassificationResultRepository,
+)
+
+
+class ClassificationCache:
+    def __init__(self, max_items: int):
+        # (sha256, versão) -> (predição, probabilidade, segundos de classificação)
+        self._memory = LRUCache(max_items=max_items)
+        self._lock = threading.Lock()
+        self.store_hits = 0
+        self.saved_seconds = 0.0
+        self.classify_seconds = 0.0
+
+    def get(
+        self,
+        image_sha256: str,
+        model_version: str,
+        store: ClassificationResultRepository | None = None,
+    ) -> tuple[int, float] | None:
+        """(predição, probabilidade) já calculados, ou None."""
+        key = (image_sha256, model_version)
+        entry = self._memory.get(key)
+
+        if entry is None and store is not None:
+            row = store.get(image_sha256, model_version)
+            if row is not None:
+                entry = (row.prediction, row.probability, row.classify_seconds)
+                self._memory.set(key, entry)
+                with self._lock:
+                    self.store_hits += 1
+
+        if entry is None:
+            return None
+
+        pred, prob, seconds = entry
+        with self._lock:
+            self.saved_seconds += seconds
+        return pred, prob
+
+    def set(
+        self,
+        image_sha256: str,
+        model_version: str,
+        pred: int,
+        prob: float,
+        seconds: float,
+        store: ClassificationResultRepository | None = None,
+    ):
+        self._memory.set((image_sha256, model_version), (pred, prob, seconds))
+        with self._lock:
+            self.classify_seconds += seconds
+        if store is not None:
+            store.save(image_sha256, model_version, pred, prob, seconds)
+
+    def clear(self):
+        self._memory.clear()
+
+    def stats(self) -> dict:
+        stats = self._memory.stats()
+        with self._lock:
+            # Acertos na tabela contam como falha do LRU; somamos de volta
+            hits = stats["hits"] + self.store_hits
+            lookups = stats["hits"] + stats["misses"]
+            stats.update(
+                {
+                    "store_hits": self.store_hits,
+                    "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                    "saved_seconds": round(self.saved_seconds, 3),
+                    "classify_seconds": round(self.classify_seconds, 3),
+                }
+            )
+        return stats
@@ -0,0 +1,118 @@
+# app/services/classifier_batcher.py
+"""
+Fila de micro-lotes para a predição do classificador.
+
+Os histogramas de requisições concorrentes são acumulados por até
+``max_wait_ms`` ou ``max_batch_size`` itens e preditos numa única chamada
+vetorizada; cada chamador recebe o resultado da sua linha. Com
+``max_batch_size=1`` cada histograma é predito sozinho, sem espera.
+
+Cada item leva o modelo com que o histograma foi extraído: durante uma
+troca de versão o lote é dividido por modelo, e as requisições em
+andamento terminam na versão com que começaram.
+"""
+import asyncio
+from collections import deque
+from typing import Any, Callable, Sequence
+
+import numpy as np
+
+
+class ClassificationBatcher:
+    def __init__(
+        self,
+        predict_batch: Callable[[Sequence[np.ndarray], Any], list[tuple[int, float]]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+    ):
+        self._predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pending: deque = deque()
+        self._arrived: asyncio.Event | None = None
+        self._worker: asyncio.Task | None = None
+        self.batches = 0
+        self.items = 0
+
+    async def predict(self, histogram: np.ndarray, model=None) -> tuple[int, float]:
+        """(predição, probabilidade) com ``model`` (None = o modelo em uso)."""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._pending.append((histogram, model, future))
+        self._arrived.set()
+        return await future
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "queued": len(self._pending),
+        }
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            # Primeira chamada (ou novo event loop): fila e worker são
+            # presos ao loop em que foram criados
+            self._loop = loop
+            self._pending = deque()
+            self._arrived = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+
+            # Quase sempre um grupo só; mais de um durante a troca de modelo
+            groups: dict[int, list] = {}
+            for item in batch:
+                groups.setdefault(id(item[1]), []).append(item)
+
+            for items in groups.values():
+                await self._predict_group(items)
+
+    async def _predict_group(self, items: list):
+        try:
+            results = await asyncio.to_thread(
+                self._predict_batch, [histogram for histogram, _, _ in items], items[0][1]
+            )
+        except Exception as e:
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.items += len(items)
+        for (_, _, future), result in zip(items, results):
+            # O chamador pode ter desistido (cliente desconectou)
+            if not future.done():
+                future.set_result(result)
+
+    async def _collect(self) -> list:
+        while not self._pending:
+            self._arrived.clear()
+            await self._arrived.wait()
+
+        batch = [self._pending.popleft()]
+        deadline = self._loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # Sem await entre o clear e a drenagem: nenhum item se perde
+            self._arrived.clear()
+            while self._pending and len(batch) < self.max_batch_size:
+                batch.append(self._pending.popleft())
+
+            remaining = deadline - self._loop.time()
+            if len(batch) >= self.max_batch_size or remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(self._arrived.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+        return batch
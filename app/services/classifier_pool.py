@@ -0,0 +1,154 @@
+# app/services/classifier_pool.py
+"""
+Executor da classificação de imagens, para que o event loop não fique
+parado durante o decode, o ORB e a predição.
+
+A extração do histograma roda no pool, uma imagem por tarefa; a predição
+passa pela fila de micro-lotes, que junta os histogramas de requisições
+concorrentes numa chamada vetorizada.
+
+- "thread": ThreadPoolExecutor. OpenCV e numpy liberam o GIL na maior
+  parte do trabalho e o modelo carregado é compartilhado.
+- "process": ProcessPoolExecutor. Cada worker carrega o modelo uma vez no
+  initializer (com fork, herda o já carregado pelo processo pai); com o
+  modelo mapeado do disco, os arrays ficam compartilhados no page cache.
+- "inline": roda no próprio event loop, como antes; só para comparação e
+  depuração.
+
+Cada classificação captura o modelo em uso no início e o usa até o fim,
+então uma troca de versão (``reload_model``) não mistura o vocabulário de
+um modelo com o SVM de outro. Workers de processo recebem só o nome da
+versão e carregam a que for pedida.
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import NamedTuple
+
+from app.core.config import settings
+from app.services.classifier_batcher import ClassificationBatcher
+from app.services.classifier_service import (
+    current_model_version,
+    engine_for_version,
+    extract_histogram_from_path,
+    predict_batch,
+    registry,
+    reload_model,
+)
+
+logger = logging.getLogger(__name__)
+
+_executor: Executor | None = None
+_lock = threading.Lock()
+
+batcher = ClassificationBatcher(
+    predict_batch,
+    max_batch_size=settings.CLASSIFIER_BATCH_MAX_SIZE,
+    max_wait_ms=settings.CLASSIFIER_BATCH_MAX_WAIT_MS,
+)
+
+
+def _init_worker():
+    # Com fork o modelo já vem carregado do processo pai; com spawn ou
+    # forkserver é carregado (e aquecido) aqui, uma vez por worker
+    if settings.CLASSIFIER_PRELOAD:
+        registry.load()
+
+
+def _warm_up():
+    return True
+
+
+def get_executor() -> Executor | None:
+    global _executor
+
+    if settings.CLASSIFIER_EXECUTOR == "inline":
+        return None
+
+    with _lock:
+        if _executor is None:
+            if settings.CLASSIFIER_EXECUTOR == "process":
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.CLASSIFIER_WORKERS, initializer=_init_worker
+                )
+            else:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.CLASSIFIER_WORKERS,
+                    thread_name_prefix="classifier",
+                )
+        return _executor
+
+
+def start():
+    """Carrega o modelo, cria o pool e sobe os workers na inicialização da API."""
+    if settings.CLASSIFIER_PRELOAD:
+        registry.load()
+
+    executor = get_executor()
+    if executor is None:
+        return
+    futures = [executor.submit(_warm_up) for _ in range(settings.CLASSIFIER_WORKERS)]
+    for future in futures:
+        future.result()
+
+
+def shutdown():
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+class Classification(NamedTuple):
+    prediction: int
+    probability: float
+    # Tempo de CPU da extração; a parte da predição em lote é desprezível
+    cpu_seconds: float
+    model_version: str
+
+
+def _extract_timed(path: str, model):
+    # ``model`` é o motor (threads) ou o nome da versão (processos)
+    if isinstance(model, str):
+        model = engine_for_version(model)
+    # Tempo de CPU da thread do worker: não conta a espera na fila do pool
+    start = time.thread_time()
+    histogram = extract_histogram_from_path(path, model)
+    return histogram, time.thread_time() - start
+
+
+async def classify_file(path: str) -> Classification:
+    """Classifica a imagem em ``path`` com o modelo em uso neste momento."""
+    engine = registry.get()
+    executor = get_executor()
+    if executor is None:
+        histogram, cpu_seconds = _extract_timed(path, engine)
+    else:
+        model = engine.version if settings.CLASSIFIER_EXECUTOR == "process" else engine
+        loop = asyncio.get_running_loop()
+        histogram, cpu_seconds = await loop.run_in_executor(executor, _extract_timed, path, model)
+
+    if histogram is None:
+        return Classification(0, 0.0, cpu_seconds, engine.version)
+    pred, prob = await batcher.predict(histogram, engine)
+    return Classification(pred, prob, cpu_seconds, engine.version)
+
+
+async def watch_model_version(poll_seconds: float):
+    """
+    Troca o modelo quando models/CURRENT passa a apontar outra versão
+    (novo treinamento ou ativação por outro worker do uvicorn).
+    """
+    while True:
+        await asyncio.sleep(poll_seconds)
+        try:
+            version = await asyncio.to_thread(current_model_version)
+            if version is None or not registry.loaded or version == registry.get().version:
+                continue
+            previous, engine = await asyncio.to_thread(reload_model, version)
+            print(f"Modelo trocado: {previous.version} -> {engine.version}")
+        except Exception:
+            logger.exception("Erro ao trocar o modelo")
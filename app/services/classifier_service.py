@@ -1,7 +1,19 @@
+import hashlib
 import os
+import threading
+from collections import OrderedDict
 import cv2
 import numpy as np
-import joblib  # <- substitui pickle
+
+from app.core.config import settings
+from app.services.image_preprocess import decode_image
+from app.services.model_registry import ModelRegistry
+from app.services.model_store import (
+    current_model_version,
+    model_version_dir,
+    set_current_model_version,
+)
+from app.services.numpy_classifier import NumpyBowClassifier, stored_max_side
 
 # ---------------------------------------------
 # Caminho absoluto da raiz do projeto
@@ -13,41 +25,226 @@ MODEL_DIR = os.path.join(PROJECT_ROOT, "machineLearning")
 
 MODEL_PATH = os.path.join(MODEL_DIR, "model.pkl")
 BOW_PATH = os.path.join(MODEL_DIR, "bow.pkl")
+NUMPY_MODEL_DIR = os.path.join(MODEL_DIR, "numpy_model")
 
-# ---------------------------------------------
-# Carregando arquivos .pkl com joblib
-# ---------------------------------------------
-model = joblib.load(MODEL_PATH)
-kmeans = joblib.load(BOW_PATH)
 
-# Extrator ORB
-orb = cv2.ORB_create(nfeatures=500)
+class SklearnBowClassifier:
+    """Mesma interface do NumpyBowClassifier, sobre os .pkl do scikit-learn."""
 
+    def __init__(self, model, kmeans, max_side=None):
+        self.model = model
+        self.kmeans = kmeans
+        # Os .pkl não registram o pré-processamento: vem do params.json
+        self.max_side = max_side
+        self.version: str | None = None
 
-def classify_image(image_bytes):
-    try:
-        npimg = np.frombuffer(image_bytes, np.uint8)
-        img = cv2.imdecode(npimg, cv2.IMREAD_GRAYSCALE)
+    @property
+    def n_clusters(self) -> int:
+        return len(self.kmeans.cluster_centers_)
 
-        if img is None:
-            return 0, 0.0
+    def histogram(self, descriptors):
+        clusters = self.kmeans.predict(descriptors)
+        return np.bincount(clusters, minlength=self.n_clusters).astype(np.float32)
 
-        kp, des = orb.detectAndCompute(img, None)
+    def predict_batch(self, histograms):
+        X = np.vstack(histograms)
+        preds = self.model.predict(X)
+        probs = self.model.predict_proba(X)[:, 1]
+        return [(int(pred), float(prob)) for pred, prob in zip(preds, probs)]
+
+
+def load_engine(name: str, mmap_mode: str | None = None, version: str | None = None):
+    """
+    "numpy": artefato exportado, sem scikit-learn na requisição;
+    "sklearn" (ou artefato ausente): arquivos .pkl carregados com joblib.
+
+    Sem ``version`` usa a versão apontada por ``models/CURRENT``; sem
+    modelos versionados, os arquivos soltos em ``machineLearning/``.
+
+    Com ``mmap_mode="r"`` os arrays são mapeados do disco: os workers do
+    uvicorn compartilham as mesmas páginas pelo page cache. No scikit-learn
+    só o vocabulário é mapeado: a libsvm exige arrays graváveis.
+    """
+    version = version or current_model_version()
+    if version is None:
+        engine = _load_artifacts(name, NUMPY_MODEL_DIR, MODEL_PATH, BOW_PATH, mmap_mode)
+        if isinstance(engine, NumpyBowClassifier):
+            engine.version = artifact_version(
+                *(os.path.join(NUMPY_MODEL_DIR, f) for f in ("params.json", "centers.npy", "coef.npy"))
+            )
+        else:
+            engine.version = artifact_version(MODEL_PATH, BOW_PATH)
+        return engine
+
+    directory = model_version_dir(version)
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(f"Versão do modelo não encontrada: {version}")
+
+    engine = _load_artifacts(
+        name,
+        directory,
+        os.path.join(directory, "model.pkl"),
+        os.path.join(directory, "bow.pkl"),
+        mmap_mode,
+    )
+    engine.version = version
+    return engine
+
+
+def _load_artifacts(name, numpy_dir, model_path, bow_path, mmap_mode):
+    if name == "numpy" and os.path.exists(os.path.join(numpy_dir, "params.json")):
+        return NumpyBowClassifier.load(numpy_dir, mmap_mode=mmap_mode)
+    if name == "numpy":
+        print(f"Artefato NumPy não encontrado em {numpy_dir}; usando scikit-learn")
+
+    import joblib  # <- substitui pickle; importado só quando necessário
+
+    return SklearnBowClassifier(
+        joblib.load(model_path),
+        joblib.load(bow_path, mmap_mode=mmap_mode),
+        max_side=stored_max_side(numpy_dir),
+    )
+
+
+def artifact_version(*paths) -> str:
+    """Impressão digital dos arquivos do modelo: muda a cada treinamento."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def warm_up(engine):
+    """Uma classificação completa para inicializar OpenCV, BLAS e caches."""
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, (256, 256), dtype=np.uint8)
+    ok, encoded = cv2.imencode(".jpg", img)
+    hist = _extract_histogram(encoded, engine)
+    if hist is None:
+        hist = np.zeros(engine.n_clusters, dtype=np.float32)
+    engine.predict_batch([hist])
+
+
+registry = ModelRegistry(
+    lambda: load_engine(settings.CLASSIFIER_ENGINE, mmap_mode=settings.CLASSIFIER_MMAP_MODE),
+    warm_up=warm_up,
+)
+
+# Versões carregadas fora do registro: workers de processo atendendo
+# requisições que começaram antes de uma troca
+_other_engines: OrderedDict[str, object] = OrderedDict()
+_other_engines_lock = threading.Lock()
+_reload_lock = threading.Lock()
+
+
+def load_and_warm(version: str | None = None):
+    engine = load_engine(
+        settings.CLASSIFIER_ENGINE, mmap_mode=settings.CLASSIFIER_MMAP_MODE, version=version
+    )
+    warm_up(engine)
+    return engine
 
-        if des is None or len(des) == 0:
-            return 0, 0.0
 
-        # Histograma do Bag of Words
-        hist = np.zeros(len(kmeans.cluster_centers_), dtype=np.float32)
-        clusters = kmeans.predict(des)
+def reload_model(version: str | None = None, publish: bool = False):
+    """
+    Carrega e aquece ``version`` (padrão: models/CURRENT) e só então troca
+    o modelo em uso. Requisições em andamento terminam no modelo anterior,
+    que já foi capturado por elas. Com ``publish``, CURRENT passa a apontar
+    para a versão, depois de ela carregar sem erro. Retorna (anterior, novo).
+    """
+    with _reload_lock:
+        engine = load_and_warm(version)
+        if publish and version is not None:
+            set_current_model_version(version)
+        return registry.swap(engine), engine
 
-        for c in clusters:
-            hist[c] += 1
 
-        pred = model.predict([hist])[0]
-        prob = model.predict_proba([hist])[0][1]
+def engine_for_version(version: str):
+    """Motor da versão pedida; carrega se não for a do registro."""
+    engine = registry.get()
+    if engine.version == version:
+        return engine
+
+    with _other_engines_lock:
+        engine = _other_engines.get(version)
+        if engine is None:
+            engine = load_and_warm(version)
+            _other_engines[version] = engine
+            # Basta a versão anterior e a nova durante a transição
+            while len(_other_engines) > 2:
+                _other_engines.popitem(last=False)
+        return engine
+
+# Extrator ORB, um por thread (o pool de threads classifica em paralelo)
+_local = threading.local()
+
+
+def _orb():
+    orb = getattr(_local, "orb", None)
+    if orb is None:
+        orb = _local.orb = cv2.ORB_create(nfeatures=500)
+    return orb
+
+
+def decode_max_side(engine=None):
+    """Lado maior na decodificação: o da configuração ou o gravado no modelo."""
+    if settings.CLASSIFIER_MAX_SIDE is not None:
+        return settings.CLASSIFIER_MAX_SIDE or None
+    return (engine or registry.get()).max_side
+
+
+def extract_histogram(image_bytes):
+    """
+    Histograma Bag of Words da imagem (decode reduzido, ORB e kmeans). Retorna None
+    quando a imagem não pode ser lida ou não tem descritores.
+    """
+    return _extract_histogram(image_bytes, registry.get())
+
+
+def _extract_histogram(image_bytes, engine):
+    img = decode_image(image_bytes, decode_max_side(engine))
+
+    if img is None:
+        return None
+
+    kp, des = _orb().detectAndCompute(img, None)
+
+    if des is None or len(des) == 0:
+        return None
+
+    return engine.histogram(des)
+
+
+def extract_histogram_from_path(path, engine=None):
+    """
+    Histograma da imagem gravada em ``path``, lida mapeada do disco, com
+    ``engine`` (padrão: o modelo em uso).
+    """
+    if os.path.getsize(path) == 0:
+        return None
+    return _extract_histogram(np.memmap(path, dtype=np.uint8, mode="r"), engine or registry.get())
+
+
+def model_version() -> str:
+    """Versão do modelo em uso (carrega o modelo se ainda não foi carregado)."""
+    return registry.get().version
+
+
+def predict_batch(histograms, engine=None):
+    """(predição, probabilidade de lixo) para cada histograma, numa chamada só."""
+    return (engine or registry.get()).predict_batch(histograms)
+
+
+def classify_image(image_bytes):
+    try:
+        hist = extract_histogram(image_bytes)
+
+        if hist is None:
+            return 0, 0.0
 
-        return int(pred), float(prob)
+        return predict_batch([hist])[0]
 
     except Exception:
         return 0, 0.0
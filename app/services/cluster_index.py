@@ -0,0 +1,223 @@
+# app/services/cluster_index.py
+"""
+Índice hierárquico em grade para agrupar ocorrências no mapa (no estilo do
+supercluster). Para cada zoom, as coordenadas são projetadas em Web
+Mercator e agregadas em células de ``cell_px`` pixels, com contagem,
+centroide e distribuição de severidade e status.
+
+O índice é carregado do banco no primeiro uso e depois mantido de forma
+incremental pelo OccurrenceService (criação, resolução e exclusão).
+"""
+import math
+import threading
+from collections import Counter
+from typing import Callable, Iterable
+
+MAX_MERCATOR_LAT = 85.05112878
+
+
+class _Cell:
+    __slots__ = ("count", "sum_lat", "sum_lon", "id_sum", "severities", "statuses")
+
+    def __init__(self):
+        self.count = 0
+        self.sum_lat = 0.0
+        self.sum_lon = 0.0
+        # Com count == 1, id_sum é o id da única ocorrência da célula
+        self.id_sum = 0
+        self.severities = Counter()
+        self.statuses = Counter()
+
+
+class ClusterIndex:
+    def __init__(self, max_zoom: int = 16, cell_px: int = 64):
+        self.max_zoom = max_zoom
+        # Células por eixo no zoom z: 2^z tiles de 256px divididos em cell_px
+        self._cells_per_tile = 256 // cell_px
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        # Alterações recebidas enquanto a carga inicial lê o banco
+        self._pending: list[tuple] | None = None
+        # id -> (lat, lon, severity_id, status)
+        self._points: dict[int, tuple[float, float, int, str]] = {}
+        self._levels: list[dict[tuple[int, int], _Cell]] = [
+            {} for _ in range(max_zoom + 1)
+        ]
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def ensure_loaded(self, loader: Callable[[], Iterable[tuple]]):
+        """
+        Carrega o índice com ``loader()``, que deve retornar tuplas
+        (id, lat, lon, severity_id, status). Alterações feitas durante a
+        leitura são reaplicadas ao final, então nada se perde na corrida
+        entre a carga e novas escritas.
+        """
+        if self._loaded:
+            return
+
+        with self._load_lock:
+            if self._loaded:
+                return
+
+            with self._lock:
+                self._pending = []
+
+            points = list(loader())
+
+            with self._lock:
+                self._points.clear()
+                for level in self._levels:
+                    level.clear()
+                for point in points:
+                    self._apply("add", *point)
+                for op in self._pending:
+                    self._apply(*op)
+                self._pending = None
+                self._loaded = True
+
+    def invalidate(self):
+        """Descarta o índice; a próxima consulta recarrega do banco."""
+        with self._lock:
+            self._loaded = False
+
+    def add(self, occ_id: int, lat: float, lon: float, severity_id: int, status: str):
+        self._record("add", occ_id, lat, lon, severity_id, status)
+
+    def remove(self, occ_id: int):
+        self._record("remove", occ_id)
+
+    def update_status(self, occ_id: int, status: str):
+        self._record("status", occ_id, status)
+
+    def _record(self, op: str, *args):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((op, *args))
+            if self._loaded:
+                self._apply(op, *args)
+
+    def _apply(self, op: str, occ_id: int, *args):
+        # Operações idempotentes, pois podem ser reaplicadas após a carga
+        if op == "add":
+            if occ_id in self._points:
+                self._remove(occ_id)
+            self._add(occ_id, *args)
+        elif op == "remove":
+            if occ_id in self._points:
+                self._remove(occ_id)
+        elif op == "status":
+            point = self._points.get(occ_id)
+            if point is not None:
+                lat, lon, severity_id, _ = point
+                self._remove(occ_id)
+                self._add(occ_id, lat, lon, severity_id, args[0])
+
+    def query(
+        self, zoom: int, bbox: tuple[float, float, float, float]
+    ) -> list[dict]:
+        """Clusters do zoom informado cujas células intersectam o bbox."""
+        zoom = max(0, min(zoom, self.max_zoom))
+        min_lon, min_lat, max_lon, max_lat = bbox
+        n = self._axis_cells(zoom)
+
+        # Em Mercator o y cresce para o sul
+        y0 = self._cell(self._mercator_y(max_lat), n)
+        y1 = self._cell(self._mercator_y(min_lat), n)
+        x0 = self._cell(self._mercator_x(min_lon), n)
+        x1 = self._cell(self._mercator_x(max_lon), n)
+        # bbox cruzando o antimeridiano vira dois intervalos em x
+        x_ranges = [(x0, x1)] if min_lon <= max_lon else [(x0, n - 1), (0, x1)]
+
+        with self._lock:
+            level = self._levels[zoom]
+            area = sum(x1 - x0 + 1 for x0, x1 in x_ranges) * (y1 - y0 + 1)
+
+            if area <= len(level):
+                cells = [
+                    level[(x, y)]
+                    for x0, x1 in x_ranges
+                    for x in range(x0, x1 + 1)
+                    for y in range(y0, y1 + 1)
+                    if (x, y) in level
+                ]
+            else:
+                cells = [
+                    cell
+                    for (x, y), cell in level.items()
+                    if y0 <= y <= y1 and any(x0 <= x <= x1 for x0, x1 in x_ranges)
+                ]
+
+            return [self._to_cluster(cell) for cell in cells]
+
+    def _to_cluster(self, cell: _Cell) -> dict:
+        dominant_severity_id = max(
+            cell.severities.items(), key=lambda item: (item[1], item[0])
+        )[0]
+        return {
+            "count": cell.count,
+            "latitude": cell.sum_lat / cell.count,
+            "longitude": cell.sum_lon / cell.count,
+            "occurrence_id": cell.id_sum if cell.count == 1 else None,
+            "dominant_severity_id": dominant_severity_id,
+            "status": dict(cell.statuses),
+        }
+
+    def _add(self, occ_id, lat, lon, severity_id, status):
+        self._points[occ_id] = (lat, lon, severity_id, status)
+        for zoom, key in self._keys(lat, lon):
+            cell = self._levels[zoom].get(key)
+            if cell is None:
+                cell = self._levels[zoom][key] = _Cell()
+            cell.count += 1
+            cell.sum_lat += lat
+            cell.sum_lon += lon
+            cell.id_sum += occ_id
+            cell.severities[severity_id] += 1
+            cell.statuses[status] += 1
+
+    def _remove(self, occ_id):
+        lat, lon, severity_id, status = self._points.pop(occ_id)
+        for zoom, key in self._keys(lat, lon):
+            level = self._levels[zoom]
+            cell = level[key]
+            cell.count -= 1
+            if cell.count == 0:
+                del level[key]
+                continue
+            cell.sum_lat -= lat
+            cell.sum_lon -= lon
+            cell.id_sum -= occ_id
+            cell.severities[severity_id] -= 1
+            if not cell.severities[severity_id]:
+                del cell.severities[severity_id]
+            cell.statuses[status] -= 1
+            if not cell.statuses[status]:
+                del cell.statuses[status]
+
+    def _keys(self, lat: float, lon: float):
+        x = self._mercator_x(lon)
+        y = self._mercator_y(lat)
+        for zoom in range(self.max_zoom + 1):
+            n = self._axis_cells(zoom)
+            yield zoom, (self._cell(x, n), self._cell(y, n))
+
+    def _axis_cells(self, zoom: int) -> int:
+        return (1 << zoom) * self._cells_per_tile
+
+    @staticmethod
+    def _cell(value: float, n: int) -> int:
+        return min(max(int(value * n), 0), n - 1)
+
+    @staticmethod
+    def _mercator_x(lon: float) -> float:
+        return (lon + 180.0) / 360.0
+
+    @staticmethod
+    def _mercator_y(lat: float) -> float:
+        lat = max(min(lat, MAX_MERCATOR_LAT), -MAX_MERCATOR_LAT)
+        sin = math.sin(math.radians(lat))
+        return 0.5 - math.log((1 + sin) / (1 - sin)) / (4 * math.pi)
@@ -0,0 +1,96 @@
+# app/services/image_preprocess.py
+"""
+Decodificação de imagens já na resolução de trabalho.
+
+Fotos de celular chegam com 12MP ou mais, mas o ORB fica limitado a 500
+pontos e as miniaturas têm no máximo 512px. Para JPEG, o libjpeg consegue
+decodificar direto em 1/2, 1/4 ou 1/8 da resolução (IMREAD_REDUCED_*),
+bem mais barato que decodificar tudo e reduzir depois; o ajuste final até
+``max_side`` é feito com INTER_AREA.
+
+Usado pela API e pelo treinamento (machineLearning/train_model.py), para
+que as duas pontas vejam as imagens da mesma forma.
+"""
+import struct
+
+import cv2
+import numpy as np
+
+_REDUCED_FLAGS = {
+    cv2.IMREAD_GRAYSCALE: {
+        8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+        4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+        2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    },
+    cv2.IMREAD_COLOR: {
+        8: cv2.IMREAD_REDUCED_COLOR_8,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+    },
+}
+
+# Marcadores SOF do JPEG que trazem as dimensões (exclui DHT, JPG e DAC)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def decode_image(buffer, max_side: int | None = None, flags: int = cv2.IMREAD_GRAYSCALE):
+    """
+    Decodifica ``buffer`` (bytes, memmap ou array uint8) com o lado maior
+    limitado a ``max_side``. Sem ``max_side``, decodifica em resolução
+    original. Retorna None se a imagem não puder ser lida.
+    """
+    data = np.frombuffer(buffer, np.uint8)
+
+    if not max_side:
+        return cv2.imdecode(data, flags)
+
+    factor = 1
+    size = jpeg_dimensions(data)
+    if size is not None:
+        longest = max(size)
+        # Maior fator que ainda deixa o lado maior >= max_side
+        for candidate in (8, 4, 2):
+            if longest // candidate >= max_side:
+                factor = candidate
+                break
+
+    img = cv2.imdecode(data, _REDUCED_FLAGS[flags][factor] if factor > 1 else flags)
+    if img is None:
+        return None
+
+    return fit_max_side(img, max_side)
+
+
+def fit_max_side(img: np.ndarray, max_side: int) -> np.ndarray:
+    height, width = img.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return img
+    return cv2.resize(
+        img,
+        (max(1, round(width * scale)), max(1, round(height * scale))),
+        interpolation=cv2.INTER_AREA,
+    )
+
+
+def jpeg_dimensions(data: np.ndarray) -> tuple[int, int] | None:
+    """(largura, altura) lidas do cabeçalho JPEG, sem decodificar; None se não for JPEG."""
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+
+    header = memoryview(data)
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Bytes de preenchimento entre segmentos
+            i += 1
+            continue
+        if marker in _JPEG_SOF:
+            height, width = struct.unpack(">HH", header[i + 5 : i + 9])
+            return width, height
+        length = struct.unpack(">H", header[i + 2 : i + 4])[0]
+        i += 2 + length
+    return None
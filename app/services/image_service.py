@@ -0,0 +1,71 @@
+import os
+import tempfile
+
+import cv2
+
+from app.core.config import settings
+from app.services.image_preprocess import decode_image
+
+# Nome da versão -> lado maior em pixels, da maior para a menor
+RENDITIONS = {
+    "medium": settings.IMAGE_MEDIUM_MAX_SIDE,
+    "thumb": settings.IMAGE_THUMB_MAX_SIDE,
+}
+
+
+def rendition_path(original_path: str, size: str) -> str:
+    """Caminho da versão ``size`` ao lado do arquivo original."""
+    if size == "full":
+        return original_path
+    stem, _ = os.path.splitext(original_path)
+    return f"{stem}_{size}.jpg"
+
+
+def generate_renditions(image_bytes: bytes, original_path: str) -> list[str]:
+    """
+    Gera as versões reduzidas (JPEG) de uma imagem a partir dos bytes do
+    upload, decodificando uma única vez e já perto do tamanho médio. Cada
+    versão é reduzida a partir da anterior.
+    """
+    # Nenhuma versão passa do tamanho médio: decodifica já reduzido
+    img = decode_image(image_bytes, max(RENDITIONS.values()), cv2.IMREAD_COLOR)
+    if img is None:
+        return []
+
+    paths = []
+    for size, max_side in RENDITIONS.items():
+        height, width = img.shape[:2]
+        scale = max_side / max(height, width)
+        if scale < 1:
+            img = cv2.resize(
+                img,
+                (max(1, round(width * scale)), max(1, round(height * scale))),
+                interpolation=cv2.INTER_AREA,
+            )
+
+        ok, encoded = cv2.imencode(
+            ".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, settings.IMAGE_RENDITION_JPEG_QUALITY]
+        )
+        if not ok:
+            continue
+
+        path = rendition_path(original_path, size)
+        _write_atomic(path, encoded.tobytes())
+        paths.append(path)
+
+    return paths
+
+
+def _write_atomic(path: str, data: bytes):
+    """
+    Grava num temporário da mesma pasta e publica com rename: uma requisição
+    concorrente (ensure_renditions) nunca serve um arquivo pela metade.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
@@ -0,0 +1,210 @@
+# app/services/image_storage.py
+"""
+Armazenamento de imagens endereçado por conteúdo.
+
+Cada arquivo é gravado uma única vez em ``<raiz>/ab/cd/<sha256><ext>``
+(dois níveis de 256 pastas, para não acumular milhares de arquivos num
+diretório só). Uploads idênticos apontam para o mesmo arquivo, mesmo com
+extensões diferentes no nome enviado (vale a do primeiro), e as versões
+reduzidas ficam ao lado dele, compartilhadas também.
+
+A contagem de referências fica na tabela image_blobs; este módulo só
+cuida do sistema de arquivos.
+"""
+import hashlib
+import os
+import shutil
+import string
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.image_service import RENDITIONS, rendition_path
+
+DEFAULT_EXTENSION = ".jpg"
+
+
+class ImageTooLargeError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class StoredImage:
+    sha256: str
+    path: str
+    size: int
+    # False quando o conteúdo já existia (deduplicado)
+    created: bool
+
+
+@dataclass(frozen=True)
+class IncomingImage:
+    """Upload recebido num arquivo temporário, já com hash e tamanho."""
+
+    path: str
+    sha256: str
+    size: int
+
+    def discard(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class ImageStorage:
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def blob_path(self, sha256: str, extension: str) -> str:
+        return str(self.root / sha256[:2] / sha256[2:4] / f"{sha256}{extension}")
+
+    def receive(self, source, max_bytes: int, chunk_size: int = 64 * 1024) -> IncomingImage:
+        """
+        Copia ``source`` em blocos para um arquivo temporário, calculando o
+        SHA-256 na mesma passada. Interrompe com ImageTooLargeError assim
+        que ``max_bytes`` é ultrapassado, sem ler o resto.
+        """
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix=".upload")
+
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while chunk := source.read(chunk_size):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ImageTooLargeError(max_bytes)
+                    digest.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        return IncomingImage(path=tmp_path, sha256=digest.hexdigest(), size=size)
+
+    def store_file(self, incoming: IncomingImage, extension: str | None = None) -> StoredImage:
+        """
+        Publica o upload no caminho do hash, sem reescrever conteúdo já
+        existente. O temporário continua válido até ``discard()``.
+        """
+        path = self.find_original(incoming.sha256) or self.blob_path(
+            incoming.sha256, normalize_extension(extension)
+        )
+        created = self._publish(incoming.path, path)
+        return StoredImage(
+            sha256=incoming.sha256, path=path, size=incoming.size, created=created
+        )
+
+    def find_original(self, sha256: str) -> str | None:
+        """Arquivo original já gravado para o conteúdo, com qualquer extensão."""
+        folder = self.root / sha256[:2] / sha256[2:4]
+        try:
+            names = os.listdir(folder)
+        except FileNotFoundError:
+            return None
+        for name in names:
+            # Versões reduzidas têm sufixo (_thumb) e não casam com o hash puro
+            if os.path.splitext(name)[0] == sha256:
+                return str(folder / name)
+        return None
+
+    def discard_copy(self, stored: StoredImage, registered_path: str):
+        """
+        Apaga o original gravado por este upload quando o registro do banco
+        aponta para outro arquivo do mesmo conteúdo (corrida entre uploads
+        iguais com extensões diferentes). As versões reduzidas são comuns.
+        """
+        if stored.created and stored.path != registered_path:
+            try:
+                os.remove(stored.path)
+            except FileNotFoundError:
+                pass
+
+    def ensure(self, path: str, source_path: str):
+        """
+        Republica o arquivo se ele sumiu entre o ``store_file`` e o commit
+        (por exemplo, removido pela exclusão da última ocorrência que o usava).
+        """
+        if not os.path.exists(path):
+            self._publish(source_path, path)
+
+    def delete(self, path: str):
+        """Remove o arquivo e suas versões reduzidas."""
+        for candidate in [path] + [rendition_path(path, size) for size in RENDITIONS]:
+            try:
+                os.remove(candidate)
+            except FileNotFoundError:
+                pass
+
+    def iter_files(self):
+        """Todos os arquivos sob a raiz (originais e versões reduzidas)."""
+        if not self.root.exists():
+            return
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                yield os.path.join(dirpath, filename)
+
+    def _publish(self, source_path: str, path: str) -> bool:
+        """
+        Hard link do temporário para o destino: atômico, leitores nunca
+        veem um arquivo pela metade e dois uploads iguais não se atrapalham.
+        Retorna False se o destino já existia.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.link(source_path, path)
+            return True
+        except FileExistsError:
+            return False
+        except OSError:
+            # Sistema de arquivos sem hard link: cópia + rename
+            if os.path.exists(path):
+                return False
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            os.close(fd)
+            try:
+                shutil.copyfile(source_path, tmp_path)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            return True
+
+
+def map_upload(incoming: IncomingImage) -> np.ndarray:
+    """Bytes do upload como array somente leitura, mapeado do disco."""
+    if incoming.size == 0:
+        return np.empty(0, dtype=np.uint8)
+    return np.memmap(incoming.path, dtype=np.uint8, mode="r", shape=(incoming.size,))
+
+
+def normalize_extension(extension: str | None) -> str:
+    extension = (extension or "").lower()
+    if extension == ".jpeg":
+        return ".jpg"
+    if not extension.startswith(".") or len(extension) > 6:
+        return DEFAULT_EXTENSION
+    return extension
+
+
+def parse_blob_name(path: str) -> tuple[str, str | None] | None:
+    """
+    (sha256, versão) a partir do nome do arquivo; versão é None para o
+    original. Retorna None para nomes fora do padrão.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    sha256, _, size = stem.partition("_")
+    if len(sha256) != 64 or not set(sha256) <= set(string.hexdigits):
+        return None
+    if size and size not in RENDITIONS:
+        return None
+    return sha256, size or None
+
+
+image_storage = ImageStorage(settings.IMAGE_STORAGE_DIR)
@@ -0,0 +1,193 @@
+# app/services/ingestion_worker.py
+"""
+Validação em segundo plano das ocorrências enviadas no modo assíncrono.
+
+A fila é a tabela ``ingestion_jobs``, então nada se perde num reinício:
+jobs pendentes continuam na fila e os que ficaram "processando" voltam
+após ``stale_seconds``. Uma falha devolve o job à fila com espera
+exponencial (``retry_backoff_seconds`` * 2^n); esgotadas as tentativas, o
+job termina em "erro" e a ocorrência, que nunca foi validada, é excluída.
+Cada worker do uvicorn roda um consumidor; a reserva com SKIP LOCKED
+impede que dois processos peguem o mesmo job.
+
+Os jobs de uma leva são classificados concorrentemente, passando pelo
+mesmo pool, fila de micro-lotes e cache de resultados dos uploads
+síncronos. Novos envios acordam o consumidor na hora (``notify``); a
+consulta periódica cobre jobs criados por outros processos.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.database.session import SessionLocal
+from app.repositories.ingestion_job_repository import IngestionJobRepository
+from app.repositories.occurrence_repository import OccurrenceRepository
+from app.services.occurrence_service import OccurrenceService
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionWorker:
+    def __init__(
+        self,
+        batch_size: int = 16,
+        poll_seconds: float = 2.0,
+        stale_seconds: float = 300.0,
+        max_attempts: int = 3,
+        retry_backoff_seconds: float = 10.0,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.poll_seconds = poll_seconds
+        self.stale_seconds = stale_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._task: asyncio.Task | None = None
+        self._wake: asyncio.Event | None = None
+        self.accepted = 0
+        self.rejected = 0
+        self.failed = 0
+        self.retried = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def notify(self):
+        """Avisa que há job novo (chamado no event loop, após o enqueue)."""
+        if self._wake is not None:
+            self._wake.set()
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "retried": self.retried,
+        }
+
+    async def _run(self):
+        recovered = await run_in_threadpool(self._with_jobs, IngestionJobRepository.enqueue_orphans)
+        if recovered:
+            print(f"Ingestão: {recovered} ocorrência(s) em validação sem job reenfileirada(s)")
+        discarded = await run_in_threadpool(self._discard_failed)
+        if discarded:
+            print(f"Ingestão: {discarded} ocorrência(s) com validação em erro excluída(s)")
+
+        while True:
+            # Limpa antes de consultar: um notify durante a consulta não se perde
+            self._wake.clear()
+            try:
+                jobs = await run_in_threadpool(self._claim)
+            except Exception:
+                logger.exception("Ingestão: erro ao buscar jobs")
+                jobs = []
+
+            if jobs:
+                await asyncio.gather(*(self._process(*job) for job in jobs))
+                continue
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def _claim(self):
+        stale_before = datetime.utcnow() - timedelta(seconds=self.stale_seconds)
+        return self._with_jobs(IngestionJobRepository.claim, self.batch_size, stale_before)
+
+    @staticmethod
+    def _discard_failed() -> int:
+        """Exclui ocorrências deixadas em "validando" por jobs que terminaram em erro."""
+        db = SessionLocal()
+        try:
+            service = OccurrenceService(OccurrenceRepository(db))
+            occurrence_ids = IngestionJobRepository(db).failed_unvalidated()
+            for occurrence_id in occurrence_ids:
+                service.discard_unvalidated(occurrence_id)
+            return len(occurrence_ids)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _with_jobs(method, *args):
+        db = SessionLocal()
+        try:
+            return method(IngestionJobRepository(db), *args)
+        finally:
+            db.close()
+
+    async def _process(self, job_id: int, occurrence_id: int, attempt: int):
+        db = SessionLocal()
+        try:
+            service = OccurrenceService(OccurrenceRepository(db))
+            retry_after = None
+            try:
+                status, pred, prob, detail = await service.validate_occurrence(occurrence_id)
+            except Exception as e:
+                await run_in_threadpool(db.rollback)
+                pred, prob, detail = None, None, f"Erro ao processar imagem: {e}"
+                if attempt >= self.max_attempts:
+                    status = "erro"
+                    # Sem validação a ocorrência não pode ficar publicada nem
+                    # presa em "validando": sai junto com a referência à imagem
+                    await run_in_threadpool(service.discard_unvalidated, occurrence_id)
+                else:
+                    # Falhas transitórias (banco, disco) voltam para a fila,
+                    # com espera crescente entre as tentativas
+                    status = "pendente"
+                    retry_after = datetime.utcnow() + timedelta(
+                        seconds=self.retry_backoff_seconds * 2 ** (attempt - 1)
+                    )
+
+            if status == "concluido" and pred is not None:
+                self.accepted += 1
+            elif status == "rejeitado":
+                self.rejected += 1
+            elif status == "erro":
+                self.failed += 1
+            elif status == "pendente":
+                self.retried += 1
+
+            await run_in_threadpool(
+                IngestionJobRepository(db).finish,
+                job_id,
+                status,
+                pred,
+                prob,
+                detail,
+                retry_after,
+            )
+        except Exception:
+            # O job fica "processando" e é retomado após stale_seconds
+            logger.exception("Ingestão: erro ao finalizar o job %s", job_id)
+        finally:
+            await run_in_threadpool(db.close)
+
+
+ingestion_worker = IngestionWorker(
+    batch_size=settings.INGESTION_BATCH_SIZE,
+    poll_seconds=settings.INGESTION_POLL_SECONDS,
+    stale_seconds=settings.INGESTION_STALE_SECONDS,
+    max_attempts=settings.INGESTION_MAX_ATTEMPTS,
+    retry_backoff_seconds=settings.INGESTION_RETRY_BACKOFF_SECONDS,
+)
@@ -0,0 +1,76 @@
+# app/services/model_registry.py
+"""
+Registro do modelo do classificador: carrega no primeiro uso ou no
+startup da API (``load``), roda um aquecimento antes de publicar o modelo
+e permite trocá-lo de forma atômica (``swap``).
+
+Importar a aplicação não carrega nada; quem só precisa dos modelos do
+banco (Alembic, workers de autenticação) não paga a desserialização.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        loader: Callable[[], Any],
+        warm_up: Callable[[Any], None] | None = None,
+    ):
+        self._loader = loader
+        self._warm_up = warm_up
+        self._model = None
+        self._lock = threading.Lock()
+        self.load_seconds: float | None = None
+        self.warm_up_seconds: float | None = None
+        self.loaded_at: datetime | None = None
+        self.swaps = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def get(self):
+        model = self._model
+        if model is None:
+            model = self.load()
+        return model
+
+    def load(self):
+        """Carrega e aquece o modelo, uma vez só mesmo com chamadas concorrentes."""
+        with self._lock:
+            if self._model is None:
+                start = time.perf_counter()
+                model = self._loader()
+                loaded = time.perf_counter()
+                if self._warm_up is not None:
+                    self._warm_up(model)
+                self.load_seconds = loaded - start
+                self.warm_up_seconds = time.perf_counter() - loaded
+                self.loaded_at = datetime.utcnow()
+                # Só publica depois do aquecimento
+                self._model = model
+            return self._model
+
+    def swap(self, model):
+        """Publica ``model`` no lugar do atual e retorna o anterior."""
+        with self._lock:
+            previous, self._model = self._model, model
+            self.loaded_at = datetime.utcnow()
+            self.swaps += 1
+            return previous
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "model": type(self._model).__name__ if self._model is not None else None,
+            "version": getattr(self._model, "version", None),
+            "load_seconds": round(self.load_seconds, 4) if self.load_seconds is not None else None,
+            "warm_up_seconds": (
+                round(self.warm_up_seconds, 4) if self.warm_up_seconds is not None else None
+            ),
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "swaps": self.swaps,
+        }
@@ -0,0 +1,70 @@
+# app/services/model_store.py
+"""
+Diretórios versionados do classificador.
+
+    machineLearning/models/<versão>/   centers.npy, coef.npy, params.json,
+                                       model.pkl, bow.pkl
+    machineLearning/models/CURRENT     nome da versão em uso
+
+Um treinamento grava numa versão nova e só no fim aponta CURRENT para
+ela (troca atômica do arquivo); a API percebe a mudança e troca o modelo
+sem reiniciar. Sem dependências da aplicação: é usado também pelos
+scripts de treinamento.
+"""
+import os
+import re
+from datetime import datetime
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+MODELS_DIR = os.path.join(PROJECT_ROOT, "machineLearning", "models")
+CURRENT_POINTER = os.path.join(MODELS_DIR, "CURRENT")
+
+_VERSION_NAME = re.compile(r"[A-Za-z0-9_][A-Za-z0-9_.-]*")
+
+# Probabilidade mínima de lixo para aceitar a ocorrência
+MIN_PROB = 0.55
+
+
+def model_version_dir(version: str) -> str:
+    if not _VERSION_NAME.fullmatch(version):
+        raise ValueError(f"Nome de versão inválido: {version}")
+    return os.path.join(MODELS_DIR, version)
+
+
+def new_model_version() -> str:
+    """Nome para uma versão nova, ordenável pela data do treinamento."""
+    return datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+
+
+def current_model_version() -> str | None:
+    """Versão apontada por CURRENT (None sem modelos versionados)."""
+    try:
+        with open(CURRENT_POINTER, encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def list_model_versions() -> list[str]:
+    if not os.path.isdir(MODELS_DIR):
+        return []
+    return sorted(
+        entry.name
+        for entry in os.scandir(MODELS_DIR)
+        if entry.is_dir() and _VERSION_NAME.fullmatch(entry.name)
+    )
+
+
+def set_current_model_version(version: str):
+    """Aponta CURRENT para ``version`` com troca atômica do arquivo."""
+    if not os.path.isdir(model_version_dir(version)):
+        raise FileNotFoundError(f"Versão do modelo não encontrada: {version}")
+    tmp = f"{CURRENT_POINTER}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+    os.replace(tmp, CURRENT_POINTER)
+
+
+def is_trash(pred: int, prob: float) -> bool:
+    """Regra de aceitação da API; os scripts de treinamento avaliam com ela."""
+    return pred != 0 and prob >= MIN_PROB
@@ -0,0 +1,182 @@
+# app/services/numpy_classifier.py
+"""
+Inferência do Bag of Words ORB + classificador linear usando só NumPy.
+
+Carrega o artefato exportado por ``machineLearning/export_numpy_model.py``:
+
+- ``centers.npy``: centros do KMeans (palavras visuais);
+- ``coef.npy``: coeficientes do SVC linear (ou da regressão logística do
+  treinamento incremental);
+- ``params.json``: intercepto, parâmetros de Platt (probA/probB), classes,
+  a convenção de sinal/coluna validada contra o ``predict_proba`` do
+  scikit-learn, o ``link`` da probabilidade e o ``max_side`` usado ao
+  decodificar no treinamento.
+
+Com ``link="platt"`` (SVC) a probabilidade reproduz o libsvm: sigmoide de
+Platt seguida do acoplamento iterativo de pares, que para duas classes
+para com tolerância 0.005/k e por isso não é exatamente a sigmoide. Com
+``link="logistic"`` (SGDClassifier com log_loss) é a sigmoide da decisão.
+"""
+import json
+import os
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# Constantes do libsvm (svm.cpp: multiclass_probability / predict_probability)
+_MIN_PROB = 1e-7
+_COUPLING_MAX_ITER = 100
+_COUPLING_EPS = 0.005 / 2
+
+
+def stored_max_side(directory: str) -> int | None:
+    """``max_side`` do treinamento gravado no params.json de ``directory`` (None sem artefato)."""
+    try:
+        with open(os.path.join(directory, "params.json"), encoding="utf-8") as f:
+            return json.load(f).get("max_side")
+    except FileNotFoundError:
+        return None
+
+
+class NumpyBowClassifier:
+    def __init__(
+        self,
+        centers: np.ndarray,
+        coef: np.ndarray,
+        intercept: float,
+        prob_a: float,
+        prob_b: float,
+        classes: list[int],
+        decision_sign: int,
+        proba_column: int,
+        max_side: int | None = None,
+        link: str = "platt",
+    ):
+        self.centers = np.ascontiguousarray(centers, dtype=np.float64)
+        # ||c||² é constante: só o produto x·c muda entre imagens
+        self._centers_sq = (self.centers ** 2).sum(axis=1)
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64).ravel()
+        self.intercept = float(intercept)
+        self.prob_a = float(prob_a)
+        self.prob_b = float(prob_b)
+        self.classes = np.asarray(classes)
+        self.decision_sign = decision_sign
+        self.proba_column = proba_column
+        if link not in ("platt", "logistic"):
+            raise ValueError(f"link desconhecido: {link}")
+        self.link = link
+        # Lado maior das imagens no treinamento (None = resolução original)
+        self.max_side = max_side
+        # Identificação do artefato, definida por quem carrega o modelo
+        self.version: str | None = None
+
+    @property
+    def n_clusters(self) -> int:
+        return len(self.centers)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: str | None = None) -> "NumpyBowClassifier":
+        with open(os.path.join(directory, "params.json"), encoding="utf-8") as f:
+            params = json.load(f)
+        if params.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Formato de modelo não suportado: {params.get('format_version')}")
+
+        return cls(
+            centers=np.load(os.path.join(directory, "centers.npy"), mmap_mode=mmap_mode),
+            coef=np.load(os.path.join(directory, "coef.npy"), mmap_mode=mmap_mode),
+            intercept=params["intercept"],
+            prob_a=params["prob_a"],
+            prob_b=params["prob_b"],
+            classes=params["classes"],
+            decision_sign=params["decision_sign"],
+            proba_column=params["proba_column"],
+            max_side=params.get("max_side"),
+            link=params.get("link", "platt"),
+        )
+
+    def save(self, directory: str, **extra):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "centers.npy"), self.centers)
+        np.save(os.path.join(directory, "coef.npy"), self.coef)
+        params = {
+            "format_version": FORMAT_VERSION,
+            "intercept": self.intercept,
+            "prob_a": self.prob_a,
+            "prob_b": self.prob_b,
+            "classes": self.classes.tolist(),
+            "decision_sign": self.decision_sign,
+            "proba_column": self.proba_column,
+            "max_side": self.max_side,
+            "link": self.link,
+            **extra,
+        }
+        with open(os.path.join(directory, "params.json"), "w", encoding="utf-8") as f:
+            json.dump(params, f, indent=2)
+
+    def assign(self, descriptors: np.ndarray) -> np.ndarray:
+        """Índice do centro mais próximo (euclidiano) de cada descritor."""
+        x = descriptors.astype(np.float64, copy=False)
+        # argmin ||x - c||² = argmin (||c||² - 2 x·c)
+        return np.argmin(self._centers_sq - 2.0 * (x @ self.centers.T), axis=1)
+
+    def histogram(self, descriptors: np.ndarray) -> np.ndarray:
+        return np.bincount(self.assign(descriptors), minlength=self.n_clusters).astype(
+            np.float32
+        )
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+    def predict_batch(self, histograms) -> list[tuple[int, float]]:
+        decision = self.decision_function(np.vstack(histograms))
+        preds = self.classes[(decision > 0).astype(int)]
+        if self.link == "logistic":
+            probs = _sigmoid(self.decision_sign * decision)
+            if self.proba_column == 0:
+                probs = 1 - probs
+        else:
+            probs = self._platt_coupled(decision)[:, self.proba_column]
+        return [(int(pred), float(prob)) for pred, prob in zip(preds, probs)]
+
+    def _platt_coupled(self, decision: np.ndarray) -> np.ndarray:
+        # Sigmoide de Platt na forma numericamente estável do libsvm
+        z = self.decision_sign * decision * self.prob_a + self.prob_b
+        e = np.exp(-np.abs(z))
+        r01 = np.where(z >= 0, e / (1 + e), 1 / (1 + e))
+        return couple_binary(np.clip(r01, _MIN_PROB, 1 - _MIN_PROB))
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    e = np.exp(-np.abs(z))
+    return np.where(z >= 0, 1 / (1 + e), e / (1 + e))
+
+
+def couple_binary(r01: np.ndarray) -> np.ndarray:
+    """
+    Acoplamento de pares do libsvm para k = 2, vetorizado por linha. Cada
+    linha para quando atinge a tolerância, como no laço original.
+    """
+    r10 = 1 - r01
+    # Q simétrica 2x2: diagonais q00, q11 e fora da diagonal q01
+    q = (r10 * r10, r01 * r01)
+    q01 = -r10 * r01
+
+    p = [np.full(len(r01), 0.5), np.full(len(r01), 0.5)]
+    active = np.ones(len(r01), dtype=bool)
+
+    for _ in range(_COUPLING_MAX_ITER):
+        qp = [q[0] * p[0] + q01 * p[1], q01 * p[0] + q[1] * p[1]]
+        pqp = p[0] * qp[0] + p[1] * qp[1]
+        active &= np.maximum(np.abs(qp[0] - pqp), np.abs(qp[1] - pqp)) >= _COUPLING_EPS
+        if not active.any():
+            break
+        for t in range(2):
+            diff = np.where(active, (pqp - qp[t]) / q[t], 0.0)
+            p[t] = p[t] + diff
+            pqp = (pqp + diff * (diff * q[t] + 2 * qp[t])) / (1 + diff) / (1 + diff)
+            row = (q[0], q01) if t == 0 else (q01, q[1])
+            qp = [(qp[j] + diff * row[j]) / (1 + diff) for j in range(2)]
+            p = [p[j] / (1 + diff) for j in range(2)]
+
+    return np.column_stack(p)
@@ -1,59 +1,273 @@
-from app.schemas.occurrence import OccurrenceCreate
+from app.schemas.occurrence import OccurrenceCreate, OccurrenceFilter
 from app.repositories.occurrence_repository import OccurrenceRepository
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
+import logging
 import os
-from pathlib import Path
 import base64
-from fastapi.responses import Response
-from app.services.classifier_service import classify_image
+import orjson
+from fastapi.responses import FileResponse, Response
+import numpy as np
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.http_cache import etag_matches
+from app.models.ingestion_job import IngestionJob
+from app.repositories.classification_result_repository import (
+    ClassificationResultRepository,
+)
+from app.repositories.ingestion_job_repository import IngestionJobRepository
+from app.services.classification_cache import ClassificationCache
+from app.services.classifier_pool import classify_file
+from app.services.classifier_service import model_version
+from app.services.cluster_index import ClusterIndex
+from app.services.image_service import RENDITIONS, generate_renditions, rendition_path
+from app.services.image_storage import (
+    ImageTooLargeError,
+    IncomingImage,
+    image_storage,
+    map_upload,
+)
+from app.services.model_store import is_trash
+from app.services.vector_tile import (
+    EXTENT,
+    encode_point_layer,
+    tile_bbox,
+    tiles_containing,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Determina o MIME type baseado na extensão do arquivo
+MIME_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".bmp": "image/bmp",
+    ".webp": "image/webp",
+}
+
+
+def guess_mime_type(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    return MIME_TYPES.get(ext, "image/jpeg")
+
+
+def image_file_response(path: str, media_type: str, headers: dict[str, str]) -> Response:
+    """
+    Arquivos que cabem num bloco (miniaturas, em geral) vão numa leitura
+    só; os maiores seguem por FileResponse, em blocos e com suporte a
+    Range. Servidores com a extensão pathsend enviam o arquivo sem passar
+    pelo Python.
+    """
+    if os.path.getsize(path) <= settings.IMAGE_SERVE_CHUNK_BYTES:
+        with open(path, "rb") as f:
+            return Response(content=f.read(), media_type=media_type, headers=headers)
+
+    response = FileResponse(path, media_type=media_type, headers=headers)
+    # O padrão de 64KB faz uma ida à thread por bloco
+    response.chunk_size = settings.IMAGE_SERVE_CHUNK_BYTES
+    return response
+
+
+def ensure_renditions(image_path: str):
+    """Gera miniatura e versão média a partir do arquivo, se ainda não existem."""
+    if all(os.path.exists(rendition_path(image_path, size)) for size in RENDITIONS):
+        return
+    try:
+        generate_renditions(np.fromfile(image_path, dtype=np.uint8), image_path)
+    except Exception:
+        logger.exception("Erro ao gerar miniaturas de %s", image_path)
+
+
+NO_TRASH_DETECTED = (
+    "Nenhum foco de lixo foi detectado na imagem. Envie uma foto válida da ocorrência."
+)
+
+
+# Índice de clusters compartilhado pelas requisições deste processo
+cluster_index = ClusterIndex(
+    max_zoom=settings.CLUSTER_MAX_ZOOM, cell_px=settings.CLUSTER_CELL_PX
+)
+
+# Tiles MVT já codificados, chave (z, x, y)
+tile_cache = LRUCache(
+    max_items=settings.TILE_CACHE_MAX_ITEMS, max_bytes=settings.TILE_CACHE_MAX_BYTES
+)
+
+# Features GeoJSON já serializadas: id -> (change_seq, bytes)
+feature_cache = LRUCache(
+    max_bytes=settings.FEATURE_CACHE_MAX_BYTES, sizeof=lambda entry: len(entry[1])
+)
+
+# Resultado do classificador por (SHA-256 da imagem, versão do modelo)
+classification_cache = ClassificationCache(max_items=settings.CLASSIFICATION_CACHE_MAX_ITEMS)
 
 
 class OccurrenceService:
     def __init__(self, repository: OccurrenceRepository):
         self.repository = repository
 
-    def create_occurrence(
+    async def create_occurrence(
         self, user_id: int, data: dict, image: UploadFile | None = None
     ):
+        """
+        Cria a ocorrência a partir do upload sem bloquear o event loop: a
+        cópia do arquivo, a gravação e o banco rodam no threadpool, e a
+        classificação no pool do classificador.
+        """
+        incoming = await self._receive_image(image)
+
+        try:
+            try:
+                pred, prob, version = await self._classify(incoming.path, incoming.sha256)
+            except Exception as e:
+                # falha na leitura/classificação
+                raise HTTPException(status_code=400, detail=f"Erro ao processar imagem: {str(e)}")
+
+            if not is_trash(pred, prob):
+                raise HTTPException(status_code=400, detail=NO_TRASH_DETECTED)
+
+            # Valida via Pydantic
+            validated = OccurrenceCreate(**data)
+
+            return await run_in_threadpool(
+                self._save_occurrence,
+                user_id,
+                validated,
+                image.filename,
+                incoming,
+                model_version=version,
+                model_score=prob,
+            )
+        finally:
+            incoming.discard()
+
+    async def submit_occurrence(
+        self, user_id: int, data: dict, image: UploadFile | None = None
+    ) -> IngestionJob:
+        """
+        Modo assíncrono: grava a ocorrência como "validando" sem esperar o
+        classificador e enfileira a validação. Retorna o job, cuja URL de
+        status o cliente acompanha.
+        """
+        incoming = await self._receive_image(image)
+
+        try:
+            validated = OccurrenceCreate(**{**data, "status": "validando"})
+            # Miniaturas também ficam para a validação: o upload só grava
+            occurrence = await run_in_threadpool(
+                self._save_occurrence, user_id, validated, image.filename, incoming, False
+            )
+        finally:
+            incoming.discard()
+
+        return await run_in_threadpool(
+            IngestionJobRepository(self.repository.db).enqueue, occurrence.id, user_id
+        )
+
+    async def validate_occurrence(
+        self, occurrence_id: int
+    ) -> tuple[str, int | None, float | None, str | None]:
+        """
+        Classifica uma ocorrência "validando": promove a "pendente" ou a
+        exclui se não houver lixo na imagem. Retorna (status do job,
+        predição, probabilidade, detalhe).
+        """
+        occurrence = await run_in_threadpool(self.repository.get_by_id, occurrence_id)
+        if occurrence is None or occurrence.status != "validando":
+            return "concluido", None, None, "Ocorrência não está mais em validação."
+
+        pred, prob, version = await self._classify(occurrence.image_path, occurrence.image_sha256)
+
+        if is_trash(pred, prob):
+            await run_in_threadpool(ensure_renditions, occurrence.image_path)
+            await run_in_threadpool(
+                self.update_occurrence_status, occurrence_id, "pendente", version, prob
+            )
+            return "concluido", pred, prob, None
+
+        await run_in_threadpool(self.delete_occurrence, occurrence_id)
+        return "rejeitado", pred, prob, NO_TRASH_DETECTED
+
+    async def _receive_image(self, image: UploadFile | None) -> IncomingImage:
        # se não enviar imagem → rejeitar (ou permitir, conforme sua regra)
         if not image:
             raise HTTPException(status_code=400, detail="Imagem obrigatória para detecção de lixo.")
 
-        # lê bytes da imagem para classificar
-        img_bytes = image.file.read()
-
+        # Copia o upload em blocos para um temporário, calculando o hash na
+        # mesma passada e parando assim que o limite é ultrapassado
         try:
-            pred, prob = classify_image(img_bytes)
-        except Exception as e:
-            # falha na leitura/classificação
-            raise HTTPException(status_code=400, detail=f"Erro ao processar imagem: {str(e)}")
-
-        # opcional: threshold mínimo de confiança
-        MIN_PROB = 0.55
-        if pred == 0 or prob < MIN_PROB:
+            return await run_in_threadpool(
+                image_storage.receive,
+                image.file,
+                settings.UPLOAD_MAX_IMAGE_BYTES,
+                settings.UPLOAD_CHUNK_BYTES,
+            )
+        except ImageTooLargeError:
             raise HTTPException(
                 status_code=400,
-                detail="Nenhum foco de lixo foi detectado na imagem. Envie uma foto válida da ocorrência."
+                detail=f"Arquivo muito grande. Tamanho máximo: "
+                f"{settings.UPLOAD_MAX_IMAGE_BYTES // (1024 * 1024)}MB",
             )
 
-        # Valida via Pydantic
-        validated = OccurrenceCreate(**data)
+    async def _classify(self, path: str, sha256: str | None) -> tuple[int, float, str]:
+        """
+        (predição, probabilidade, versão do modelo) da imagem, reaproveitando
+        o resultado de um envio anterior do mesmo conteúdo com a mesma versão.
+        """
+        if sha256 is None:
+            result = await classify_file(path)
+            return result.prediction, result.probability, result.model_version
 
-        image_path = None
+        store = (
+            ClassificationResultRepository(self.repository.db)
+            if settings.CLASSIFICATION_CACHE_PERSIST
+            else None
+        )
+        version, cached = await run_in_threadpool(self._cached_classification, sha256, store)
+        if cached is not None:
+            return (*cached, version)
+
+        # A versão que vale é a usada na classificação: o modelo pode ter
+        # sido trocado depois da consulta ao cache
+        pred, prob, cpu_seconds, version = await classify_file(path)
 
-        if image:
-            upload_dir = Path("uploads/occurrences")
-            upload_dir.mkdir(parents=True, exist_ok=True)
+        if store is None:
+            classification_cache.set(sha256, version, pred, prob, cpu_seconds)
+        else:
+            await run_in_threadpool(
+                classification_cache.set, sha256, version, pred, prob, cpu_seconds, store
+            )
+        return pred, prob, version
 
-            file_extension = os.path.splitext(image.filename)[1]
-            filename = f"{user_id}_{validated.name}_{validated.latitude}_{validated.longitude}{file_extension}"
-            file_path = upload_dir / filename
+    @staticmethod
+    def _cached_classification(sha256: str, store: ClassificationResultRepository | None):
+        version = model_version()
+        return version, classification_cache.get(sha256, version, store)
 
-            # SALVA USANDO OS MESMOS BYTES, NÃO LENDO O ARQUIVO DE NOVO
-            with open(file_path, "wb") as f:
-                f.write(img_bytes)
+    def _save_occurrence(
+        self,
+        user_id: int,
+        validated: OccurrenceCreate,
+        filename: str | None,
+        incoming: IncomingImage,
+        renditions: bool = True,
+        model_version: str | None = None,
+        model_score: float | None = None,
+    ):
+        # Conteúdo endereçado por hash: uploads repetidos reaproveitam o
+        # mesmo arquivo e as mesmas miniaturas
+        stored = image_storage.store_file(incoming, os.path.splitext(filename or "")[1])
 
-            image_path = str(file_path)
+        if stored.created and renditions:
+            # Miniatura e versão média, geradas uma única vez por conteúdo,
+            # lendo o temporário mapeado em memória
+            try:
+                generate_renditions(map_upload(incoming), stored.path)
+            except Exception:
+                logger.exception("Erro ao gerar miniaturas de %s", stored.path)
 
         # Cria a ocorrência no banco
         occurrence = self.repository.create(
@@ -64,117 +278,423 @@ class OccurrenceService:
             severity_id=validated.severity_id,
             latitude=validated.latitude,
             longitude=validated.longitude,
-            image_path=image_path,
+            image_path=stored.path,
             status=validated.status,
+            image_sha256=stored.sha256,
+            image_size=stored.size,
+            model_version=model_version,
+            model_score=model_score,
         )
 
+        # Se o registro aponta para outro arquivo do mesmo conteúdo, a cópia
+        # deste upload sai e vale o arquivo registrado
+        image_storage.discard_copy(stored, occurrence.image_path)
+        image_storage.ensure(occurrence.image_path, incoming.path)
+
+        self._sync_map_indexes("create", occurrence)
+
         return occurrence
 
-    def list_occurrences_geojson(self):
-        occurrences = self.repository.get_all_with_user()
+    def list_occurrences_geojson(
+        self, filters: OccurrenceFilter, include_images: bool = False
+    ) -> bytes:
+        """
+        FeatureCollection já serializada. Sem imagens inline, cada Feature
+        vem do cache de fragmentos e a resposta é montada por concatenação.
+        """
+        if include_images:
+            # Página menor quando as imagens vêm embutidas no JSON
+            filters = filters.model_copy(
+                update={
+                    "limit": min(filters.limit, settings.GEOJSON_INLINE_MAX_FEATURES)
+                }
+            )
+
+        occurrences = self.repository.list_filtered(filters)
+
+        # O repositório traz uma linha a mais para sabermos se há próxima página
+        has_more = len(occurrences) > filters.limit
+        occurrences = occurrences[: filters.limit]
+
+        if include_images:
+            features = [orjson.dumps(self._to_feature(occ, True)) for occ in occurrences]
+        else:
+            features = [self._feature_fragment(occ) for occ in occurrences]
+
+        next_after_id = occurrences[-1].id if has_more else None
+
+        return b"".join(
+            [
+                b'{"type":"FeatureCollection","features":[',
+                b",".join(features),
+                b'],"next_after_id":',
+                orjson.dumps(next_after_id),
+                b"}",
+            ]
+        )
+
+    def _feature_fragment(self, occ) -> bytes:
+        """Feature serializada, reaproveitada enquanto change_seq não mudar."""
+        if occ.change_seq is None:
+            return orjson.dumps(self._to_feature(occ))
+
+        entry = feature_cache.get(
+            occ.id, is_fresh=lambda cached: cached[0] == occ.change_seq
+        )
+        if entry is not None:
+            return entry[1]
+
+        fragment = orjson.dumps(self._to_feature(occ))
+        feature_cache.set(occ.id, (occ.change_seq, fragment))
+        return fragment
+
+    def list_nearby_geojson(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int,
+        radius_m: float | None = None,
+    ):
+        """
+        Ocorrências próximas ao ponto, da mais próxima para a mais distante.
+        Com ``radius_m`` retorna até ``k`` dentro do raio; sem ele, os ``k``
+        vizinhos mais próximos até ``NEAR_MAX_RADIUS_M``.
+        """
+        if radius_m is not None:
+            results = self.repository.find_within_radius(
+                latitude, longitude, radius_m, limit=k
+            )
+        else:
+            results = self.repository.find_nearest(
+                latitude, longitude, k, max_radius_m=settings.NEAR_MAX_RADIUS_M
+            )
 
         features = []
-        for occ in occurrences:
-            # Lê a imagem do arquivo se existir e converte para base64
-            image_binary = None
-            image_mime_type = None
-
-            if occ.image_path and os.path.exists(occ.image_path):
-                try:
-                    with open(occ.image_path, "rb") as f:
-                        image_content = f.read()
-                    image_binary = base64.b64encode(image_content).decode("utf-8")
-
-                    # Determina o MIME type baseado na extensão do arquivo
-                    ext = os.path.splitext(occ.image_path)[1].lower()
-                    mime_types = {
-                        ".jpg": "image/jpeg",
-                        ".jpeg": "image/jpeg",
-                        ".png": "image/png",
-                        ".gif": "image/gif",
-                        ".bmp": "image/bmp",
-                        ".webp": "image/webp",
-                    }
-                    image_mime_type = mime_types.get(ext, "image/jpeg")
-
-                except Exception as e:
-                    print(f"Erro ao ler imagem: {e}")
-
-            features.append(
-                {
-                    "type": "Feature",
-                    "geometry": {
-                        "type": "Point",
-                        "coordinates": [occ.longitude, occ.latitude],
-                    },
-                    "properties": {
-                        "id": occ.id,
-                        "name": occ.name,
-                        "category": occ.category,
-                        "description": occ.description,
-                        "severity": {
-                            "id": occ.severity.id,
-                            "code": occ.severity.code,
-                            "name": occ.severity.name,
-                            "color": occ.severity.color,
-                        },
-                        "status": occ.status,
-                        "image_path": occ.image_path,
-                        "image_binary": image_binary,  # Binário da imagem em base64
-                        "image_mime_type": image_mime_type,  # Tipo MIME para exibição
-                        "created_at": occ.created_at.isoformat(),
-                        "user": {
-                            "id": occ.user.id,
-                            "username": occ.user.username,
-                        },
+        for occ, distance in results:
+            feature = self._to_feature(occ)
+            feature["properties"]["distance_m"] = round(distance, 1)
+            features.append(feature)
+
+        return {"type": "FeatureCollection", "features": features}
+
+    def list_changes(self, since: int, limit: int):
+        """
+        Alterações (inserções, atualizações e exclusões) com sequência maior
+        que ``since``. O cliente repete a chamada com ``next_since`` enquanto
+        ``has_more`` for verdadeiro; ``since=0`` equivale a um snapshot
+        completo.
+        """
+        upserts, deletes = self.repository.list_changes(since, limit)
+
+        changes = sorted(
+            [(occ.change_seq, "upsert", occ) for occ in upserts]
+            + [(tomb.change_seq, "delete", tomb) for tomb in deletes],
+            key=lambda change: change[0],
+        )
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        upserted = []
+        deleted = []
+        for seq, kind, item in changes:
+            if kind == "upsert":
+                feature = self._to_feature(item)
+                feature["properties"]["change_seq"] = seq
+                feature["properties"]["updated_at"] = (
+                    item.updated_at.isoformat() if item.updated_at else None
+                )
+                upserted.append(feature)
+            else:
+                deleted.append({"id": item.occurrence_id, "change_seq": seq})
+
+        return {
+            "since": since,
+            "next_since": changes[-1][0] if changes else since,
+            "has_more": has_more,
+            "upserts": {"type": "FeatureCollection", "features": upserted},
+            "deletes": deleted,
+        }
+
+    def list_clusters(self, zoom: int, bbox: tuple[float, float, float, float]):
+        """Clusters pré-agregados do viewport para o zoom informado."""
+        cluster_index.ensure_loaded(self.repository.iter_map_points)
+
+        features = [
+            {
+                "type": "Feature",
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [cluster["longitude"], cluster["latitude"]],
+                },
+                "properties": {
+                    "cluster": cluster["count"] > 1,
+                    "count": cluster["count"],
+                    "occurrence_id": cluster["occurrence_id"],
+                    "dominant_severity_id": cluster["dominant_severity_id"],
+                    "status": cluster["status"],
+                },
+            }
+            for cluster in cluster_index.query(zoom, bbox)
+        ]
+
+        return {
+            "type": "FeatureCollection",
+            "zoom": min(zoom, cluster_index.max_zoom),
+            "features": features,
+        }
+
+    def get_vector_tile(self, z: int, x: int, y: int) -> bytes:
+        key = (z, x, y)
+        tile = tile_cache.get(key)
+        if tile is None:
+            tile = self._build_vector_tile(z, x, y)
+            tile_cache.set(key, tile)
+        return tile
+
+    def _build_vector_tile(self, z: int, x: int, y: int) -> bytes:
+        # Zooms baixos: clusters do índice em grade em vez de todos os pontos
+        if z < settings.TILE_POINTS_MIN_ZOOM:
+            cluster_index.ensure_loaded(self.repository.iter_map_points)
+            # Encolhe o bbox para não pegar células da borda dos tiles vizinhos
+            clusters = cluster_index.query(z, tile_bbox(z, x, y, buffer=-1e-6))
+            features = [
+                (
+                    None,
+                    cluster["longitude"],
+                    cluster["latitude"],
+                    {
+                        "count": cluster["count"],
+                        "occurrence_id": cluster["occurrence_id"],
+                        "dominant_severity_id": cluster["dominant_severity_id"],
                     },
-                }
+                )
+                for cluster in clusters
+            ]
+            return encode_point_layer("clusters", features, z, x, y)
+
+        rows = self.repository.list_tile_points(
+            tile_bbox(z, x, y, buffer=settings.TILE_BUFFER / EXTENT)
+        )
+        features = [
+            (
+                row.id,
+                row.longitude,
+                row.latitude,
+                {
+                    "status": row.status,
+                    "category": row.category,
+                    "severity_id": row.severity_id,
+                    "severity": row.severity_code,
+                },
             )
+            for row in rows
+        ]
+        return encode_point_layer("occurrences", features, z, x, y)
 
-        return {"type": "FeatureCollection", "features": features}
+    def stream_occurrences_geojson(self, filters: OccurrenceFilter):
+        """
+        Gera a FeatureCollection em pedaços de bytes, lendo as linhas do
+        banco em lotes. A memória usada não depende do número de ocorrências.
+        """
+        buffer = bytearray(b'{"type":"FeatureCollection","features":[')
+        separator = b""
+
+        for occ in self.repository.iter_filtered(
+            filters, batch_size=settings.GEOJSON_STREAM_BATCH_SIZE
+        ):
+            buffer += separator
+            buffer += self._feature_fragment(occ)
+            separator = b","
+
+            if len(buffer) >= settings.GEOJSON_STREAM_CHUNK_BYTES:
+                yield bytes(buffer)
+                buffer.clear()
+
+        buffer += b"]}"
+        yield bytes(buffer)
+
+    def _to_feature(self, occ, include_images: bool = False) -> dict:
+        image_url = None
+        thumbnail_url = None
+        image_mime_type = None
+
+        if occ.image_path:
+            image_url = f"{settings.API_PREFIX}/occurrence/{occ.id}/image"
+            thumbnail_url = f"{image_url}?size=thumb"
+            image_mime_type = guess_mime_type(occ.image_path)
+
+        properties = {
+            "id": occ.id,
+            "name": occ.name,
+            "category": occ.category,
+            "description": occ.description,
+            "severity": {
+                "id": occ.severity.id,
+                "code": occ.severity.code,
+                "name": occ.severity.name,
+                "color": occ.severity.color,
+            },
+            "status": occ.status,
+            "image_path": occ.image_path,
+            "image_url": image_url,
+            "thumbnail_url": thumbnail_url,
+            "image_mime_type": image_mime_type,  # Tipo MIME para exibição
+            "created_at": occ.created_at.isoformat(),
+            "user": {
+                "id": occ.user.id,
+                "username": occ.user.username,
+            },
+        }
+
+        if include_images:
+            # Imagem ainda não validada só é servida ao autor (get_occurrence_image)
+            properties["image_binary"] = (
+                None if occ.status == "validando" else self._read_inline_image(occ.image_path)
+            )
+
+        return {
+            "type": "Feature",
+            "geometry": {
+                "type": "Point",
+                "coordinates": [occ.longitude, occ.latitude],
+            },
+            "properties": properties,
+        }
 
-    def get_occurrence_image(self, occurrence_id: int):
-        """Retorna a imagem binária de uma ocorrência específica"""
+    def _read_inline_image(self, image_path: str | None) -> str | None:
+        """Lê a imagem em base64, ignorando arquivos acima do limite inline."""
+        if not image_path or not os.path.exists(image_path):
+            return None
+
+        try:
+            if os.path.getsize(image_path) > settings.GEOJSON_INLINE_IMAGE_MAX_BYTES:
+                return None
+
+            with open(image_path, "rb") as f:
+                return base64.b64encode(f.read()).decode("utf-8")
+
+        except Exception:
+            logger.exception("Erro ao ler imagem %s", image_path)
+            return None
+
+    def get_occurrence_image(
+        self,
+        occurrence_id: int,
+        size: str = "full",
+        if_none_match: str | None = None,
+        viewer_id: int | None = None,
+    ):
+        """
+        Retorna a imagem de uma ocorrência no tamanho pedido (thumb, medium
+        ou full), servida direto do disco com suporte a Range. Imagens
+        endereçadas por hash nunca mudam: ETag forte do conteúdo e cache
+        imutável; uploads antigos revalidam a cada acesso. Enquanto a
+        ocorrência está "validando", só o autor (``viewer_id``) vê a imagem.
+        """
         occurrence = self.repository.get_by_id(occurrence_id)
 
         if not occurrence or not occurrence.image_path:
             raise HTTPException(status_code=404, detail="Imagem não encontrada")
 
+        pending = occurrence.status == "validando"
+        if pending and occurrence.user_id != viewer_id:
+            raise HTTPException(status_code=404, detail="Imagem não encontrada")
+
         if not os.path.exists(occurrence.image_path):
             raise HTTPException(
                 status_code=404, detail="Arquivo de imagem não encontrado"
             )
 
-        try:
-            with open(occurrence.image_path, "rb") as f:
-                image_content = f.read()
-
-            # Determina o MIME type
-            ext = os.path.splitext(occurrence.image_path)[1].lower()
-            mime_types = {
-                ".jpg": "image/jpeg",
-                ".jpeg": "image/jpeg",
-                ".png": "image/png",
-                ".gif": "image/gif",
-                ".bmp": "image/bmp",
-                ".webp": "image/webp",
-            }
-            media_type = mime_types.get(ext, "image/jpeg")
+        path = rendition_path(occurrence.image_path, size)
 
-            return Response(content=image_content, media_type=media_type)
+        # Uploads anteriores às miniaturas: gera as versões na primeira leitura
+        if not os.path.exists(path):
+            ensure_renditions(occurrence.image_path)
+            if not os.path.exists(path):
+                path = occurrence.image_path
+
+        # Versão reduzida pedida mas indisponível: o original vai no lugar,
+        # sem cache longo, para a URL da miniatura não guardar a imagem cheia
+        fallback = size != "full" and path == occurrence.image_path
+
+        if occurrence.image_sha256 is not None and not fallback:
+            suffix = "" if path == occurrence.image_path else f"-{size}"
+            etag = f'"{occurrence.image_sha256}{suffix}"'
+            cache_control = "public, max-age=31536000, immutable"
+        elif occurrence.image_sha256 is not None:
+            etag = f'"{occurrence.image_sha256}"'
+            cache_control = "no-cache"
+        else:
+            stat = os.stat(path)
+            etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            cache_control = "no-cache"
+
+        if pending:
+            # Resposta do autor: nenhum cache compartilhado pode guardá-la
+            cache_control = "private, no-cache"
+
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+
+        if if_none_match is not None and etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+        return image_file_response(path, guess_mime_type(path), headers)
+
+    def update_occurrence_status(
+        self,
+        occurrence_id: int,
+        status: str,
+        model_version: str | None = None,
+        model_score: float | None = None,
+    ):
+        occurrence = self.repository.update_occurrence_status(
+            occurrence_id, status, model_version=model_version, model_score=model_score
+        )
+
+        self._sync_map_indexes("update", occurrence)
 
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Erro ao ler imagem: {str(e)}")
-    
-    
-    def update_occurrence_status(self, occurrence_id: int, status: str):
-        occurrence = self.repository.get_by_id(occurrence_id)
-        occurrence.status = status
-        self.repository.db.commit()
-        self.repository.db.refresh(occurrence)
         return occurrence
 
     def delete_occurrence(self, occurrence_id: int):
+        occurrence = self.repository.delete_occurrence(occurrence_id)
+
+        if occurrence is not None:
+            self._sync_map_indexes("delete", occurrence)
+
+            # O arquivo só sai junto com a última ocorrência que o usa
+            if occurrence.image_path and not self.repository.is_image_referenced(occurrence):
+                image_storage.delete(occurrence.image_path)
+
+    def discard_unvalidated(self, occurrence_id: int):
+        """Exclui a ocorrência se ela ainda estiver aguardando a validação."""
         occurrence = self.repository.get_by_id(occurrence_id)
-        self.repository.db.delete(occurrence)
-        self.repository.db.commit()
+        if occurrence is not None and occurrence.status == "validando":
+            self.delete_occurrence(occurrence_id)
+
+    def _sync_map_indexes(self, action: str, occurrence):
+        """Propaga uma alteração já confirmada no banco para os índices em memória."""
+        if occurrence.status == "validando" and action != "delete":
+            # Só entra no mapa quando a validação a promover
+            return
+
+        if action in ("create", "update"):
+            # add é idempotente: também cobre a promoção de "validando"
+            cluster_index.add(
+                occurrence.id,
+                occurrence.latitude,
+                occurrence.longitude,
+                occurrence.severity_id,
+                occurrence.status,
+            )
+        elif action == "delete":
+            cluster_index.remove(occurrence.id)
+
+        feature_cache.pop(occurrence.id)
+
+        for key in tiles_containing(
+            occurrence.longitude,
+            occurrence.latitude,
+            settings.TILE_MAX_ZOOM,
+            buffer=settings.TILE_BUFFER,
+        ):
+            tile_cache.pop(key)
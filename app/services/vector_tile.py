@@ -0,0 +1,162 @@
+# app/services/vector_tile.py
+"""
+Codificação de pontos no formato Mapbox Vector Tile (MVT 2.1).
+
+Só precisamos de camadas de pontos, então o protobuf é escrito à mão em vez
+de depender de bibliotecas de geometria.
+"""
+import math
+import struct
+
+EXTENT = 4096
+MAX_MERCATOR_LAT = 85.05112878
+
+# Tipos de fio do protobuf
+_VARINT = 0
+_LENGTH_DELIMITED = 2
+
+_POINT = 1
+_MOVE_TO = 1
+
+
+def lonlat_to_world(lon: float, lat: float) -> tuple[float, float]:
+    """Coordenada Web Mercator normalizada em [0, 1] (y cresce para o sul)."""
+    lat = max(min(lat, MAX_MERCATOR_LAT), -MAX_MERCATOR_LAT)
+    sin = math.sin(math.radians(lat))
+    x = (lon + 180.0) / 360.0
+    y = 0.5 - math.log((1 + sin) / (1 - sin)) / (4 * math.pi)
+    return x, y
+
+
+def tile_bbox(z: int, x: int, y: int, buffer: float = 0.0) -> tuple[float, float, float, float]:
+    """
+    Bbox (minLon, minLat, maxLon, maxLat) do tile, com ``buffer`` em fração
+    do tamanho do tile.
+    """
+    n = 1 << z
+    min_lon = (x - buffer) / n * 360.0 - 180.0
+    max_lon = (x + 1 + buffer) / n * 360.0 - 180.0
+    max_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y - buffer) / n))))
+    min_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1 + buffer) / n))))
+    return (
+        max(min_lon, -180.0),
+        max(min_lat, -90.0),
+        min(max_lon, 180.0),
+        min(max_lat, 90.0),
+    )
+
+
+def tiles_containing(
+    lon: float, lat: float, max_zoom: int, buffer: int = 0
+) -> list[tuple[int, int, int]]:
+    """
+    Todos os tiles (z, x, y) até ``max_zoom`` que incluem o ponto, contando
+    a borda de ``buffer`` unidades de tile. Usado para invalidar o cache.
+    """
+    wx, wy = lonlat_to_world(lon, lat)
+    margin = buffer / EXTENT
+    tiles = []
+    for z in range(max_zoom + 1):
+        n = 1 << z
+        px, py = wx * n, wy * n
+        for tx in range(int(px - margin), int(px + margin) + 1):
+            for ty in range(int(py - margin), int(py + margin) + 1):
+                if 0 <= tx < n and 0 <= ty < n:
+                    tiles.append((z, tx, ty))
+    return tiles
+
+
+def encode_point_layer(
+    name: str,
+    features: list[tuple[int | None, float, float, dict]],
+    z: int,
+    x: int,
+    y: int,
+    extent: int = EXTENT,
+) -> bytes:
+    """
+    Codifica uma camada de pontos. ``features`` são tuplas
+    (id, lon, lat, propriedades); valores None são omitidos.
+    """
+    keys: dict[str, int] = {}
+    values: dict[tuple, int] = {}
+    n = 1 << z
+    encoded_features = []
+
+    for feature_id, lon, lat, properties in features:
+        wx, wy = lonlat_to_world(lon, lat)
+        px = round((wx * n - x) * extent)
+        py = round((wy * n - y) * extent)
+
+        tags = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            typed = (type(value).__name__, value)
+            tags.append(values.setdefault(typed, len(values)))
+
+        geometry = [(_MOVE_TO & 0x7) | (1 << 3), _zigzag(px), _zigzag(py)]
+
+        body = b""
+        if feature_id is not None:
+            body += _field_varint(1, feature_id)
+        body += _field_packed(2, tags)
+        body += _field_varint(3, _POINT)
+        body += _field_packed(4, geometry)
+        encoded_features.append(body)
+
+    layer = _field_varint(15, 2) + _field_bytes(1, name.encode("utf-8"))
+    for body in encoded_features:
+        layer += _field_bytes(2, body)
+    for key in keys:
+        layer += _field_bytes(3, key.encode("utf-8"))
+    for typed in values:
+        layer += _field_bytes(4, _encode_value(*typed))
+    layer += _field_varint(5, extent)
+
+    return _field_bytes(3, layer)
+
+
+def _encode_value(type_name: str, value) -> bytes:
+    if type_name == "bool":
+        return _field_varint(7, int(value))
+    if type_name == "int":
+        if value >= 0:
+            return _field_varint(5, value)
+        return _field_varint(6, _zigzag(value))
+    if type_name == "float":
+        return _key(3, 1) + struct.pack("<d", value)
+    return _field_bytes(1, str(value).encode("utf-8"))
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _key(field: int, wire_type: int) -> bytes:
+    return _varint((field << 3) | wire_type)
+
+
+def _field_varint(field: int, value: int) -> bytes:
+    return _key(field, _VARINT) + _varint(value)
+
+
+def _field_bytes(field: int, data: bytes) -> bytes:
+    return _key(field, _LENGTH_DELIMITED) + _varint(len(data)) + data
+
+
+def _field_packed(field: int, items: list[int]) -> bytes:
+    return _field_bytes(field, b"".join(_varint(item) for item in items))
@@ -0,0 +1,97 @@
+# benchmarks/bench_classification_cache.py
+"""
+Custo de uma reclassificação contra o cache de resultados.
+
+Para uma foto de câmera (JPEG sintético 1600x1200) mede, por chamada:
+
+- classificação completa (``classify_file``: decode, ORB, BoW e SVM);
+- acerto no LRU em memória;
+- acerto na tabela ``classification_results`` (SQLite em memória aqui;
+  no PostgreSQL soma-se a ida ao banco).
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_classification_cache --repeat 50
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.models.classification_result import ClassificationResult  # noqa: E402
+from app.repositories.classification_result_repository import (  # noqa: E402
+    ClassificationResultRepository,
+)
+from app.services.classification_cache import ClassificationCache  # noqa: E402
+from app.services.classifier_pool import classify_file  # noqa: E402
+from app.services.classifier_service import model_version  # noqa: E402
+
+
+def make_jpeg() -> bytes:
+    rng = np.random.default_rng(0)
+    img = cv2.GaussianBlur(rng.integers(0, 256, (1200, 1600, 3), dtype=np.uint8), (7, 7), 0)
+    return cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+async def bench_classify(path: str, repeat: int):
+    pred, prob, cpu, _ = await classify_file(path)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await classify_file(path)
+    return pred, prob, cpu, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    data = make_jpeg()
+    sha256 = hashlib.sha256(data).hexdigest()
+    version = model_version()
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    ClassificationResult.__table__.create(engine)
+    store = ClassificationResultRepository(sessionmaker(bind=engine)())
+
+    with tempfile.NamedTemporaryFile(suffix=".jpg") as f:
+        f.write(data)
+        f.flush()
+        pred, prob, cpu, full = asyncio.run(bench_classify(f.name, args.repeat))
+
+    cache = ClassificationCache(max_items=1000)
+    cache.set(sha256, version, pred, prob, cpu, store)
+    memory = timed(lambda: cache.get(sha256, version, store), args.repeat)
+
+    def store_hit():
+        cache.clear()
+        cache.get(sha256, version, store)
+
+    table = timed(store_hit, args.repeat)
+
+    print(f"Foto {len(data) // 1024}KB, modelo {version}, média de {args.repeat} chamadas")
+    print(f"  classificação completa   {full:9.3f} ms  (CPU da extração {cpu * 1000:.1f} ms)")
+    print(f"  acerto no LRU            {memory:9.3f} ms")
+    print(f"  acerto na tabela         {table:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/bench_classifier_batching.py
+"""
+Vazão da predição do classificador com e sem micro-lotes.
+
+1. Predição direta: ``predict_batch`` com lotes de 1, 4, 16 e 64
+   histogramas (o SVM e o predict_proba vetorizados).
+2. Fila assíncrona: ``--clients`` chamadores concorrentes passando pela
+   ClassificationBatcher, para várias combinações de tamanho máximo (N)
+   e espera máxima (M ms), medindo vazão e latência por chamada.
+
+Os histogramas vêm de descritores ORB sintéticos passados pelo motor
+configurado (CLASSIFIER_ENGINE), então o custo da predição é o de produção.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_classifier_batching --items 4000 --clients 32
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import numpy as np  # noqa: E402
+
+from app.services.classifier_batcher import ClassificationBatcher  # noqa: E402
+from app.services.classifier_service import predict_batch, registry  # noqa: E402
+
+
+def make_histograms(n: int) -> list[np.ndarray]:
+    rng = np.random.default_rng(0)
+    engine = registry.get()
+    return [
+        engine.histogram(rng.integers(0, 256, (500, 32), dtype=np.uint8))
+        for _ in range(n)
+    ]
+
+
+def bench_direct(histograms, batch_size: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(histograms), batch_size):
+        predict_batch(histograms[i : i + batch_size])
+    return len(histograms) / (time.perf_counter() - start)
+
+
+async def bench_queue(histograms, clients: int, max_batch_size: int, max_wait_ms: float):
+    batcher = ClassificationBatcher(predict_batch, max_batch_size, max_wait_ms)
+    latencies = []
+    per_client = len(histograms) // clients
+
+    async def client(offset: int):
+        for histogram in histograms[offset : offset + per_client]:
+            start = time.perf_counter()
+            await batcher.predict(histogram)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i * per_client) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    stats = batcher.stats()
+    return (
+        per_client * clients / elapsed,
+        latencies[len(latencies) // 2],
+        latencies[int(len(latencies) * 0.99)],
+        stats["mean_batch_size"],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=4000)
+    parser.add_argument("--clients", type=int, default=32)
+    args = parser.parse_args()
+
+    histograms = make_histograms(args.items)
+
+    print("Predição direta")
+    for batch_size in (1, 4, 16, 64):
+        rate = bench_direct(histograms, batch_size)
+        print(f"  lote {batch_size:3d}: {rate:9.0f} itens/s")
+
+    print(f"\nFila com {args.clients} chamadores concorrentes")
+    for max_batch_size, max_wait_ms in ((1, 0), (8, 2), (16, 5), (32, 5), (64, 10)):
+        rate, p50, p99, mean_batch = asyncio.run(
+            bench_queue(histograms, args.clients, max_batch_size, max_wait_ms)
+        )
+        print(
+            f"  N={max_batch_size:3d} M={max_wait_ms:4.1f}ms: {rate:9.0f} itens/s  "
+            f"p50 {p50:6.2f} ms  p99 {p99:6.2f} ms  lote médio {mean_batch:5.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
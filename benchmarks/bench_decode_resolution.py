@@ -0,0 +1,142 @@
+# benchmarks/bench_decode_resolution.py
+"""
+Latência de decode + ORB e acurácia do classificador para vários limites
+de lado maior (``max_side``) na decodificação.
+
+Com o dataset de treinamento (dataset/lixo e dataset/nao_lixo), para cada
+``max_side`` mostra:
+- decode e ORB por imagem (mediana, ms) e pontos detectados;
+- acurácia do modelo publicado, decodificando com esse ``max_side``;
+- com ``--cv``, acurácia em validação cruzada treinando KMeans + SVM com o
+  mesmo ``max_side`` (o cenário em que treino e API usam a mesma
+  normalização).
+
+Sem dataset, ``--synthetic N`` gera fotos sintéticas de 12MP e mede só a
+latência.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_decode_resolution --dataset dataset --cv 5
+    python -m benchmarks.bench_decode_resolution --synthetic 10
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+from app.services.classifier_service import registry  # noqa: E402
+from app.services.image_preprocess import decode_image  # noqa: E402
+
+LABELS = (("lixo", 1), ("nao_lixo", 0))
+
+
+def load_dataset(path: str):
+    images, labels = [], []
+    for label_name, label in LABELS:
+        folder = os.path.join(path, label_name)
+        if not os.path.isdir(folder):
+            continue
+        for fname in sorted(os.listdir(folder)):
+            images.append(np.fromfile(os.path.join(folder, fname), dtype=np.uint8))
+            labels.append(label)
+    return images, np.array(labels)
+
+
+def synthetic_images(n: int):
+    rng = np.random.default_rng(0)
+    images = []
+    for _ in range(n):
+        small = rng.integers(0, 255, (300, 400, 3), np.uint8)
+        img = cv2.resize(small, (4000, 3000), interpolation=cv2.INTER_CUBIC)
+        img = cv2.add(img, rng.integers(0, 20, img.shape, np.uint8))
+        images.append(cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 90])[1])
+    return images
+
+
+def extract(images, max_side):
+    orb = cv2.ORB_create(nfeatures=500)
+    decode_ms, orb_ms, keypoints, descriptors = [], [], [], []
+    for data in images:
+        start = time.perf_counter()
+        img = decode_image(data, max_side)
+        decoded = time.perf_counter()
+        if img is None:
+            descriptors.append(None)
+            continue
+        kp, des = orb.detectAndCompute(img, None)
+        done = time.perf_counter()
+        decode_ms.append((decoded - start) * 1000)
+        orb_ms.append((done - decoded) * 1000)
+        keypoints.append(len(kp))
+        descriptors.append(des if des is not None and len(des) else None)
+    return decode_ms, orb_ms, keypoints, descriptors
+
+
+def deployed_accuracy(descriptors, labels) -> float:
+    engine = registry.get()
+    preds = [
+        engine.predict_batch([engine.histogram(des)])[0][0] if des is not None else 0
+        for des in descriptors
+    ]
+    return float((np.array(preds) == labels).mean())
+
+
+def cv_accuracy(descriptors, labels, folds: int) -> float:
+    from sklearn.model_selection import StratifiedKFold
+    from sklearn.svm import SVC
+
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "machineLearning"))
+    from train_model import build_bow, descriptors_to_hist
+
+    keep = [i for i, des in enumerate(descriptors) if des is not None]
+    des_list = [descriptors[i] for i in keep]
+    y = labels[keep]
+
+    scores = []
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+    for train, test in splitter.split(np.zeros(len(y)), y):
+        kmeans = build_bow([des_list[i] for i in train])
+        svm = SVC(kernel="linear", random_state=42)
+        svm.fit(descriptors_to_hist([des_list[i] for i in train], kmeans), y[train])
+        X_test = descriptors_to_hist([des_list[i] for i in test], kmeans)
+        scores.append((svm.predict(X_test) == y[test]).mean())
+    # Imagens sem descritores contam como erro, como na API
+    return float(np.mean(scores)) * len(keep) / len(labels)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dataset", default="dataset")
+    parser.add_argument("--sides", default="0,2048,1280,1024,800,640")
+    parser.add_argument("--cv", type=int, default=0, help="folds da validação cruzada")
+    parser.add_argument("--synthetic", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        images, labels = synthetic_images(args.synthetic), None
+        print(f"{len(images)} imagens sintéticas 4000x3000 (sem acurácia)")
+    else:
+        images, labels = load_dataset(args.dataset)
+        if not images:
+            raise SystemExit(f"Dataset vazio em {args.dataset}; use --synthetic N")
+        print(f"{len(images)} imagens de {args.dataset}")
+
+    for side in (int(v) for v in args.sides.split(",")):
+        decode_ms, orb_ms, keypoints, descriptors = extract(images, side or None)
+        line = (
+            f"max_side {side or 'original':>8}: decode {np.median(decode_ms):6.1f} ms  "
+            f"ORB {np.median(orb_ms):6.1f} ms  pontos {np.mean(keypoints):5.0f}"
+        )
+        if labels is not None:
+            line += f"  acurácia (modelo atual) {deployed_accuracy(descriptors, labels):.3f}"
+            if args.cv:
+                line += f"  acurácia (cv, retreinado) {cv_accuracy(descriptors, labels, args.cv):.3f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
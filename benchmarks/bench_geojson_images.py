@@ -0,0 +1,84 @@
+# benchmarks/bench_geojson_images.py
+"""
+Compara o payload GeoJSON com imagens por referência (padrão) e com
+imagens embutidas em base64 (include_images=true).
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_geojson_images --features 2000 --image-kb 400
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.services.occurrence_service import OccurrenceService  # noqa: E402
+
+
+def make_occurrences(n: int, image_path: str):
+    severity = SimpleNamespace(id=2, code="MODERADA", name="Moderada", color="#FFA500")
+    user = SimpleNamespace(id=1, username="bench")
+    return [
+        SimpleNamespace(
+            id=i,
+            name=f"Ocorrência {i}",
+            category="lixo",
+            description="Lixo acumulado na calçada",
+            severity=severity,
+            status="pendente",
+            image_path=image_path,
+            latitude=-1.45 + i * 1e-5,
+            longitude=-48.49 + i * 1e-5,
+            created_at=datetime(2025, 11, 28),
+            user=user,
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def run(service, occurrences, include_images: bool, repeat: int):
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        features = [service._to_feature(occ, include_images) for occ in occurrences]
+        body = json.dumps({"type": "FeatureCollection", "features": features})
+        best = min(best, time.perf_counter() - start)
+        size = len(body.encode("utf-8"))
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--features", type=int, default=2000)
+    parser.add_argument("--image-kb", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image_path = os.path.join(tmp, "foto.jpg")
+        with open(image_path, "wb") as f:
+            f.write(os.urandom(args.image_kb * 1024))
+
+        # Sem teto para medir o comportamento antigo (tudo inline)
+        from app.core.config import settings
+
+        settings.GEOJSON_INLINE_IMAGE_MAX_BYTES = args.image_kb * 1024
+
+        service = OccurrenceService(repository=None)
+        occurrences = make_occurrences(args.features, image_path)
+
+        for label, include_images in [("referência", False), ("base64", True)]:
+            elapsed, size = run(service, occurrences, include_images, args.repeat)
+            print(
+                f"{label:>10}: {args.features} features | "
+                f"{size / 1024 / 1024:8.2f} MB | {elapsed * 1000:9.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
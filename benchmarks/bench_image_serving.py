@@ -0,0 +1,118 @@
+# benchmarks/bench_image_serving.py
+"""
+Compara três formas de servir a imagem de uma ocorrência num servidor
+uvicorn real:
+
+- leitura completa: ``open().read()`` + ``Response(content=...)`` (caminho antigo);
+- caminho atual (``image_file_response``): leitura única até
+  IMAGE_SERVE_CHUNK_BYTES e FileResponse em blocos acima disso, com ETag;
+- revalidação: o cliente manda If-None-Match e recebe 304 sem corpo.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_image_serving --image-kb 2048 --requests 400 --concurrency 8
+"""
+import argparse
+import os
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import FastAPI, Header  # noqa: E402
+from fastapi.responses import Response  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.http_cache import etag_matches  # noqa: E402
+from app.services.occurrence_service import image_file_response  # noqa: E402
+
+ETAG = '"bench"'
+HEADERS = {"ETag": ETAG, "Cache-Control": "public, max-age=31536000, immutable"}
+
+
+def build_app(path: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/read")
+    def read_whole():
+        with open(path, "rb") as f:
+            return Response(content=f.read(), media_type="image/jpeg")
+
+    @app.get("/file")
+    def current(if_none_match: str | None = Header(None)):
+        if if_none_match is not None and etag_matches(if_none_match, ETAG):
+            return Response(status_code=304, headers=HEADERS)
+        return image_file_response(path, "image/jpeg", HEADERS)
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run(base_url: str, route: str, requests: int, concurrency: int, headers=None):
+    def worker(count: int) -> int:
+        received = 0
+        with httpx.Client(base_url=base_url, headers=headers) as client:
+            for _ in range(count):
+                response = client.get(route)
+                received += len(response.content)
+        return received
+
+    per_worker = [requests // concurrency] * concurrency
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        received = sum(pool.map(worker, per_worker))
+    elapsed = time.perf_counter() - start
+    return sum(per_worker) / elapsed, received / elapsed / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--image-kb", type=int, default=2048)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "image.jpg")
+        with open(path, "wb") as f:
+            f.write(os.urandom(args.image_kb * 1024))
+
+        port = free_port()
+        server = uvicorn.Server(
+            uvicorn.Config(build_app(path), port=port, log_level="warning")
+        )
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+
+        base_url = f"http://127.0.0.1:{port}"
+        # Aquecimento
+        run(base_url, "/read", args.concurrency, args.concurrency)
+
+        print(f"Imagem de {args.image_kb} KB, {args.requests} requisições, "
+              f"concorrência {args.concurrency}, "
+              f"blocos de {settings.IMAGE_SERVE_CHUNK_BYTES // 1024} KB")
+        for label, route, headers in (
+            ("leitura completa", "/read", None),
+            ("caminho atual", "/file", None),
+            ("revalidação 304", "/file", {"If-None-Match": ETAG}),
+        ):
+            rps, mbps = run(base_url, route, args.requests, args.concurrency, headers)
+            print(f"{label:18s} {rps:8.1f} req/s  {mbps:8.1f} MB/s")
+
+        server.should_exit = True
+        thread.join()
+
+
+if __name__ == "__main__":
+    main()
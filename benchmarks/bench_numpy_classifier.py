@@ -0,0 +1,91 @@
+# benchmarks/bench_numpy_classifier.py
+"""
+Latência por imagem do classificador com o motor scikit-learn (.pkl) e
+com o motor NumPy (machineLearning/numpy_model), e concordância entre eles.
+
+Mede separadamente:
+- histograma (atribuição dos 500 descritores ORB aos centros + contagem);
+- predição de um histograma (rótulo + probabilidade);
+- pipeline completo a partir dos bytes de um JPEG (decode + ORB + os dois).
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_numpy_classifier --images 500
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import cv2  # noqa: E402
+import joblib  # noqa: E402
+import numpy as np  # noqa: E402
+
+from app.services import classifier_service  # noqa: E402
+from app.services.classifier_service import (  # noqa: E402
+    BOW_PATH,
+    MODEL_PATH,
+    NUMPY_MODEL_DIR,
+    SklearnBowClassifier,
+)
+from app.services.numpy_classifier import NumpyBowClassifier  # noqa: E402
+
+
+def per_call_us(fn, items) -> float:
+    timings = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=500)
+    parser.add_argument("--image-size", default="1600x1200")
+    args = parser.parse_args()
+
+    engines = {
+        "sklearn": SklearnBowClassifier(joblib.load(MODEL_PATH), joblib.load(BOW_PATH)),
+        "numpy": NumpyBowClassifier.load(NUMPY_MODEL_DIR),
+    }
+
+    rng = np.random.default_rng(0)
+    descriptors = [
+        rng.integers(0, 256, (500, 32), dtype=np.uint8) for _ in range(args.images)
+    ]
+
+    width, height = (int(v) for v in args.image_size.split("x"))
+    noise = rng.integers(0, 255, (height, width, 3), np.uint8)
+    jpeg = cv2.imencode(".jpg", cv2.GaussianBlur(noise, (5, 5), 0))[1].tobytes()
+
+    histograms = {}
+    print(f"{args.images} imagens, mediana por chamada")
+    for name, engine in engines.items():
+        histograms[name] = [engine.histogram(d) for d in descriptors]
+        hist_us = per_call_us(engine.histogram, descriptors)
+        predict_us = per_call_us(lambda h: engine.predict_batch([h]), histograms[name])
+
+        classifier_service.registry.swap(engine)
+        full_us = per_call_us(classifier_service.classify_image, [jpeg] * 20)
+        print(
+            f"  {name:8s} histograma {hist_us:8.1f} µs  predição {predict_us:8.1f} µs  "
+            f"completo {full_us / 1000:7.1f} ms ({width}x{height})"
+        )
+
+    same_hist = all(
+        np.array_equal(a, b) for a, b in zip(histograms["sklearn"], histograms["numpy"])
+    )
+    reference = engines["sklearn"].predict_batch(histograms["sklearn"])
+    candidate = engines["numpy"].predict_batch(histograms["sklearn"])
+    same_labels = all(a[0] == b[0] for a, b in zip(reference, candidate))
+    proba_error = max(abs(a[1] - b[1]) for a, b in zip(reference, candidate))
+    print(
+        f"\nHistogramas idênticos: {same_hist}  rótulos idênticos: {same_labels}  "
+        f"erro máx. de probabilidade: {proba_error:.2e}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# benchmarks/bench_spatial_index.py
+"""
+Mede consultas por bbox, raio e k-vizinhos com e sem a poda por geohash.
+
+Usa SQLite em arquivo temporário para rodar sem PostgreSQL; os números
+absolutos mudam no Postgres, mas a relação varredura x índice se mantém.
+Obs.: sem estatísticas de seletividade, o SQLite prefere percorrer a chave
+primária para ``ORDER BY id LIMIT`` em list_filtered; o Postgres escolhe o
+índice de geohash quando o bbox é pequeno.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_spatial_index --rows 100000
+    python -m benchmarks.bench_spatial_index --rows 1000000 --queries 50
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core.geo import encode_geohash  # noqa: E402
+from app.database import Base  # noqa: E402
+from app.models import Occurrence, Severity, User  # noqa: E402
+from app.repositories.occurrence_repository import OccurrenceRepository  # noqa: E402
+from app.schemas.occurrence import OccurrenceFilter  # noqa: E402
+
+# Região metropolitana de Belém
+MIN_LON, MIN_LAT, MAX_LON, MAX_LAT = -48.70, -1.60, -48.20, -1.10
+
+
+def populate(session, rows: int):
+    session.add(User(id=1, name="Bench", username="bench", cpf="0" * 11, email="b@b.b"))
+    session.add(Severity(id=1, code="LEVE", name="Leve", color="#90EE90", order=1))
+    session.commit()
+
+    batch = []
+    for i in range(1, rows + 1):
+        lat = random.uniform(MIN_LAT, MAX_LAT)
+        lon = random.uniform(MIN_LON, MAX_LON)
+        batch.append(
+            {
+                "id": i,
+                "user_id": 1,
+                "severity_id": 1,
+                "name": f"Ocorrência {i}",
+                "category": "lixo",
+                "latitude": lat,
+                "longitude": lon,
+                "geohash": encode_geohash(lat, lon),
+                "status": "pendente",
+                "created_at": datetime(2025, 11, 28),
+            }
+        )
+        if len(batch) == 10_000:
+            session.execute(insert(Occurrence), batch)
+            batch.clear()
+    if batch:
+        session.execute(insert(Occurrence), batch)
+    session.commit()
+
+
+def random_viewport(size_deg: float):
+    lon = random.uniform(MIN_LON, MAX_LON - size_deg)
+    lat = random.uniform(MIN_LAT, MAX_LAT - size_deg)
+    return lon, lat, lon + size_deg, lat + size_deg
+
+
+def timed(label: str, fn, queries: int):
+    start = time.perf_counter()
+    total = 0
+    for _ in range(queries):
+        total += fn()
+    elapsed = (time.perf_counter() - start) / queries
+    print(f"{label:>34}: {elapsed * 1000:8.2f} ms/consulta | {total / queries:8.1f} linhas")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--viewport-deg", type=float, default=0.01)
+    parser.add_argument("--radius-m", type=float, default=500.0)
+    parser.add_argument("--k", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+
+        start = time.perf_counter()
+        populate(session, args.rows)
+        print(f"{args.rows} linhas inseridas em {time.perf_counter() - start:.1f}s")
+
+        repo = OccurrenceRepository(session)
+
+        def scan_bbox():
+            min_lon, min_lat, max_lon, max_lat = random_viewport(args.viewport_deg)
+            return (
+                session.query(Occurrence.id)
+                .filter(
+                    Occurrence.latitude.between(min_lat, max_lat),
+                    Occurrence.longitude.between(min_lon, max_lon),
+                )
+                .count()
+            )
+
+        def geohash_bbox():
+            bbox = random_viewport(args.viewport_deg)
+            return repo._apply_bbox(session.query(Occurrence.id), bbox).count()
+
+        def radius():
+            lon, lat, _, _ = random_viewport(0)
+            return len(repo.find_within_radius(lat, lon, args.radius_m))
+
+        def nearest():
+            lon, lat, _, _ = random_viewport(0)
+            return len(repo.find_nearest(lat, lon, args.k))
+
+        def listing():
+            bbox = random_viewport(args.viewport_deg)
+            return len(repo.list_filtered(OccurrenceFilter(bbox=bbox, limit=500)))
+
+        timed("bbox (varredura lat/lon)", scan_bbox, args.queries)
+        timed("bbox (geohash + índice)", geohash_bbox, args.queries)
+        timed("list_filtered com bbox", listing, args.queries)
+        timed(f"raio {args.radius_m:.0f}m", radius, args.queries)
+        timed(f"{args.k} vizinhos mais próximos", nearest, args.queries)
+
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
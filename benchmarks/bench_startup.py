@@ -0,0 +1,79 @@
+# benchmarks/bench_startup.py
+"""
+Tempo de inicialização e da primeira classificação, por motor do
+classificador, cada medição num processo Python novo:
+
+- import: ``import app.main`` (o modelo não é carregado na importação);
+- carga + aquecimento: ``registry.load()``, o que o startup da API faz;
+- 1ª classificação: latência da primeira imagem, com e sem o
+  aquecimento feito antes.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_startup --runs 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+CHILD = r"""
+import json, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+import cv2, numpy as np
+from app.services.classifier_service import classify_image, registry
+img = np.random.default_rng(1).integers(0, 256, (1200, 1600), dtype=np.uint8)
+jpeg = cv2.imencode(".jpg", cv2.GaussianBlur(img, (5, 5), 0))[1].tobytes()
+if PRELOAD:
+    registry.load()
+t2 = time.perf_counter()
+classify_image(jpeg)
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "load": t2 - t1, "first": t3 - t2}))
+"""
+
+
+def measure(engine: str, preload: bool, mmap_mode: str, runs: int) -> dict:
+    env = dict(
+        os.environ,
+        DATABASE_URL=os.environ.get("DATABASE_URL", "sqlite://"),
+        CLASSIFIER_ENGINE=engine,
+        CLASSIFIER_MMAP_MODE=mmap_mode,
+    )
+    if not mmap_mode:
+        env.pop("CLASSIFIER_MMAP_MODE")
+    results = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", CHILD.replace("PRELOAD", str(preload))],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+    return {key: min(r[key] for r in results) for key in results[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Melhor de {args.runs} processos (ms)")
+    for engine in ("numpy", "sklearn"):
+        for mmap_mode in ("r", ""):
+            for preload in (True, False):
+                r = measure(engine, preload, mmap_mode, args.runs)
+                print(
+                    f"  {engine:7s} mmap={mmap_mode or '-':1s} "
+                    f"{'com aquecimento' if preload else 'sob demanda    '}  "
+                    f"import {r['import'] * 1000:7.1f}  carga+aquec. {r['load'] * 1000:7.1f}  "
+                    f"1ª classificação {r['first'] * 1000:7.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# benchmarks/load_upload_latency.py
+"""
+Teste de carga: latência de GETs concorrentes com e sem uploads rodando
+ao mesmo tempo, para cada modo do executor do classificador.
+
+Sobe a API real num uvicorn local, com SQLite e armazenamento de imagens
+em diretório temporário, e autenticação substituída por um usuário fixo.
+Se o event loop trava durante a classificação, o p99 dos GETs dispara na
+segunda fase; com o pool ele deve ficar próximo do da primeira.
+
+Com ``--respond-async`` os uploads pedem o modo assíncrono (Prefer:
+respond-async) e a latência do upload deixa de incluir a classificação.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.load_upload_latency
+    python -m benchmarks.load_upload_latency --executors thread,process --uploaders 4
+    python -m benchmarks.load_upload_latency --executors thread --respond-async
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def make_image(path: str, width: int, height: int):
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    img = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), np.uint8), (5, 5), 0)
+    cv2.imwrite(path, img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_single(args):
+    """Executa as duas fases para o executor configurado no ambiente."""
+    import httpx
+    import uvicorn
+
+    from app.core.auth import get_current_user
+    from app.database import Base
+    from app.database.session import SessionLocal, engine
+    from app.main import app
+    from app.models import Severity
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    db.merge(Severity(id=1, code="LEVE", name="Leve", color="#90EE90", order=1))
+    db.commit()
+    db.close()
+
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1)
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{port}"
+    with open(args.image, "rb") as f:
+        image = f.read()
+
+    def get_loop(stop: threading.Event, latencies: list[float]):
+        with httpx.Client(base_url=base_url) as client:
+            while not stop.is_set():
+                start = time.perf_counter()
+                client.get(args.get_path)
+                latencies.append((time.perf_counter() - start) * 1000)
+                time.sleep(args.get_interval)
+
+    headers = {"Prefer": "respond-async"} if args.respond_async else {}
+
+    def upload_loop(stop: threading.Event, results: list[float]):
+        with httpx.Client(base_url=base_url, timeout=120) as client:
+            while not stop.is_set():
+                start = time.perf_counter()
+                client.post(
+                    f"{args.prefix}/occurrence",
+                    data={
+                        "name": "carga",
+                        "category": "lixo",
+                        "severity_id": 1,
+                        "latitude": -1.45,
+                        "longitude": -48.49,
+                    },
+                    # Bytes após o fim do JPEG mudam o hash sem mudar a imagem:
+                    # cada upload passa pelo classificador, não pelo cache
+                    files={"image": ("foto.jpg", image + os.urandom(16), "image/jpeg")},
+                    headers=headers,
+                )
+                results.append((time.perf_counter() - start) * 1000)
+
+    def phase(uploaders: int):
+        stop = threading.Event()
+        latencies: list[float] = []
+        uploads: list[float] = []
+        threads = [
+            threading.Thread(target=get_loop, args=(stop, latencies))
+            for _ in range(args.getters)
+        ] + [
+            threading.Thread(target=upload_loop, args=(stop, uploads))
+            for _ in range(uploaders)
+        ]
+        for t in threads:
+            t.start()
+        time.sleep(args.duration)
+        stop.set()
+        for t in threads:
+            t.join()
+        return latencies, uploads
+
+    executor = os.environ["CLASSIFIER_EXECUTOR"] + (" async" if args.respond_async else "")
+    for label, uploaders in (("sem uploads", 0), (f"{args.uploaders} uploaders", args.uploaders)):
+        latencies, uploads = phase(uploaders)
+        print(
+            f"{executor:14s} {label:14s} GET p50 {percentile(latencies, 50):7.1f} ms  "
+            f"p99 {percentile(latencies, 99):7.1f} ms  max {max(latencies):7.1f} ms  "
+            f"uploads {len(uploads) / args.duration:5.1f}/s"
+            + (
+                f" (p50 {percentile(uploads, 50):6.1f} ms, p99 {percentile(uploads, 99):6.1f} ms)"
+                if uploads
+                else ""
+            )
+        )
+
+    server.should_exit = True
+    thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--executors", default="inline,thread,process")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--uploaders", type=int, default=4)
+    parser.add_argument("--getters", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--get-interval", type=float, default=0.01)
+    parser.add_argument("--get-path", default="/")
+    parser.add_argument("--prefix", default="/pluvio-api")
+    parser.add_argument("--image-size", default="1600x1200")
+    parser.add_argument("--respond-async", action="store_true")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--image", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(args)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image = os.path.join(tmp, "foto.jpg")
+        width, height = (int(v) for v in args.image_size.split("x"))
+        make_image(image, width, height)
+
+        # Um processo por executor: as configurações são lidas na importação
+        for executor in args.executors.split(","):
+            env = dict(
+                os.environ,
+                DATABASE_URL=f"sqlite:///{os.path.join(tmp, executor + '.db')}",
+                IMAGE_STORAGE_DIR=os.path.join(tmp, executor + "-blobs"),
+                CLASSIFIER_EXECUTOR=executor,
+                CLASSIFIER_WORKERS=str(args.workers),
+            )
+            argv = [
+                "--single", "--image", image,
+                "--uploaders", str(args.uploaders),
+                "--getters", str(args.getters),
+                "--duration", str(args.duration),
+                "--get-interval", str(args.get_interval),
+                "--get-path", args.get_path,
+                "--prefix", args.prefix,
+            ] + (["--respond-async"] if args.respond_async else [])
+            subprocess.run(
+                [sys.executable, "-W", "ignore", "-m", "benchmarks.load_upload_latency", *argv],
+                env=env,
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# machineLearning/export_numpy_model.py
+"""
+Exporta model.pkl + bow.pkl para o artefato NumPy usado pela API
+(machineLearning/numpy_model) e valida o resultado contra o scikit-learn.
+Com ``--version`` exporta dentro de machineLearning/models/<versão>.
+
+O ``max_side`` é o do treinamento, gravado no params.json pelo
+train_model.py; ``--max-side`` só vale para artefatos que ainda não o
+registram e não pode contradizer o valor gravado.
+
+Uso (na raiz do projeto):
+    python machineLearning/export_numpy_model.py [--version 20261018-120000] [--max-side 1024]
+"""
+import argparse
+import os
+import sys
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.model_store import model_version_dir  # noqa: E402
+from app.services.numpy_classifier import NumpyBowClassifier, stored_max_side  # noqa: E402
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(MODEL_DIR, "numpy_model")
+
+PROBA_TOLERANCE = 1e-9
+
+
+def probe_data(kmeans, n=2000, seed=0):
+    """Descritores ORB sintéticos e histogramas de várias escalas."""
+    rng = np.random.default_rng(seed)
+    descriptors = rng.integers(0, 256, (n, kmeans.cluster_centers_.shape[1]), dtype=np.uint8)
+    k = len(kmeans.cluster_centers_)
+    histograms = np.vstack(
+        [rng.multinomial(total, np.full(k, 1 / k)) for total in rng.integers(1, 501, n)]
+    ).astype(np.float32)
+    return descriptors, histograms
+
+
+def convert(svm, kmeans):
+    """
+    Monta o classificador NumPy, escolhendo o sinal da decisão e a coluna
+    de probabilidade que reproduzem o predict_proba do scikit-learn.
+    Aceita SVC linear ou SGDClassifier com log_loss (treino incremental).
+    """
+    if len(svm.classes_) != 2:
+        raise ValueError("Só classificadores binários podem ser exportados")
+    if getattr(svm, "loss", None) == "log_loss":
+        link = "logistic"
+    elif getattr(svm, "kernel", None) == "linear":
+        link = "platt"
+    else:
+        raise ValueError("Só SVC linear ou SGDClassifier(loss='log_loss') podem ser exportados")
+
+    _, histograms = probe_data(kmeans)
+    expected = svm.predict_proba(histograms)[:, 1]
+
+    best = None
+    for decision_sign in (1, -1):
+        for proba_column in (0, 1):
+            candidate = NumpyBowClassifier(
+                centers=kmeans.cluster_centers_,
+                coef=svm.coef_,
+                intercept=svm.intercept_[0],
+                prob_a=svm.probA_[0] if link == "platt" else 0.0,
+                prob_b=svm.probB_[0] if link == "platt" else 0.0,
+                classes=svm.classes_.tolist(),
+                decision_sign=decision_sign,
+                proba_column=proba_column,
+                link=link,
+            )
+            probs = np.array([prob for _, prob in candidate.predict_batch(histograms)])
+            error = np.abs(probs - expected).max()
+            if best is None or error < best[0]:
+                best = (error, candidate)
+
+    return best[1]
+
+
+def validate(engine, svm, kmeans, seed=1):
+    descriptors, histograms = probe_data(kmeans, seed=seed)
+
+    assignments = engine.assign(descriptors)
+    assign_agreement = (assignments == kmeans.predict(descriptors)).mean()
+
+    results = engine.predict_batch(histograms)
+    preds = np.array([pred for pred, _ in results])
+    probs = np.array([prob for _, prob in results])
+    label_agreement = (preds == svm.predict(histograms)).mean()
+    proba_error = np.abs(probs - svm.predict_proba(histograms)[:, 1]).max()
+
+    print(f"Concordância kmeans: {assign_agreement:.6f}")
+    print(f"Concordância de rótulos: {label_agreement:.6f}")
+    print(f"Erro máximo de probabilidade: {proba_error:.3e}")
+
+    return assign_agreement == 1 and label_agreement == 1 and proba_error <= PROBA_TOLERANCE
+
+
+def export(model_dir=MODEL_DIR, output_dir=OUTPUT_DIR, max_side=None):
+    svm = joblib.load(os.path.join(model_dir, "model.pkl"))
+    kmeans = joblib.load(os.path.join(model_dir, "bow.pkl"))
+
+    engine = convert(svm, kmeans)
+    if not validate(engine, svm, kmeans):
+        raise SystemExit("Artefato NumPy diverge do scikit-learn; exportação cancelada")
+
+    # Pré-processamento do treinamento, repetido pela API na inferência
+    engine.max_side = max_side
+    engine.save(output_dir, orb_features=500)
+    print(f"Artefato NumPy salvo em {output_dir}")
+
+
+def recorded_max_side(output_dir, requested=None):
+    """
+    ``max_side`` já gravado em ``output_dir``; ``requested`` só preenche
+    artefatos antigos, sem o valor, e não pode divergir dele.
+    """
+    if not os.path.exists(os.path.join(output_dir, "params.json")):
+        return requested
+    recorded = stored_max_side(output_dir)
+    if requested is not None and requested != recorded:
+        raise SystemExit(
+            f"--max-side {requested} diverge do treinamento ({recorded or 'original'}) "
+            f"gravado em {output_dir}"
+        )
+    return recorded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--max-side",
+        type=int,
+        default=None,
+        help="lado maior usado no treinamento, só para artefatos que não o registram",
+    )
+    parser.add_argument("--version", help="versão em machineLearning/models")
+    args = parser.parse_args()
+    model_dir = model_version_dir(args.version) if args.version else MODEL_DIR
+    output_dir = model_dir if args.version else OUTPUT_DIR
+    export(
+        model_dir=model_dir,
+        output_dir=output_dir,
+        max_side=recorded_max_side(output_dir, args.max_side),
+    )
@@ -0,0 +1,352 @@
+# machineLearning/train_incremental.py
+"""
+Treinamento incremental a partir de uma versão existente do modelo.
+
+Só as imagens ainda não vistas pela versão base são processadas: o
+vocabulário é atualizado com ``MiniBatchKMeans.partial_fit`` e o
+classificador com ``SGDClassifier(loss="log_loss").partial_fit``, então o
+custo é proporcional aos dados novos, não ao histórico inteiro. O
+resultado é uma versão nova em machineLearning/models, com os .pkl e o
+artefato NumPy que a API carrega.
+
+Fontes de imagens:
+- ``--dataset``: pastas lixo/ e nao_lixo/, como no train_model.py (por
+  exemplo, uploads revisados à mão); é a única fonte de não-lixo, já que
+  imagens rejeitadas não ficam guardadas;
+- banco (padrão): ocorrências resolvidas são lixo confirmado.
+
+Na primeira rodada sobre uma versão treinada do zero, o KMeans e o SVC
+viram os modelos online equivalentes: os centros mantêm o peso dos
+descritores que os formaram e o SGD parte dos coeficientes do SVC.
+
+Uma parte das imagens novas (``--holdout``) fica fora do treino: metade
+recalibra as probabilidades (Platt) e metade compara a versão nova com a
+base. models/CURRENT só é atualizado se a nova não perder acerto na regra
+de aceitação da API nem piorar o log loss além de ``--log-loss-margin``.
+Os sha256 usados no treino ficam em ``trained_images.txt`` de cada
+versão; os separados para calibração e avaliação continuam disponíveis
+para a próxima rodada.
+
+Uso (na raiz do projeto):
+    python machineLearning/train_incremental.py [--base 20261018-120000] [--dataset novos/]
+"""
+import argparse
+import os
+import sys
+
+import joblib
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import log_loss
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.model_store import (  # noqa: E402
+    current_model_version,
+    is_trash,
+    model_version_dir,
+    new_model_version,
+    set_current_model_version,
+)
+from app.services.numpy_classifier import stored_max_side  # noqa: E402
+from export_numpy_model import (  # noqa: E402
+    MODEL_DIR,
+    OUTPUT_DIR,
+    export as export_numpy_model,
+)
+from train_model import (  # noqa: E402
+    CACHE_DIR,
+    descriptor_batches,
+    descriptor_count,
+    descriptors_to_hist,
+    extract_all,
+    file_sha256,
+    list_images,
+    read_seen,
+    stage,
+    stage_times,
+    write_seen,
+)
+
+
+def dataset_samples(path):
+    files, labels = list_images(path)
+    return [(fpath, file_sha256(fpath), label) for fpath, label in zip(files, labels)]
+
+
+def production_samples():
+    """(caminho, sha256, rótulo) das ocorrências resolvidas: lixo confirmado."""
+    from sqlalchemy import select
+
+    from app.database.session import SessionLocal
+    from app.models.occurrence import Occurrence
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(Occurrence.image_path, Occurrence.image_sha256).where(
+                Occurrence.status == "resolvida", Occurrence.image_path.is_not(None)
+            )
+        ).all()
+    finally:
+        db.close()
+
+    return [
+        (path, sha256 or file_sha256(path), 1)
+        for path, sha256 in rows
+        if os.path.exists(path)
+    ]
+
+
+def online_vocabulary(kmeans):
+    """
+    MiniBatchKMeans que continua de ``kmeans``. Um KMeans vira MiniBatchKMeans
+    com um passo sobre os próprios centros, pesados pelo número de
+    descritores de cada um: os centros ficam iguais e o passo dos lotes
+    novos já sai proporcional ao histórico.
+    """
+    if not isinstance(kmeans, MiniBatchKMeans):
+        centers = kmeans.cluster_centers_
+        counts = np.bincount(kmeans.labels_, minlength=len(centers)).astype(np.float64)
+        online = MiniBatchKMeans(
+            n_clusters=len(centers), init=centers, n_init=1, random_state=42
+        )
+        online.partial_fit(centers, sample_weight=np.maximum(counts, 1.0))
+        kmeans = online
+    # Sem reatribuição aleatória: trocar uma palavra invalidaria o peso
+    # correspondente no classificador
+    return kmeans.set_params(reassignment_ratio=0.0)
+
+
+def online_classifier(model, alpha, eta0):
+    """
+    SGDClassifier com log_loss que continua de ``model`` (SVC linear ou SGD).
+
+    Taxa de aprendizado constante e pequena: os histogramas são contagens
+    brutas (norma na casa das dezenas) e a taxa "optimal" dá passos que
+    apagam os coeficientes de partida logo nas primeiras amostras.
+    """
+    params = {"alpha": alpha, "learning_rate": "constant", "eta0": eta0}
+    if isinstance(model, SGDClassifier):
+        return model.set_params(**params)
+    sgd = SGDClassifier(loss="log_loss", random_state=42, **params)
+    sgd.coef_ = np.array(model.coef_, dtype=np.float64)
+    sgd.intercept_ = np.array(model.intercept_, dtype=np.float64)
+    return sgd
+
+
+def calibrate(sgd, X, y):
+    """
+    Calibração de Platt: ajusta sigmoid(a * decisão + b) em dados fora do
+    treino e incorpora a e b aos coeficientes, então o predict_proba do
+    SGD (e o artefato NumPy, com link logístico) já sai calibrado. Como no
+    libsvm, os alvos são suavizados ((N+ + 1) / (N+ + 2) e 1 / (N- + 2)),
+    senão dados separáveis levam a inclinação ao infinito. Retorna False,
+    sem mexer no modelo, se faltar uma das classes ou a inclinação não for
+    positiva.
+    """
+    positive = y == sgd.classes_[1]
+    n_pos, n_neg = int(positive.sum()), int((~positive).sum())
+    if not n_pos or not n_neg:
+        return False
+    targets = np.where(positive, (n_pos + 1) / (n_pos + 2), 1 / (n_neg + 2))
+    # Alvo suave t = duas cópias de cada ponto, rótulos 1 e 0 com pesos t e 1 - t
+    scores = np.tile(sgd.decision_function(X), 2).reshape(-1, 1)
+    platt = LogisticRegression(C=1e6).fit(
+        scores,
+        np.repeat([1, 0], len(y)),
+        sample_weight=np.concatenate([targets, 1 - targets]),
+    )
+    a, b = platt.coef_[0, 0], platt.intercept_[0]
+    if a <= 0:
+        return False
+    sgd.coef_ = sgd.coef_ * a
+    sgd.intercept_ = sgd.intercept_ * a + b
+    return True
+
+
+def evaluate(model, kmeans, des_list, labels):
+    """Log loss e acerto da regra de aceitação da API (is_trash) num conjunto rotulado."""
+    X = descriptors_to_hist(des_list, kmeans)
+    probs = model.predict_proba(X)[:, list(model.classes_).index(1)]
+    accepted = np.array([is_trash(pred, prob) for pred, prob in zip(model.predict(X), probs)])
+    return log_loss(labels, probs, labels=[0, 1]), float(np.mean(accepted == (labels == 1)))
+
+
+def split_holdout(labels, fraction, rng):
+    """
+    Índices de treino, calibração e avaliação. A separação é feita por
+    rótulo, para os dois conjuntos fora do treino terem as duas classes.
+    """
+    train, calibration, evaluation = [], [], []
+    for label in np.unique(labels):
+        indices = rng.permutation(np.flatnonzero(labels == label))
+        held = int(round(len(indices) * fraction))
+        train.extend(indices[held:])
+        calibration.extend(indices[:held:2])
+        evaluation.extend(indices[1:held:2])
+    return np.array(train, dtype=int), np.array(calibration, dtype=int), np.array(evaluation, dtype=int)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base", help="versão de partida (padrão: models/CURRENT)")
+    parser.add_argument("--dataset", help="pastas lixo/ e nao_lixo/ com imagens novas")
+    parser.add_argument("--no-db", action="store_true", help="não busca imagens no banco")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--batch-size", type=int, default=4096)
+    parser.add_argument("--epochs", type=int, default=1, help="passadas sobre os dados novos")
+    parser.add_argument("--alpha", type=float, default=1e-4, help="regularização do SGD")
+    parser.add_argument("--eta0", type=float, default=1e-5, help="taxa de aprendizado do SGD")
+    parser.add_argument(
+        "--holdout",
+        type=float,
+        default=0.2,
+        help="fração das imagens novas fora do treino (calibração e avaliação)",
+    )
+    parser.add_argument(
+        "--log-loss-margin",
+        type=float,
+        default=0.05,
+        help="piora tolerada no log loss da avaliação para ativar a versão",
+    )
+    parser.add_argument("--no-activate", action="store_true")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    base = args.base or current_model_version()
+    # Sem modelos versionados, parte dos arquivos soltos em machineLearning/
+    base_dir = model_version_dir(base) if base else MODEL_DIR
+    seen = read_seen(base_dir)
+    # Mesmo pré-processamento da base: o vocabulário continua comparável
+    max_side = stored_max_side(base_dir if base else OUTPUT_DIR)
+
+    with stage("Listando imagens novas"):
+        samples = []
+        if args.dataset:
+            samples += dataset_samples(args.dataset)
+        if not args.no_db:
+            samples += production_samples()
+        new = {}
+        for path, sha256, label in samples:
+            if sha256 not in seen:
+                new.setdefault(sha256, (path, label))
+        print(f"  {len(new)} imagem(ns) nova(s), {len(seen)} já usada(s) pela base")
+    if not new:
+        print("Nada novo para treinar.")
+        return
+
+    with stage(f"Carregando descritores ({args.workers} processo(s))"):
+        jobs = [
+            (path, args.cache_dir, sha256, max_side) for sha256, (path, _) in new.items()
+        ]
+        results = extract_all(jobs, args.workers)
+        hashes, des_list, labels = [], [], []
+        for (sha256, des), (_, label) in zip(results, new.values()):
+            if descriptor_count(des) > 0:
+                hashes.append(sha256)
+                des_list.append(des)
+                labels.append(label)
+        labels = np.array(labels)
+
+    rng = np.random.default_rng(42)
+    train, calibration, evaluation = split_holdout(labels, args.holdout, rng)
+    if not len(train):
+        print("Nenhuma imagem nova com descritores para treinar.")
+        return
+    print(
+        f"  treino: {len(train)}, calibração: {len(calibration)}, avaliação: {len(evaluation)}"
+    )
+
+    def subset(indices):
+        return [des_list[i] for i in indices], labels[indices]
+
+    kmeans = joblib.load(os.path.join(base_dir, "bow.pkl"))
+    model = joblib.load(os.path.join(base_dir, "model.pkl"))
+
+    # Antes do partial_fit, que altera o vocabulário da base no lugar
+    base_score = None
+    if len(evaluation):
+        with stage("Avaliando a versão base"):
+            base_score = evaluate(model, kmeans, *subset(evaluation))
+
+    with stage("Atualizando vocabulário (partial_fit)"):
+        kmeans = online_vocabulary(kmeans)
+        train_des, train_labels = subset(train)
+        for _ in range(args.epochs):
+            for batch in descriptor_batches(train_des, args.batch_size, rng):
+                kmeans.partial_fit(batch)
+
+    with stage("Convertendo descritores para histograma"):
+        X = descriptors_to_hist(train_des, kmeans)
+
+    with stage("Atualizando classificador (partial_fit)"):
+        sgd = online_classifier(model, args.alpha, args.eta0)
+        classes = model.classes_
+        for _ in range(args.epochs):
+            order = rng.permutation(len(X))
+            sgd.partial_fit(X[order], train_labels[order], classes=classes)
+
+    with stage("Calibrando probabilidades (Platt)"):
+        calibration_des, calibration_labels = subset(calibration)
+        calibrated = bool(len(calibration)) and calibrate(
+            sgd, descriptors_to_hist(calibration_des, kmeans), calibration_labels
+        )
+
+    new_score = None
+    if len(evaluation):
+        with stage("Avaliando a versão nova"):
+            new_score = evaluate(sgd, kmeans, *subset(evaluation))
+
+    # Só ativa uma versão calibrada e que não piora em relação à base (a
+    # margem absorve o ruído da calibração com poucas imagens)
+    refusals = []
+    if not calibrated:
+        refusals.append("sem calibração (o conjunto de calibração precisa das duas classes)")
+    if base_score is None:
+        refusals.append("sem imagens de avaliação")
+    else:
+        print(f"  base: log loss {base_score[0]:.4f}, acerto {base_score[1]:.1%}")
+        print(f"  nova: log loss {new_score[0]:.4f}, acerto {new_score[1]:.1%}")
+        if new_score[0] > base_score[0] + args.log_loss_margin:
+            refusals.append("log loss pior que o da base")
+        if new_score[1] < base_score[1]:
+            refusals.append("acerto da regra de aceitação pior que o da base")
+
+    version = new_model_version()
+    output_dir = model_version_dir(version)
+    os.makedirs(output_dir)
+
+    with stage("Salvando artifacts"):
+        joblib.dump(sgd, os.path.join(output_dir, "model.pkl"))
+        joblib.dump(kmeans, os.path.join(output_dir, "bow.pkl"))
+        # Imagens sem descritores também contam como vistas; as separadas
+        # para calibração e avaliação ficam para a próxima rodada
+        held = {hashes[i] for i in np.concatenate([calibration, evaluation])}
+        write_seen(output_dir, seen | (new.keys() - held))
+
+    with stage("Exportando artefato NumPy"):
+        export_numpy_model(model_dir=output_dir, output_dir=output_dir, max_side=max_side)
+
+    activate = not args.no_activate and not refusals
+    if activate:
+        set_current_model_version(version)
+
+    print("\nTempo por etapa:")
+    for name, elapsed in stage_times:
+        print(f"  {name:<45} {elapsed:8.2f}s")
+    print(f"  {'Total':<45} {sum(t for _, t in stage_times):8.2f}s")
+
+    activated = " (models/CURRENT atualizado)" if activate else ""
+    print(f"Treinamento incremental finalizado. Versão {version} (base {base or 'legado'}){activated}")
+    if refusals and not args.no_activate:
+        print(f"Versão não ativada: {'; '.join(refusals)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,74 +1,333 @@
 # ml/train_model.py
+"""
+Treinamento do classificador BoW (ORB + KMeans + SVM linear).
+
+- Descritores ORB extraídos em paralelo (``--workers``) e guardados em
+  cache no disco, um .npy por imagem nomeado pelo sha256 do arquivo:
+  reexecuções só decodificam imagens novas ou alteradas, e cada .npy só
+  é lido quando o lote dele é consumido.
+- Vocabulário com KMeans completo ou MiniBatchKMeans (``--kmeans
+  minibatch``), que consome os descritores em lotes, sem juntar todos em
+  memória.
+- Histogramas vetorizados por lote de imagens.
+- sha256 das imagens usadas gravados em ``trained_images.txt`` da versão,
+  ponto de partida do train_incremental.py.
+- Tempo de cada etapa impresso ao final.
+
+Uso (na raiz do projeto):
+    python machineLearning/train_model.py [--workers 4] [--kmeans minibatch]
+"""
+import argparse
+import hashlib
 import os
+import sys
+import time
+from contextlib import contextmanager
+from multiprocessing import Pool
+
 import cv2
 import numpy as np
 import joblib
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.svm import SVC
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.image_preprocess import decode_image  # noqa: E402
+from app.services.model_store import (  # noqa: E402
+    model_version_dir,
+    new_model_version,
+    set_current_model_version,
+)
+from export_numpy_model import export as export_numpy_model  # noqa: E402
+
 DATASET_PATH = "dataset"
 K = 60  # número de clusters para BoW
+ORB_FEATURES = 500
+LABELS = [("lixo", 1), ("nao_lixo", 0)]
 
-def load_descriptors(path):
-    orb = cv2.ORB_create(nfeatures=500)
-    descriptors_list = []
-    labels = []
+# sha256 das imagens já usadas por uma versão, um por linha
+SEEN_FILE = "trained_images.txt"
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".descriptor_cache")
+# Imagens por lote ao converter descritores em histogramas
+HIST_CHUNK = 256
 
-    for label_name, label in [("lixo", 1), ("nao_lixo", 0)]:
+_orb = None  # um por processo de extração
+stage_times: list[tuple[str, float]] = []
+
+
+@contextmanager
+def stage(name):
+    print(f"{name}...")
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    stage_times.append((name, elapsed))
+    print(f"  {elapsed:.2f}s")
+
+
+def list_images(path):
+    files, labels = [], []
+    for label_name, label in LABELS:
         folder = os.path.join(path, label_name)
         if not os.path.isdir(folder):
             continue
-        for fname in os.listdir(folder):
-            fpath = os.path.join(folder, fname)
-            img = cv2.imdecode(np.fromfile(fpath, dtype=np.uint8), cv2.IMREAD_GRAYSCALE) if os.name == 'nt' else cv2.imread(fpath, cv2.IMREAD_GRAYSCALE)
-            if img is None:
-                continue
-            kp, des = orb.detectAndCompute(img, None)
-            if des is not None and des.shape[0] > 0:
-                descriptors_list.append(des)
-                labels.append(label)
-
-    return descriptors_list, np.array(labels)
-
-def build_bow(descriptors_list, k=K):
-    all_desc = np.vstack(descriptors_list)
-    print("Descriptors shape:", all_desc.shape)
-    kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-    kmeans.fit(all_desc)
+        for fname in sorted(os.listdir(folder)):
+            files.append(os.path.join(folder, fname))
+            labels.append(label)
+    return files, labels
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_seen(directory):
+    try:
+        with open(os.path.join(directory, SEEN_FILE), encoding="utf-8") as f:
+            return {line.strip() for line in f if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+
+def write_seen(directory, hashes):
+    with open(os.path.join(directory, SEEN_FILE), "w", encoding="utf-8") as f:
+        f.writelines(f"{sha256}\n" for sha256 in sorted(hashes))
+
+
+def _cache_path(cache_dir, digest, max_side):
+    # Parâmetros de extração no caminho: mudar max_side ou o ORB não
+    # reaproveita descritores calculados de outro jeito
+    params = f"orb{ORB_FEATURES}-side{max_side or 0}"
+    return os.path.join(cache_dir, params, digest[:2], f"{digest}.npy")
+
+
+def extract_descriptors(fpath, cache_dir=None, digest=None, max_side=None):
+    """
+    (sha256 do arquivo, descritores ORB), com matriz vazia se a imagem for
+    ilegível ou não tiver pontos. Com ``cache_dir``, grava o .npy e retorna
+    o caminho dele em vez da matriz. ``digest`` é o sha256, quando já
+    conhecido; ``max_side`` reduz a imagem antes do ORB (None = original).
+    """
+    global _orb
+    data = np.fromfile(fpath, dtype=np.uint8)
+    digest = digest or hashlib.sha256(data).hexdigest()
+
+    cache_path = None
+    if cache_dir:
+        cache_path = _cache_path(cache_dir, digest, max_side)
+        if os.path.exists(cache_path):
+            return digest, cache_path
+
+    des = None
+    img = decode_image(data, max_side)
+    if img is not None:
+        if _orb is None:
+            _orb = cv2.ORB_create(nfeatures=ORB_FEATURES)
+        _, des = _orb.detectAndCompute(img, None)
+    if des is None:
+        des = np.empty((0, 32), dtype=np.uint8)
+
+    if cache_path is None:
+        return digest, des
+
+    # Também guarda resultados vazios, para não decodificar de novo
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, des)
+    os.replace(tmp_path, cache_path)
+    return digest, cache_path
+
+
+def _extract(args):
+    return extract_descriptors(*args)
+
+
+def extract_all(jobs, workers=1):
+    """
+    (sha256, descritores) de cada job (caminho, cache_dir, sha256 ou None,
+    max_side), na mesma ordem. Com cache, os descritores são o caminho do .npy, lido
+    por ``load_entry`` só quando usado: um memory-map aberto por imagem
+    esgota o vm.max_map_count em datasets grandes.
+    """
+    if workers > 1:
+        with Pool(workers) as pool:
+            return pool.map(_extract, jobs, chunksize=8)
+    return [_extract(job) for job in jobs]
+
+
+def load_entry(des):
+    """Matriz de descritores de um item de ``extract_all`` (matriz ou .npy)."""
+    return np.load(des) if isinstance(des, str) else des
+
+
+def descriptor_count(des):
+    """Número de descritores, lendo só o cabeçalho quando é um .npy."""
+    if not isinstance(des, str):
+        return len(des)
+    with open(des, "rb") as f:
+        if np.lib.format.read_magic(f) == (1, 0):
+            shape, _, _ = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, _, _ = np.lib.format.read_array_header_2_0(f)
+    return shape[0]
+
+
+def load_descriptors(path, workers=1, cache_dir=CACHE_DIR, max_side=None):
+    """Descritores e rótulos das imagens com pontos, e o sha256 de todas."""
+    files, file_labels = list_images(path)
+    results = extract_all([(fpath, cache_dir, None, max_side) for fpath in files], workers)
+
+    descriptors_list = []
+    labels = []
+    for (_, des), label in zip(results, file_labels):
+        if descriptor_count(des) > 0:
+            descriptors_list.append(des)
+            labels.append(label)
+
+    return descriptors_list, np.array(labels), {digest for digest, _ in results}
+
+
+def descriptor_batches(descriptors_list, batch_size, rng):
+    """Lotes de pelo menos ``batch_size`` descritores, em ordem aleatória de imagens."""
+    pending, size = [], 0
+    for i in rng.permutation(len(descriptors_list)):
+        des = load_entry(descriptors_list[i])
+        pending.append(des)
+        size += len(des)
+        if size >= batch_size:
+            yield np.concatenate(pending).astype(np.float64)
+            pending, size = [], 0
+    if pending:
+        yield np.concatenate(pending).astype(np.float64)
+
+
+def build_bow(descriptors_list, k=K, method="full", batch_size=4096, epochs=3):
+    total = sum(descriptor_count(des) for des in descriptors_list)
+    print("Descritores:", total)
+
+    if method == "full":
+        kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
+        kmeans.fit(np.vstack([load_entry(des) for des in descriptors_list]))
+        return kmeans
+
+    # O primeiro lote inicializa os centros (k-means++), então precisa ter
+    # bem mais que k descritores
+    batch_size = max(batch_size, 3 * k)
+    kmeans = MiniBatchKMeans(n_clusters=k, random_state=42, batch_size=batch_size, n_init=3)
+    rng = np.random.default_rng(42)
+    for _ in range(epochs):
+        for batch in descriptor_batches(descriptors_list, batch_size, rng):
+            kmeans.partial_fit(batch)
     return kmeans
 
+
 def descriptors_to_hist(des_list, kmeans):
-    histograms = []
-    for des in des_list:
-        words = kmeans.predict(des)
-        hist, _ = np.histogram(words, bins=range(len(kmeans.cluster_centers_)+1))
-        histograms.append(hist)
-    return np.array(histograms)
+    """Histogramas de palavras visuais, uma chamada de predict por lote de imagens."""
+    k = len(kmeans.cluster_centers_)
+    histograms = np.zeros((len(des_list), k), dtype=np.int64)
+
+    for start in range(0, len(des_list), HIST_CHUNK):
+        chunk = [load_entry(des) for des in des_list[start : start + HIST_CHUNK]]
+        counts = np.array([len(des) for des in chunk])
+        if not counts.sum():
+            continue
+        words = kmeans.predict(np.concatenate(chunk))
+        # Linha da imagem * k + palavra: um único bincount preenche o lote
+        rows = np.repeat(np.arange(len(chunk)), counts)
+        histograms[start : start + len(chunk)] = np.bincount(
+            rows * k + words, minlength=len(chunk) * k
+        ).reshape(len(chunk), k)
+
+    return histograms
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dataset", default=DATASET_PATH)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="processos de extração ORB (1 = sem multiprocessing)",
+    )
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="cache de descritores por imagem")
+    parser.add_argument("--no-cache", action="store_true", help="não lê nem grava o cache")
+    parser.add_argument(
+        "--max-side",
+        type=int,
+        default=None,
+        help="lado maior das imagens antes do ORB (omita para resolução original); "
+        "gravado no params.json da versão, a API decodifica do mesmo jeito",
+    )
+    parser.add_argument("--kmeans", choices=["full", "minibatch"], default="full")
+    parser.add_argument(
+        "--batch-size", type=int, default=4096, help="descritores por lote do MiniBatchKMeans"
+    )
+    parser.add_argument("--epochs", type=int, default=3, help="passadas do MiniBatchKMeans")
+    parser.add_argument(
+        "--no-activate",
+        action="store_true",
+        help="grava a versão sem apontar models/CURRENT para ela",
+    )
+    return parser.parse_args()
+
 
 def main():
-    print("Carregando descritores...")
-    des_list, labels = load_descriptors(DATASET_PATH)
+    args = parse_args()
+    cache_dir = None if args.no_cache else args.cache_dir
+
+    with stage(f"Carregando descritores ({args.workers} processo(s))"):
+        des_list, labels, hashes = load_descriptors(
+            args.dataset, args.workers, cache_dir, args.max_side
+        )
     if len(des_list) == 0:
         print("Nenhum descritor encontrado. Verifique dataset.")
         return
 
-    print("Construindo Bag of Words (KMeans)...")
-    kmeans = build_bow(des_list)
+    with stage(f"Construindo Bag of Words ({args.kmeans})"):
+        kmeans = build_bow(des_list, method=args.kmeans, batch_size=args.batch_size, epochs=args.epochs)
+
+    with stage("Convertendo descritores para histograma"):
+        X = descriptors_to_hist(des_list, kmeans)
+        y = labels
+
+    with stage("Treinando SVM"):
+        svm = SVC(kernel="linear", probability=True, random_state=42)
+        svm.fit(X, y)
+
+    # Cada treinamento vira uma versão nova; a API em execução troca o
+    # modelo quando models/CURRENT passa a apontar para ela
+    version = new_model_version()
+    output_dir = model_version_dir(version)
+    os.makedirs(output_dir)
+
+    with stage("Salvando artifacts"):
+        joblib.dump(svm, os.path.join(output_dir, "model.pkl"))
+        joblib.dump(kmeans, os.path.join(output_dir, "bow.pkl"))
+        # Base do treino incremental: essas imagens não são processadas de novo
+        write_seen(output_dir, hashes)
+
+    with stage("Exportando artefato NumPy"):
+        export_numpy_model(model_dir=output_dir, output_dir=output_dir, max_side=args.max_side)
 
-    print("Convertendo descritores para histograma...")
-    X = descriptors_to_hist(des_list, kmeans)
-    y = labels
+    if not args.no_activate:
+        set_current_model_version(version)
 
-    print("Treinando SVM...")
-    svm = SVC(kernel="linear", probability=True, random_state=42)
-    svm.fit(X, y)
+    print("\nTempo por etapa:")
+    for name, elapsed in stage_times:
+        print(f"  {name:<45} {elapsed:8.2f}s")
+    print(f"  {'Total':<45} {sum(t for _, t in stage_times):8.2f}s")
 
-    print("Salvando artifacts...")
-    os.makedirs("machineLearning", exist_ok=True)
-    joblib.dump(svm, "machineLearning/model.pkl")
-    joblib.dump(kmeans, "machineLearning/bow.pkl")
+    activated = "" if args.no_activate else " (models/CURRENT atualizado)"
+    print(f"Treinamento finalizado. Versão {version} em {output_dir}{activated}")
 
-    print("Treinamento finalizado. model.pkl e bow.pkl em machineLearning/")
 
 if __name__ == "__main__":
     main()